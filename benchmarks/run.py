@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# See LICENSE file for copyright and license details.
+'''
+Benchmarks for pylibgamma, run against the dummy adjustment method so
+that no display is required. The results are written as JSON: an object
+with the Python version, the options, and a list of results, each with
+the name of the benchmark, its parameters, and the number of nanoseconds
+per operation (the minimum and median over the repetitions), or the
+error if the benchmark could not be run.
+
+Usage: benchmarks/run.py [-o output-file] [-r repetitions] [-n ramp-size]...
+'''
+import os, sys, json, time, getopt, platform
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import libgamma
+
+
+DEPTHS = (8, 16, 32, 64, -1, -2)
+'''
+The gamma ramp depths that are benchmarked
+'''
+
+SIZES = (256, 1024, 65536)
+'''
+The default gamma ramp sizes that are benchmarked
+'''
+
+BENCHMARKS = []
+'''
+The benchmarks, in the order they are run; each is a function that
+takes the options and returns a list of tuples of the benchmark's
+parameters and the function to time, a function to time is called
+with the number of operations to perform
+'''
+
+
+def benchmark(function):
+    '''
+    Decorator that registers a benchmark
+    
+    @param   function  The benchmark
+    @return            `function`
+    '''
+    BENCHMARKS.append(function)
+    return function
+
+
+def measure(function, repeat : int, target_ns : int = 20000000) -> dict:
+    '''
+    Time a function
+    
+    @param   function   The function to time, it takes the number of operations to perform
+    @param   repeat     The number of times to time the function
+    @param   target_ns  The approximate number of nanoseconds each timing shall take
+    @return             The number of operations per timing, and the minimum and median
+                        number of nanoseconds per operation
+    '''
+    count = 1
+    while True:
+        start = time.perf_counter_ns()
+        function(count)
+        elapsed = time.perf_counter_ns() - start
+        if elapsed >= target_ns // 10 or count >= 1 << 24:
+            break
+        count *= 10
+    count = max(1, count * target_ns // max(elapsed, 1))
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        function(count)
+        timings.append((time.perf_counter_ns() - start) / count)
+    timings.sort()
+    return {'operations' : count, 'min_ns' : timings[0], 'median_ns' : timings[len(timings) // 2]}
+
+
+def open_crtc():
+    '''
+    Open the first CRTC on the default site of the dummy adjustment method
+    
+    @return  :(Site, Partition, CRTC)  The site, partition, and CRTC
+    '''
+    site = libgamma.Site(libgamma.LIBGAMMA_METHOD_DUMMY)
+    partition = libgamma.Partition(site, 0)
+    return (site, partition, libgamma.CRTC(partition, 0))
+
+
+@benchmark
+def bench_ramps_create(options : dict) -> list:
+    '''
+    Benchmark creation and destruction of gamma ramps
+    
+    @param   options  The options
+    @return           The cases to time
+    '''
+    def run(size, depth):
+        def f(n):
+            for _ in range(n):
+                libgamma.GammaRamps(size, depth = depth)
+        return f
+    return [({'size' : size, 'depth' : depth}, run(size, depth))
+            for depth in DEPTHS for size in options['sizes']]
+
+
+@benchmark
+def bench_ramp_index(options : dict) -> list:
+    '''
+    Benchmark reading and writing single stops in a ramp
+    
+    @param   options  The options
+    @return           The cases to time
+    '''
+    def run(depth):
+        ramps = libgamma.GammaRamps(256, depth = depth)
+        ramp = ramps.red
+        def f(n, ramps = ramps):
+            for i in range(n):
+                ramp[i & 255] = ramp[(i + 1) & 255]
+        return f
+    return [({'depth' : depth}, run(depth)) for depth in DEPTHS]
+
+
+@benchmark
+def bench_ramp_slice(options : dict) -> list:
+    '''
+    Benchmark reading and writing all stops in a ramp with slices
+    
+    @param   options  The options
+    @return           The cases to time
+    '''
+    def run(size, depth):
+        ramps = libgamma.GammaRamps(size, depth = depth)
+        ramp = ramps.red
+        def f(n, ramps = ramps):
+            for _ in range(n):
+                ramp[:] = ramp[:]
+        return f
+    return [({'size' : size, 'depth' : depth}, run(size, depth))
+            for depth in DEPTHS for size in options['sizes']]
+
+
+@benchmark
+def bench_ramp_map(options : dict) -> list:
+    '''
+    Benchmark `Ramp.map`
+    
+    @param   options  The options
+    @return           The cases to time
+    '''
+    def run(size, depth):
+        ramps = libgamma.GammaRamps(size, depth = depth)
+        ramp = ramps.red
+        def f(n, ramps = ramps):
+            for _ in range(n):
+                ramp.map(lambda x : x)
+        return f
+    return [({'size' : size, 'depth' : depth}, run(size, depth))
+            for depth in DEPTHS for size in options['sizes']]
+
+
+@benchmark
+def bench_get_set_gamma(options : dict) -> list:
+    '''
+    Benchmark `CRTC.get_gamma` and `CRTC.set_gamma`
+    
+    @param   options  The options
+    @return           The cases to time
+    '''
+    (site, partition, crtc) = open_crtc()
+    size = crtc.information(libgamma.LIBGAMMA_CRTC_INFO_GAMMA_SIZE)[0]
+    size = (size.red_gamma_size, size.green_gamma_size, size.blue_gamma_size)
+    def run(method, depth):
+        ramps = libgamma.GammaRamps(*size, depth = depth)
+        method = getattr(crtc, method)
+        def f(n):
+            for _ in range(n):
+                method(ramps)
+        return f
+    return [({'operation' : method, 'size' : size[0], 'depth' : depth}, run(method, depth))
+            for method in ('get_gamma', 'set_gamma') for depth in DEPTHS]
+
+
+@benchmark
+def bench_information(options : dict) -> list:
+    '''
+    Benchmark `CRTC.information`
+    
+    @param   options  The options
+    @return           The cases to time
+    '''
+    (site, partition, crtc) = open_crtc()
+    fields = (('gamma_size', libgamma.LIBGAMMA_CRTC_INFO_GAMMA_SIZE),
+              ('edid', libgamma.LIBGAMMA_CRTC_INFO_EDID),
+              ('all', (1 << libgamma.LIBGAMMA_CRTC_INFO_COUNT) - 1))
+    def run(fields):
+        def f(n):
+            for _ in range(n):
+                crtc.information(fields)
+        return f
+    return [({'fields' : name}, run(value)) for (name, value) in fields]
+
+
+@benchmark
+def bench_open(options : dict) -> list:
+    '''
+    Benchmark opening sites, partitions, and CRTC:s
+    
+    @param   options  The options
+    @return           The cases to time
+    '''
+    (site, partition, crtc) = open_crtc()
+    def open_site(n):
+        for _ in range(n):
+            libgamma.Site(libgamma.LIBGAMMA_METHOD_DUMMY)
+    def open_partition(n):
+        for _ in range(n):
+            libgamma.Partition(site, 0)
+    def open_crtc_(n):
+        for _ in range(n):
+            libgamma.CRTC(partition, 0)
+    return [({'object' : 'site'}, open_site),
+            ({'object' : 'partition'}, open_partition),
+            ({'object' : 'crtc'}, open_crtc_)]
+
+
+def main(argv : list) -> int:
+    '''
+    Run the benchmarks
+    
+    @param   argv  The command line arguments, excluding the process name
+    @return        The exit value of the process
+    '''
+    options = {'sizes' : [], 'repeat' : 5, 'output' : None}
+    try:
+        (opts, args) = getopt.getopt(argv, 'o:r:n:')
+        for (opt, arg) in opts:
+            if opt == '-o':
+                options['output'] = arg
+            elif opt == '-r':
+                options['repeat'] = int(arg)
+            else:
+                options['sizes'].append(int(arg))
+        if len(args) > 0 or options['repeat'] < 1:
+            raise getopt.GetoptError('bad usage')
+    except (getopt.GetoptError, ValueError):
+        print('usage: %s [-o output-file] [-r repetitions] [-n ramp-size]...' % sys.argv[0], file = sys.stderr)
+        return 2
+    if len(options['sizes']) == 0:
+        options['sizes'] = list(SIZES)
+    if not libgamma.is_method_available(libgamma.LIBGAMMA_METHOD_DUMMY):
+        print('%s: the dummy adjustment method is not available' % sys.argv[0], file = sys.stderr)
+        return 1
+    results = []
+    for bench in BENCHMARKS:
+        name = bench.__name__[len('bench_'):]
+        try:
+            cases = bench(options)
+        except (libgamma.LibgammaError, OSError) as err:
+            results.append({'name' : name, 'parameters' : {}, 'error' : str(err)})
+            continue
+        for (parameters, function) in cases:
+            result = {'name' : name, 'parameters' : parameters}
+            try:
+                result.update(measure(function, options['repeat']))
+            except (libgamma.LibgammaError, OSError) as err:
+                result['error'] = str(err)
+            results.append(result)
+    report = {'python' : platform.python_implementation() + ' ' + platform.python_version(),
+              'options' : {'sizes' : options['sizes'], 'repeat' : options['repeat']},
+              'results' : results}
+    if options['output'] is None:
+        json.dump(report, sys.stdout, indent = 2)
+        sys.stdout.write('\n')
+    else:
+        with open(options['output'], 'w') as file:
+            json.dump(report, file, indent = 2)
+            file.write('\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -15,3 +15,9 @@ PYTHON = python$(PYTHON_MAJOR)
 CPPFLAGS =
 CFLAGS   =
 LDFLAGS  = -lgamma
+
+# Options for benchmarks/run.py in `make run-bench`, e.g. -o bench.json -n 256
+BENCHFLAGS =
+
+# Maximum cumulative time, in microseconds, `import libgamma` may take in `make check-import-time`
+IMPORT_TIME_BUDGET = 10000
@@ -0,0 +1,79 @@
+/* See LICENSE file for copyright and license details. */
+#include <libgamma.h>
+
+/*
+ * The configuration of the dummy adjustment method is not part of
+ * libgamma's installed headers, this must be kept identical to the
+ * declaration in libgamma's common.h for the version that is linked
+ */
+
+/**
+ * Configuration set for the dummy adjustment method
+ */
+struct libgamma_dummy_configurations {
+	/**
+	 * The method's capabilities
+	 *
+	 * Some fields are ignored:
+	 * - real
+	 * - fake
+	 */
+	struct libgamma_method_capabilities capabilities;
+
+	/**
+	 * Template for CRTC:s information
+	 *
+	 * Some fields are ignored:
+	 * - width_mm_edid
+	 * - width_mm_edid_error
+	 * - height_mm_edid
+	 * - height_mm_edid_error
+	 * - gamma_size_error
+	 * - gamma_depth_error
+	 * - gamma_support_error
+	 * - subpixel_order_error
+	 * - active_error
+	 * - connector_name
+	 * - connector_name_error
+	 * - connector_type_error
+	 */
+	struct libgamma_crtc_information crtc_info_template;
+
+	/**
+	 * The adjustment method to use in the dummy or
+	 * `-1` to use the default method if any
+	 */
+	int real_method;
+
+	/**
+	 * The number of sites on the system
+	 */
+	size_t site_count;
+
+	/**
+	 * The number of partitions on a site before it has been configured
+	 */
+	size_t default_partition_count;
+
+	/**
+	 * The number of CRTC:s on a partition before it has been configured
+	 */
+	size_t default_crtc_count;
+
+	/**
+	 * Whether the sites should be inherited from the real method
+	 */
+	unsigned inherit_real_ramps : 1;
+
+	/**
+	 * When the dummy adjustment method is used with a real
+	 * method, whether to only use the dummy and not the real
+	 * method when the gamma ramps sizes match
+	 */
+	unsigned verify_gamma_size : 1;
+};
+
+/**
+ * Configurations for the dummy adjustment method
+ */
+extern struct libgamma_dummy_configurations libgamma_dummy_internal_configurations;
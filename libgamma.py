@@ -1,4 +1,69 @@
 # See LICENSE file for copyright and license details.
-from libgamma_error import *
-from libgamma_method import *
-from libgamma_facade import *
+
+_modules = ('libgamma_error', 'libgamma_method', 'libgamma_facade',
+            'libgamma_watch', 'libgamma_edid', 'libgamma_monitor',
+            'libgamma_dummy', 'libgamma_backend', 'libgamma_stats',
+            'libgamma_hooks', 'libgamma_debug', 'libgamma_broker',
+            'libgamma_shm', 'libgamma_composite', 'libgamma_schedule',
+            'libgamma_compact', 'libgamma_snapshot')
+'''
+The modules whose public names are available in this module,
+in the order they are searched; a module is not imported until
+one of its names, that is not defined by an earlier module in
+the list, is used
+'''
+
+
+def _public(module) -> list:
+    '''
+    Get the public names in a module
+    
+    @param   module  The module
+    @return          The names `from module import *` would import, except
+                     modules and names imported from outside of `_modules`
+    '''
+    names = getattr(module, '__all__', None)
+    if names is None:
+        import types
+        names = []
+        for (name, value) in vars(module).items():
+            if name.startswith('_') or isinstance(value, types.ModuleType):
+                continue
+            if getattr(value, '__module__', None) not in (None, *_modules):
+                continue
+            names.append(name)
+    return names
+
+
+def __getattr__(name : str):
+    '''
+    Look up a name that has not been loaded yet, and
+    store it in this module so it is found directly next time
+    
+    @param   name  The name
+    @return        The value of the name
+    '''
+    import importlib
+    if name == '__all__':
+        value = sorted({name for module in _modules for name in _public(importlib.import_module(module))})
+    elif name.startswith('_'):
+        raise AttributeError('module %s has no attribute %s' % (repr(__name__), repr(name)))
+    else:
+        for module in _modules:
+            module = importlib.import_module(module)
+            if name in _public(module):
+                value = getattr(module, name)
+                break
+        else:
+            raise AttributeError('module %s has no attribute %s' % (repr(__name__), repr(name)))
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list:
+    '''
+    List the names in this module, all modules are loaded
+    
+    @return  The names in this module
+    '''
+    return sorted(set(globals()) | set(__getattr__('__all__')))
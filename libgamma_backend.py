@@ -0,0 +1,148 @@
+# See LICENSE file for copyright and license details.
+import time
+import errno
+import random
+import threading
+from libgamma_native import native
+
+
+_INFORMATION_ERRORS = (1, 3, 5, 7, 9, 13, 15, 17, 19, 21, 23, 25, 29)
+'''
+The indices of the error fields in the input of `CRTCInformation.__init__`
+'''
+
+
+class Backend:
+    '''
+    Backend for `Site`, `Partition` and `CRTC`, pass
+    it as the `backend` argument when creating a `Site`
+    
+    A backend provides the functions of `native` that the sites,
+    partitions and CRTC:s use, with the same names, arguments and
+    return values: `libgamma_native_site_create`, `_site_free`,
+    `_site_restore`, `_partition_create`, `_partition_free`,
+    `_partition_restore`, `_crtc_create`, `_crtc_free`, `_crtc_restore`,
+    `_get_crtc_information`, and `_crtc_get_gamma_ramps*` and
+    `_crtc_set_gamma_ramps*` for each depth (`8`, `16`, `32`, `64`,
+    `f` and `d`). This class forwards each function it does not
+    define to another backend, by default libgamma, so a subclass
+    only needs to define the functions it changes.
+    
+    @variable  inner  The backend functions are forwarded to, `native` for libgamma
+    '''
+
+    def __init__(self, inner = None):
+        '''
+        Constructor
+        
+        @param  inner  The backend functions are forwarded to, `None` for libgamma
+        '''
+        self.inner = native if inner is None else inner
+
+
+    def __getattr__(self, name : str):
+        '''
+        Look up a function in the inner backend
+        
+        @param   name  The name of the function
+        @return        The function
+        '''
+        if name.startswith('libgamma_native_'):
+            function = getattr(self.inner, name)
+            setattr(self, name, function)
+            return function
+        raise AttributeError('%s object has no attribute %s' % (repr(type(self).__name__), repr(name)))
+
+
+class FakeBackend(Backend):
+    '''
+    Backend that adds simulated latency and failures to `CRTC.get_gamma`,
+    `CRTC.set_gamma` and `CRTC.information` (and the `try_*` variants),
+    for testing scheduling, coalescing and timeout behaviour reproducibly;
+    use it with `LIBGAMMA_METHOD_DUMMY` to run without a display
+    
+    A delayed call sleeps without holding the global interpreter lock,
+    so calls on different threads overlap as they would with libgamma.
+    
+    @variable  latency       The number of seconds each call is delayed
+    @variable  jitter        The maximum number of seconds, chosen uniformly
+                             at random, added to `latency` for each call
+    @variable  failure_rate  The probability, in [0, 1], that a call fails
+    @variable  errors        :list<int>  The error codes, an error identifier provided by this
+                                         library or an `errno` value, a failing call returns;
+                                         chosen uniformly at random
+    @variable  operations    :set<str>  The operations that are affected, a subset of
+                                        'get_gamma', 'set_gamma' and 'information'
+    @variable  calls         :dict<str, int>  The number of calls, per operation
+    @variable  failures      :dict<str, int>  The number of simulated failures, per operation
+    '''
+
+    _OPERATIONS = dict([('libgamma_native_crtc_%s_gamma_ramps%s' % (op, depth), op + '_gamma')
+                        for op in ('get', 'set') for depth in ('8', '16', '32', '64', 'f', 'd')] +
+                       [('libgamma_native_get_crtc_information', 'information')])
+    '''
+    Map from the names of the affected native functions to their operations
+    '''
+
+    def __init__(self, latency : float = 0, jitter : float = 0, failure_rate : float = 0,
+                 errors : list = (errno.EIO,), operations : set = ('get_gamma', 'set_gamma', 'information'),
+                 seed = None, inner = None):
+        '''
+        Constructor
+        
+        @param  latency       The number of seconds each call is delayed
+        @param  jitter        The maximum number of seconds added to `latency`
+        @param  failure_rate  The probability, in [0, 1], that a call fails
+        @param  errors        :itr<int>  The error codes a failing call returns
+        @param  operations    :itr<str>  The operations that are affected
+        @param  seed          The seed for the random number generator, `None` for
+                              a random seed; with a seed the sequence of delays and
+                              failures is reproducible for a sequence of calls
+        @param  inner         The backend functions are forwarded to, `None` for libgamma
+        '''
+        Backend.__init__(self, inner)
+        self.latency      = latency
+        self.jitter       = jitter
+        self.failure_rate = failure_rate
+        self.errors       = list(errors)
+        self.operations   = set(operations)
+        self.calls        = {}
+        self.failures     = {}
+        self._random      = random.Random(seed)
+        self._lock        = threading.Lock()
+
+
+    def __getattr__(self, name : str):
+        '''
+        Look up a function in the inner backend, and
+        add latency and failures if it is affected
+        
+        @param   name  The name of the function
+        @return        The function
+        '''
+        function = Backend.__getattr__(self, name)
+        operation = FakeBackend._OPERATIONS.get(name, None)
+        if operation is None:
+            return function
+        def fake(*args):
+            if operation not in self.operations:
+                return function(*args)
+            with self._lock:
+                delay = self.latency + self._random.uniform(0, self.jitter)
+                failed = self._random.random() < self.failure_rate
+                error = self._random.choice(self.errors) if failed else 0
+                self.calls[operation] = self.calls.get(operation, 0) + 1
+                if failed:
+                    self.failures[operation] = self.failures.get(operation, 0) + 1
+            if delay > 0:
+                time.sleep(delay)
+            if operation == 'information':
+                (data, e) = function(*args)
+                if failed:
+                    for i in _INFORMATION_ERRORS:
+                        data[i] = error
+                    e = -1
+                return (data, e)
+            return error if failed else function(*args)
+        setattr(self, name, fake)
+        return fake
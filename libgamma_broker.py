@@ -0,0 +1,733 @@
+# See LICENSE file for copyright and license details.
+'''
+Gamma broker: a service that owns the site and CRTC:s of an adjustment
+method and applies gamma ramps sent by local clients over a Unix socket
+
+Usage: python -m libgamma_broker [-m method] [-s site] [-S socket]
+
+The method can be given as its number or name (for example `dummy` or
+`x-randr`); by default the first method the environment suggests is used.
+'''
+import os
+import errno
+import socket
+import struct
+import threading
+from libgamma_shm import SharedRamps
+from libgamma_error import LibgammaError, create_error
+from libgamma_method import GammaRamps, Site, Partition, CRTC
+from libgamma_method import LIBGAMMA_CRTC_INFO_MACRO_RAMP
+from libgamma_native import native
+
+
+BROKER_SET = 1
+'''
+Request: set the gamma ramps of a CRTC, the request is followed by the stops
+of the ramps, in the format of `GammaRamps.to_bytes`; there is no reply unless
+`BROKER_SYNC` is set
+'''
+
+BROKER_GET = 2
+'''
+Request: get the gamma ramps of a CRTC, the reply is
+followed by the stops, in the format of `GammaRamps.to_bytes`
+'''
+
+BROKER_LIST = 3
+'''
+Request: list the CRTC:s, the partition, CRTC and sizes fields of the request
+are ignored and the reply is followed by a `_ENTRY` for each CRTC
+'''
+
+BROKER_ATTACH = 4
+'''
+Request: attach a `SharedRamps` segment to a CRTC, the request is followed by
+a single byte sent with the segment's file descriptor as `SCM_RIGHTS` ancillary
+data; the depth and sizes fields of the request are ignored; the segment must be
+an anonymous segment sealed against changing size, as created by `SharedRamps.create`
+where memfd is available
+'''
+
+BROKER_SYNC = 1
+'''
+Request flag: reply to a `BROKER_SET` request once the ramps have been applied
+'''
+
+BROKER_SHARED = 2
+'''
+Request flag: the `BROKER_SET` request is not followed by any stops,
+instead the ramps most recently published in the `SharedRamps` segment
+attached to the CRTC are applied; the depth and sizes fields of the
+request are ignored
+'''
+
+
+_REQUEST = struct.Struct('=BbHIIIII')
+'''
+Request header: the request (`BROKER_*`), the depth of the ramps, the flags
+(`BROKER_SYNC`), the index of the partition, the index of the CRTC, and the
+sizes of the red, green, and blue ramps; in the machine's byte order
+'''
+
+_REPLY = struct.Struct('=iIIII')
+'''
+Reply header: zero on success, otherwise the value of an error identifier
+provided by this library or `errno`; the sizes of the red, green, and blue
+ramps; and the number of bytes that follow the header
+'''
+
+_ENTRY = struct.Struct('=IIIIIii')
+'''
+CRTC in the reply to `BROKER_LIST`: the index of the partition, the index of
+the CRTC, the sizes of the red, green, and blue ramps, the depth of the ramps,
+and zero if the sizes and depth are known, otherwise the value of an error
+identifier provided by this library or `errno`
+'''
+
+_MAX_STOPS = 1 << 16
+'''
+The maximum number of stops in a gamma ramp in a request, larger requests are
+rejected before their stops are read, even if the sizes of the CRTC's gamma
+ramps are unknown
+'''
+
+
+def broker_path(method : int, site : str = None) -> str:
+    '''
+    Get the default pathname of the socket of a broker
+    
+    @param   method  The adjustment method of the site
+    @param   site    The site identifier
+    @return          The pathname of the socket, in `$XDG_RUNTIME_DIR`,
+                     or the directory for temporary files if not set
+    '''
+    import tempfile
+    directory = os.environ.get('XDG_RUNTIME_DIR', '') or tempfile.gettempdir()
+    name = 'libgamma-broker-%i' % method
+    if site is not None:
+        name += '-' + site.replace('/', '_')
+    return os.path.join(directory, name)
+
+
+def _payload_size(depth : int, red_size : int, green_size : int, blue_size : int) -> int:
+    '''
+    Get the number of bytes in the stops of gamma ramps
+    
+    @param   depth       The depth of the gamma ramps
+    @param   red_size    The number of stops in the red gamma ramp
+    @param   green_size  The number of stops in the green gamma ramp
+    @param   blue_size   The number of stops in the blue gamma ramp
+    @return              The number of bytes, `None` if the depth is invalid
+    '''
+    sizes = GammaRamps._sizes
+    if sizes is None:
+        sizes = GammaRamps._sizes = native.libgamma_native_gamma_ramps_sizes()
+    if depth not in sizes:
+        return None
+    return (red_size + green_size + blue_size) * sizes[depth][1]
+
+
+def _recv(sock, n : int) -> bytearray:
+    '''
+    Read an exact number of bytes from a socket
+    
+    @param   sock  The socket
+    @param   n     The number of bytes to read
+    @return        The read bytes, `None` if the connection was closed
+                   before any byte was read
+    '''
+    buf = bytearray(n)
+    view = memoryview(buf)
+    got = 0
+    while got < n:
+        r = sock.recv_into(view[got:])
+        if r == 0:
+            if got == 0:
+                return None
+            raise ConnectionError('connection closed in the middle of a message')
+        got += r
+    return buf
+
+
+class Broker:
+    '''
+    Service that owns a site and its CRTC:s and applies gamma
+    ramps sent by clients, see `BrokerClient`, over a Unix socket
+    
+    Requests are read by one thread per client, and the ramps are applied
+    by a separate thread, so clients do not wait for the adjustment method.
+    If a CRTC is updated again before its previous update has been applied,
+    only the most recent update is applied; all updates that are pending
+    when the applying thread wakes up are applied together.
+    
+    @variable  site:Site  The site
+    @variable  path:str   The pathname of the socket
+    '''
+
+    def __init__(self, site : Site, path : str = None):
+        '''
+        Constructor
+        
+        @param  site  The site, the broker does not close it
+        @param  path  The pathname of the socket, `None` for `broker_path`
+        '''
+        self.site = site
+        self.path = broker_path(site.method, site.site) if path is None else path
+        self._partitions = {}
+        self._crtcs = {}
+        self._ramp_sizes = {}
+        self._lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._pending = {}
+        self._scratch = {}
+        self._shared = {}
+        self._closed = False
+        self._clients = set()
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self._bind()
+        except BaseException:
+            self._socket.close()
+            raise
+        self._applier = threading.Thread(target = self._apply, name = 'libgamma-broker-apply', daemon = True)
+        self._applier.start()
+
+
+    def _bind(self):
+        '''
+        Bind and listen on the socket, replacing a stale socket file
+        '''
+        try:
+            self._socket.bind(self.path)
+        except OSError as err:
+            if not err.errno == errno.EADDRINUSE:
+                raise
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.path)
+            except ConnectionRefusedError:
+                os.unlink(self.path)
+                self._socket.bind(self.path)
+            else:
+                raise
+            finally:
+                probe.close()
+        self._socket.listen(16)
+
+
+    def __enter__(self):
+        '''
+        Enter a `with` statement
+        
+        @return  :Broker  `self`
+        '''
+        return self
+
+
+    def __exit__(self, *exc_info):
+        '''
+        Leave a `with` statement, closes the broker
+        '''
+        self.close()
+
+
+    def close(self):
+        '''
+        Stop accepting clients, disconnect the clients, apply the
+        pending updates, and remove the socket; the CRTC:s and
+        partitions are closed, but not the site
+        '''
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        try:
+            self._socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._socket.close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+        for client in list(self._clients):
+            try:
+                client.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if not self._applier is threading.current_thread():
+            self._applier.join()
+        with self._lock:
+            for crtc in self._crtcs.values():
+                crtc.close()
+            for partition in self._partitions.values():
+                partition.close()
+            for ramps in self._scratch.values():
+                ramps.close()
+            for shared in self._shared.values():
+                shared.close()
+            self._crtcs.clear()
+            self._ramp_sizes.clear()
+            self._partitions.clear()
+            self._scratch.clear()
+            self._shared.clear()
+
+
+    def serve_forever(self):
+        '''
+        Accept clients until the broker is closed, each
+        client is served on a thread of its own
+        '''
+        while not self._closed:
+            try:
+                (client, _address) = self._socket.accept()
+            except OSError:
+                if self._closed:
+                    return
+                raise
+            self._clients.add(client)
+            threading.Thread(target = self._serve, args = (client,), daemon = True).start()
+
+
+    def _crtc(self, partition : int, crtc : int) -> CRTC:
+        '''
+        Get a CRTC, it is opened the first time
+        
+        @param   partition  The index of the partition
+        @param   crtc       The index of the CRTC within the partition
+        @return             The CRTC
+        '''
+        key = (partition, crtc)
+        rc = self._crtcs.get(key, None)
+        if rc is None:
+            with self._lock:
+                rc = self._crtcs.get(key, None)
+                if rc is None:
+                    p = self._partitions.get(partition, None)
+                    if p is None:
+                        p = self._partitions[partition] = Partition(self.site, partition)
+                    rc = self._crtcs[key] = CRTC(p, crtc)
+        return rc
+
+
+    def _check(self, partition : int, crtc : int, target : CRTC, sizes : tuple) -> int:
+        '''
+        Check that gamma ramps in a request have the sizes of the CRTC's
+        gamma ramps; the sizes are queried the first time
+        
+        @param   partition  The index of the partition
+        @param   crtc       The index of the CRTC within the partition
+        @param   target     The CRTC
+        @param   sizes      :(int, int, int)  The sizes of the gamma ramps in the request
+        @return             Zero if the sizes are correct or the CRTC's sizes are unknown,
+                            otherwise `errno.EINVAL`
+        '''
+        key = (partition, crtc)
+        if key not in self._ramp_sizes:
+            with self._lock:
+                (info, _ok) = target.information(LIBGAMMA_CRTC_INFO_MACRO_RAMP)
+            if info.gamma_size_error == 0:
+                self._ramp_sizes[key] = (info.red_gamma_size, info.green_gamma_size, info.blue_gamma_size)
+            else:
+                self._ramp_sizes[key] = None
+        expected = self._ramp_sizes[key]
+        return 0 if expected is None or expected == sizes else errno.EINVAL
+
+
+    def _serve(self, client):
+        '''
+        Serve a client until it disconnects, the client is disconnected
+        if it sends a malformed request or a request that cannot be served
+        
+        @param  client  :socket  The client's socket
+        '''
+        try:
+            while True:
+                header = _recv(client, _REQUEST.size)
+                if header is None:
+                    break
+                (request, depth, flags, partition, crtc, red, green, blue) = _REQUEST.unpack(header)
+                if request == BROKER_LIST:
+                    client.sendall(self._list())
+                    continue
+                if request == BROKER_ATTACH:
+                    client.sendall(_REPLY.pack(self._attach(client, partition, crtc), 0, 0, 0, 0))
+                    continue
+                if request == BROKER_SET and flags & BROKER_SHARED:
+                    data = self._shared.get((partition, crtc), None)
+                    if data is None:
+                        if flags & BROKER_SYNC:
+                            client.sendall(_REPLY.pack(errno.ENOENT, red, green, blue, 0))
+                        continue
+                    (depth, (red, green, blue)) = (data.depth, data.size)
+                    n = 0
+                else:
+                    n = _payload_size(depth, red, green, blue)
+                    if n is None or request not in (BROKER_SET, BROKER_GET) or max(red, green, blue) > _MAX_STOPS:
+                        if request == BROKER_GET or flags & BROKER_SYNC:
+                            client.sendall(_REPLY.pack(errno.EINVAL, red, green, blue, 0))
+                        break
+                    data = b''
+                try:
+                    target = self._crtc(partition, crtc)
+                    r = self._check(partition, crtc, target, (red, green, blue))
+                except (LibgammaError, OSError) as err:
+                    r = err.errno
+                if request == BROKER_SET and n > 0:
+                    data = _recv(client, n)
+                    if data is None:
+                        break
+                if not r == 0:
+                    if request == BROKER_GET or flags & BROKER_SYNC:
+                        client.sendall(_REPLY.pack(r, red, green, blue, 0))
+                    continue
+                if request == BROKER_GET:
+                    (r, data) = self._get(partition, crtc, target, depth, (red, green, blue))
+                    client.sendall(_REPLY.pack(r, red, green, blue, len(data)) + data)
+                    continue
+                waiter = [threading.Event(), 0] if flags & BROKER_SYNC else None
+                with self._cond:
+                    if self._closed:
+                        break
+                    pending = self._pending.get((partition, crtc), None)
+                    waiters = [] if pending is None else pending[4]
+                    if waiter is not None:
+                        waiters.append(waiter)
+                    self._pending[(partition, crtc)] = (target, depth, (red, green, blue), data, waiters)
+                    self._cond.notify()
+                if waiter is not None:
+                    waiter[0].wait()
+                    client.sendall(_REPLY.pack(waiter[1], red, green, blue, 0))
+        except (OSError, ValueError, MemoryError):
+            # `ValueError` if the broker has been closed, `MemoryError` if the
+            # stops cannot be stored; only this client is disconnected
+            pass
+        finally:
+            self._clients.discard(client)
+            client.close()
+
+
+    def _attach(self, client, partition : int, crtc : int) -> int:
+        '''
+        Receive a `SharedRamps` segment and attach it to a CRTC
+        
+        @param   client     :socket  The client's socket
+        @param   partition  The index of the partition
+        @param   crtc       The index of the CRTC within the partition
+        @return             Zero on success, otherwise the value of an error
+                            identifier provided by this library or `errno`
+        '''
+        import array
+        fds = array.array('i')
+        (_data, ancdata, _flags, _address) = client.recvmsg(1, socket.CMSG_SPACE(fds.itemsize))
+        for (level, kind, data) in ancdata:
+            if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+                fds.frombytes(data[:len(data) - len(data) % fds.itemsize])
+        if len(fds) == 0:
+            return errno.EBADF
+        try:
+            self._crtc(partition, crtc)
+            shared = SharedRamps(fds[0], sealed = True)
+        except (LibgammaError, OSError) as err:
+            return err.errno
+        except ValueError:
+            return errno.EINVAL
+        finally:
+            for fd in fds:
+                os.close(fd)
+        # A replaced segment may still be pending, so it is closed when it is no longer referenced
+        self._shared[(partition, crtc)] = shared
+        return 0
+
+
+    def _get(self, partition : int, crtc : int, target : CRTC, depth : int, sizes : tuple) -> tuple:
+        '''
+        Read the gamma ramps of a CRTC, a pending update is returned
+        as if it had been applied, if it has the same depth and sizes
+        
+        @param   partition  The index of the partition
+        @param   crtc       The index of the CRTC within the partition
+        @param   target     The CRTC
+        @param   depth      The depth of the gamma ramps
+        @param   sizes      :(int, int, int)  The sizes of the gamma ramps
+        @return             :(int, bytes)     Zero on success, otherwise the value of an error
+                                              identifier provided by this library or `errno`;
+                                              and the stops
+        '''
+        with self._cond:
+            pending = self._pending.get((partition, crtc), None)
+        if pending is not None and pending[1] == depth and pending[2] == sizes and \
+           not isinstance(pending[3], SharedRamps):
+            return (0, bytes(pending[3]))
+        with GammaRamps(*sizes, depth = depth) as ramps:
+            with self._lock:
+                r = target.try_get_gamma(ramps)
+            return (r, b'' if not r == 0 else ramps.to_bytes())
+
+
+    def _list(self) -> bytes:
+        '''
+        Create the reply to a `BROKER_LIST` request
+        
+        @return  The reply
+        '''
+        entries = []
+        for p in range(self.site.partitions_available):
+            try:
+                with self._lock:
+                    partition = self._partitions.get(p, None)
+                    if partition is None:
+                        partition = self._partitions[p] = Partition(self.site, p)
+                crtcs = partition.crtcs_available
+            except (LibgammaError, OSError):
+                continue
+            for c in range(crtcs):
+                try:
+                    target = self._crtc(p, c)
+                    with self._lock:
+                        (info, _ok) = target.information(LIBGAMMA_CRTC_INFO_MACRO_RAMP)
+                except (LibgammaError, OSError):
+                    continue
+                e = info.gamma_size_error or info.gamma_depth_error
+                entries.append(_ENTRY.pack(p, c, info.red_gamma_size, info.green_gamma_size,
+                                           info.blue_gamma_size, info.gamma_depth, e))
+        data = b''.join(entries)
+        return _REPLY.pack(0, 0, 0, 0, len(data)) + data
+
+
+    def _apply(self):
+        '''
+        Apply pending updates until the broker is closed
+        '''
+        while True:
+            with self._cond:
+                while len(self._pending) == 0 and not self._closed:
+                    self._cond.wait()
+                (batch, self._pending) = (self._pending, {})
+                closed = self._closed
+            for (target, depth, sizes, data, waiters) in batch.values():
+                if isinstance(data, SharedRamps):
+                    with self._lock:
+                        r = data.apply(target)
+                else:
+                    ramps = self._scratch.get((depth, sizes), None)
+                    if ramps is None:
+                        ramps = self._scratch[(depth, sizes)] = GammaRamps(*sizes, depth = depth)
+                    ramps.load_bytes(data)
+                    with self._lock:
+                        r = target.try_set_gamma(ramps)
+                for waiter in waiters:
+                    waiter[1] = r
+                    waiter[0].set()
+            if closed:
+                return
+
+
+class BrokerClient:
+    '''
+    Connection to a `Broker`
+    
+    The methods can be called from multiple threads.
+    '''
+
+    def __init__(self, path : str):
+        '''
+        Constructor
+        
+        @param  path  The pathname of the broker's socket, see `broker_path`
+        '''
+        self._lock = threading.Lock()
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self._socket.connect(path)
+        except BaseException:
+            self._socket.close()
+            raise
+
+
+    def __enter__(self):
+        '''
+        Enter a `with` statement
+        
+        @return  :BrokerClient  `self`
+        '''
+        return self
+
+
+    def __exit__(self, *exc_info):
+        '''
+        Leave a `with` statement, closes the connection
+        '''
+        self.close()
+
+
+    def close(self):
+        '''
+        Disconnect from the broker
+        '''
+        self._socket.close()
+
+
+    def _reply(self) -> tuple:
+        '''
+        Read a reply
+        
+        @return  :(int, bytearray)  Zero on success, otherwise the value of an error
+                                    identifier provided by this library or `errno`;
+                                    and the data that followed the header
+        '''
+        header = _recv(self._socket, _REPLY.size)
+        if header is None:
+            raise ConnectionError('broker closed the connection')
+        (r, _red, _green, _blue, n) = _REPLY.unpack(header)
+        return (r, _recv(self._socket, n) if n > 0 else bytearray())
+
+
+    def crtcs(self) -> list:
+        '''
+        List the CRTC:s of the broker's site
+        
+        @return  :list<(int, int, (int, int, int), int, int)>  For each CRTC: the index of its
+                                                               partition, its index, the sizes
+                                                               of its gamma ramps, the depth of
+                                                               its gamma ramps, and zero if the
+                                                               sizes and depth are known
+        '''
+        with self._lock:
+            self._socket.sendall(_REQUEST.pack(BROKER_LIST, 0, 0, 0, 0, 0, 0, 0))
+            (_r, data) = self._reply()
+        rc = []
+        for (p, c, red, green, blue, depth, e) in _ENTRY.iter_unpack(data):
+            rc.append((p, c, (red, green, blue), depth, e))
+        return rc
+
+
+    def set_gamma(self, partition : int, crtc : int, ramps : GammaRamps, wait : bool = False):
+        '''
+        Set the gamma ramps of a CRTC
+        
+        @param  partition  The index of the partition
+        @param  crtc       The index of the CRTC within the partition
+        @param  ramps      The gamma ramps to apply
+        @param  wait       Whether to wait until the ramps have been applied and raise an
+                           exception if they could not be; otherwise this function returns
+                           as soon as the ramps have been sent and errors are ignored
+        '''
+        header = _REQUEST.pack(BROKER_SET, ramps.depth, BROKER_SYNC if wait else 0, partition, crtc, *ramps.size)
+        data = ramps.to_bytes()
+        with self._lock:
+            self._socket.sendall(header + data)
+            if not wait:
+                return
+            (r, _data) = self._reply()
+        if not r == 0:
+            raise create_error(r)
+
+
+    def attach(self, partition : int, crtc : int, shared : SharedRamps):
+        '''
+        Attach a shared gamma ramps segment to a CRTC, replacing
+        any segment previously attached to the CRTC, see `publish`
+        
+        @param  partition  The index of the partition
+        @param  crtc       The index of the CRTC within the partition
+        @param  shared     The segment
+        '''
+        import array
+        header = _REQUEST.pack(BROKER_ATTACH, 0, 0, partition, crtc, 0, 0, 0)
+        fds = array.array('i', [shared.fileno()])
+        with self._lock:
+            self._socket.sendall(header)
+            self._socket.sendmsg([b'\0'], [(socket.SOL_SOCKET, socket.SCM_RIGHTS, fds)])
+            (r, _data) = self._reply()
+        if not r == 0:
+            raise create_error(r)
+
+
+    def publish(self, partition : int, crtc : int, shared : SharedRamps, wait : bool = False):
+        '''
+        Publish the ramps written to `shared.back()` and have
+        the broker apply them, the ramps are not copied
+        
+        @param  partition  The index of the partition
+        @param  crtc       The index of the CRTC within the partition
+        @param  shared     The segment attached to the CRTC with `attach`
+        @param  wait       Whether to wait until the ramps have been applied and raise an
+                           exception if they could not be; otherwise this function returns
+                           as soon as the broker has been notified and errors are ignored
+        '''
+        shared.publish()
+        flags = BROKER_SHARED | (BROKER_SYNC if wait else 0)
+        with self._lock:
+            self._socket.sendall(_REQUEST.pack(BROKER_SET, 0, flags, partition, crtc, 0, 0, 0))
+            if not wait:
+                return
+            (r, _data) = self._reply()
+        if not r == 0:
+            raise create_error(r)
+
+
+    def get_gamma(self, partition : int, crtc : int, ramps : GammaRamps):
+        '''
+        Get the gamma ramps of a CRTC, including updates not applied yet
+        
+        @param  partition  The index of the partition
+        @param  crtc       The index of the CRTC within the partition
+        @param  ramps      The gamma ramps to fill with the current values
+        '''
+        header = _REQUEST.pack(BROKER_GET, ramps.depth, 0, partition, crtc, *ramps.size)
+        with self._lock:
+            self._socket.sendall(header)
+            (r, data) = self._reply()
+        if not r == 0:
+            raise create_error(r)
+        ramps.load_bytes(data)
+
+
+def _method(name : str) -> int:
+    '''
+    Parse the name or number of an adjustment method
+    
+    @param   name  The name, for example `dummy` or `x-randr`, or the number of the method
+    @return        The adjustment method
+    '''
+    import libgamma_method
+    if name.isdigit():
+        return int(name)
+    value = getattr(libgamma_method, 'LIBGAMMA_METHOD_' + name.upper().replace('-', '_'), None)
+    if not isinstance(value, int):
+        raise ValueError('unknown adjustment method: %s' % name)
+    return value
+
+
+def _main(argv : list = None):
+    '''
+    Run a broker until it is interrupted
+    
+    @param  argv  The command line arguments, without the program name, `None` for `sys.argv[1:]`
+    '''
+    import sys, getopt, signal
+    from libgamma_facade import list_methods
+    (opts, args) = getopt.getopt(sys.argv[1:] if argv is None else argv, 'm:s:S:')
+    if len(args) > 0:
+        raise SystemExit('usage: python -m libgamma_broker [-m method] [-s site] [-S socket]')
+    opts = dict(opts)
+    if '-m' in opts:
+        method = _method(opts['-m'])
+    else:
+        methods = list_methods(0)
+        if len(methods) == 0:
+            raise SystemExit('no adjustment method available')
+        method = methods[0]
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    with Site(method, opts.get('-s', None)) as site:
+        with Broker(site, opts.get('-S', None)) as broker:
+            try:
+                broker.serve_forever()
+            except KeyboardInterrupt:
+                pass
+
+
+if __name__ == '__main__':
+    _main()
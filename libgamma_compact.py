@@ -0,0 +1,189 @@
+# See LICENSE file for copyright and license details.
+import math
+import array
+import weakref
+from libgamma_error import create_error
+from libgamma_method import GammaRamps
+from libgamma_method import LIBGAMMA_CRTC_INFO_MACRO_RAMP
+from libgamma_native import native
+
+
+_crtc_ramps = weakref.WeakKeyDictionary()
+'''
+The sizes and depth of the gamma ramps of each
+CRTC that `CompactRamps.apply` has been used on
+'''
+
+
+def _tolerance(depth : int) -> float:
+    '''
+    Get the default tolerance for compressing gamma ramps
+    
+    @param   depth  The depth of the gamma ramps
+    @return         Slightly less than half the difference between two adjacent values
+                    at the depth, but at most 16 bits, so that ramps of at most 16 bits
+                    are reproduced exactly when expanded to the same size and depth
+    '''
+    return 0.49 / ((1 << min(depth, 16)) - 1) if depth > 0 else 0.49 / 0xFFFF
+
+
+class CompactRamps:
+    '''
+    Gamma ramps stored as piecewise linear curves, a compact
+    representation for smooth gamma ramps of any size and depth
+    
+    The curves are expanded to `GammaRamps` when needed, and the expansion
+    is cached for each combination of sizes and depth. The curves cannot be
+    modified, create a new object instead. The objects can be pickled.
+    
+    @variable  tolerance:float  The greatest difference, in [0, 1] scale, between
+                                the curves and the gamma ramps they were created
+                                from, zero if they were created from control points
+    '''
+
+    def __init__(self, red, green = ..., blue = ..., *, tolerance : float = 0):
+        '''
+        Constructor
+        
+        @param  red        :itr<(float, float)>  The control points of the curve for the red channel,
+                                                 each is a position, in [0, 1], and a value, in [0, 1]
+                                                 scale for all depths; in ascending order of position
+        @param  green      :itr<(float, float)>  The control points for the green channel, `...` for `red`
+        @param  blue       :itr<(float, float)>  The control points for the blue channel, `...` for `green`
+        @param  tolerance  The greatest error of the curves
+        '''
+        if green is ...:  green = red
+        if blue is ...:   blue = green
+        channels = []
+        for points in (red, green, blue):
+            points = list(points)
+            xs = array.array('d', [float(x) for (x, _y) in points])
+            ys = array.array('d', [float(y) for (_x, y) in points])
+            if len(xs) == 0 or any(xs[i] > xs[i + 1] for i in range(len(xs) - 1)):
+                raise ValueError('invalid control points')
+            channels.append((xs, ys))
+        self._channels = tuple(channels)
+        self.tolerance = tolerance
+        self._cache = {}
+
+
+    @classmethod
+    def from_ramps(cls, ramps : GammaRamps, tolerance : float = None):
+        '''
+        Approximate gamma ramps with piecewise linear curves
+        
+        @param   ramps      The gamma ramps
+        @param   tolerance  The greatest allowed difference, in [0, 1] scale, between
+                            the curves and the ramps at the ramps' stops; `None` for
+                            slightly less than half the difference between two adjacent
+                            values, but at most 16 bits, so that ramps of at most 16 bits
+                            are reproduced exactly
+        @return             :CompactRamps  The curves
+        '''
+        if tolerance is None:
+            tolerance = _tolerance(ramps.depth)
+        elif not (math.isfinite(tolerance) and tolerance >= 0):
+            raise ValueError('invalid tolerance')
+        if ramps._ramps == 0:
+            raise ValueError('operation on closed object')
+        channels = []
+        for ramp in (ramps.red, ramps.green, ramps.blue):
+            if ramp.size == 0:
+                raise ValueError('cannot compress empty ramp')
+            r = native.libgamma_native_gamma_ramp_compress(ramp._ramp, ramp.size, ramps.depth, tolerance)
+            if isinstance(r, int):
+                raise create_error(r)
+            (xs, ys) = (array.array('d'), array.array('d'))
+            xs.frombytes(r[0])
+            ys.frombytes(r[1])
+            channels.append((xs, ys))
+        rc = cls.__new__(cls)
+        rc._channels = tuple(channels)
+        rc.tolerance = tolerance
+        rc._cache = {}
+        return rc
+
+
+    def __getstate__(self) -> tuple:
+        '''
+        Get the state to pickle, the cached expansions are not included
+        
+        @return  The control points and the tolerance
+        '''
+        return (tuple((xs.tolist(), ys.tolist()) for (xs, ys) in self._channels), self.tolerance)
+
+
+    def __setstate__(self, state : tuple):
+        '''
+        Restore a pickled object
+        
+        @param  state  The value returned by `__getstate__`
+        '''
+        (channels, self.tolerance) = state
+        self._channels = tuple((array.array('d', xs), array.array('d', ys)) for (xs, ys) in channels)
+        self._cache = {}
+
+
+    @property
+    def points(self) -> tuple:
+        '''
+        Get the control points
+        
+        @return  :(list<(float, float)>){3}  The position and value of the control
+                                             points of the red, green, and blue curves
+        '''
+        return tuple(list(zip(xs, ys)) for (xs, ys) in self._channels)
+
+
+    def expand_into(self, ramps : GammaRamps):
+        '''
+        Evaluate the curves into gamma ramps
+        
+        @param  ramps  The gamma ramps to fill, they may have any sizes and depth
+        '''
+        if ramps._ramps == 0:
+            raise ValueError('operation on closed object')
+        if ramps._watched:
+            ramps._modify()
+        for (ramp, (xs, ys)) in zip((ramps.red, ramps.green, ramps.blue), self._channels):
+            native.libgamma_native_gamma_ramp_expand(ramp._ramp, ramp.size, ramps.depth, xs, ys)
+
+
+    def expand(self, red_size : int, green_size : int = ..., blue_size : int = ..., *, depth : int = 16) -> GammaRamps:
+        '''
+        Get the curves as gamma ramps, the result is cached
+        
+        @param   red_size    The number of stops in the gamma ramp for the red channel
+        @param   green_size  The number of stops in the gamma ramp for the green channel, `...` for `red_size`
+        @param   blue_size   The number of stops in the gamma ramp for the blue channel, `...` for `green_size`
+        @param   depth       The depth of the gamma ramps
+        @return              The gamma ramps, they are shared by all callers and must not be modified
+        '''
+        if green_size is ...:  green_size = red_size
+        if blue_size is ...:   blue_size = green_size
+        key = (red_size, green_size, blue_size, depth)
+        ramps = self._cache.get(key, None)
+        if ramps is None:
+            ramps = GammaRamps(red_size, green_size, blue_size, depth = depth)
+            self.expand_into(ramps)
+            self._cache[key] = ramps
+        return ramps
+
+
+    def apply(self, crtc):
+        '''
+        Apply the curves to a CRTC, expanded to the sizes and depth of its gamma
+        ramps, which are read the first time the CRTC is used with any `CompactRamps`
+        
+        @param  crtc  :CRTC  The CRTC
+        '''
+        ramp = _crtc_ramps.get(crtc, None)
+        if ramp is None:
+            (info, _ok) = crtc.information(LIBGAMMA_CRTC_INFO_MACRO_RAMP)
+            if not info.gamma_size_error == 0:
+                raise create_error(info.gamma_size_error)
+            if not info.gamma_depth_error == 0:
+                raise create_error(info.gamma_depth_error)
+            ramp = (info.red_gamma_size, info.green_gamma_size, info.blue_gamma_size, info.gamma_depth)
+            _crtc_ramps[crtc] = ramp
+        crtc.set_gamma(self.expand(*ramp[:3], depth = ramp[3]))
@@ -0,0 +1,214 @@
+# See LICENSE file for copyright and license details.
+import array
+import threading
+from libgamma_error import create_error
+from libgamma_method import GammaRamps, CRTC
+from libgamma_method import LIBGAMMA_CRTC_INFO_MACRO_RAMP
+
+
+_TYPECODES = {8 : 'B', 16 : 'H', 32 : 'I' if array.array('I').itemsize == 4 else 'L', 64 : 'Q', -1 : 'f', -2 : 'd'}
+'''
+The `array` type code for the stops of each gamma ramp depth
+'''
+
+
+def _split(layer) -> tuple:
+    '''
+    Split a layer into its channels
+    
+    @param   layer  A curve or lookup table, or a tuple of one for each channel
+    @return         :(curve|LUT, curve|LUT, curve|LUT)  The red, green, and blue channels
+    '''
+    if isinstance(layer, (tuple, list)) and len(layer) == 3 and \
+       all(callable(channel) or isinstance(channel, (tuple, list)) for channel in layer):
+        return tuple(layer)
+    return (layer, layer, layer)
+
+
+def _filter(channel, values : list) -> list:
+    '''
+    Apply a channel of a layer to a ramp
+    
+    @param   channel  :(float)→float|list<float>  The curve or lookup table
+    @param   values   :list<float>                The ramp, in [0, 1]
+    @return           :list<float>                The filtered ramp
+    '''
+    if callable(channel):
+        return [channel(value) for value in values]
+    last = len(channel) - 1
+    if last == 0:
+        return [channel[0]] * len(values)
+    rc = []
+    for value in values:
+        x = min(max(value, 0.0), 1.0) * last
+        i = min(int(x), last - 1)
+        rc.append(channel[i] + (channel[i + 1] - channel[i]) * (x - i))
+    return rc
+
+
+class CompositeCRTC:
+    '''
+    CRTC whose gamma ramps are composed from an ordered stack of layers,
+    so that independent components can adjust the same CRTC
+    
+    A layer is a curve, a function from [0, 1] to [0, 1], or a lookup table,
+    a list of values in [0, 1] for evenly spaced input values, that applies
+    to all channels, or a tuple of three such, for the red, green, and blue
+    channels. The layers are applied in ascending order of priority, layers
+    with the same priority are applied in the order they were added.
+    
+    The result of each prefix of the stack is cached, so when a layer is
+    changed only it and the layers after it are recomputed, and the ramps
+    are only applied if they changed. The functions can be called from
+    multiple threads.
+    
+    @variable  crtc:CRTC  The CRTC
+    '''
+
+    def __init__(self, crtc : CRTC, sizes : tuple = None, depth : int = None):
+        '''
+        Constructor
+        
+        @param  crtc   The CRTC
+        @param  sizes  :(int, int, int)?  The sizes of the CRTC's gamma ramps, `None` to read them from the CRTC
+        @param  depth  The depth of the CRTC's gamma ramps, `None` to read it from the CRTC
+        '''
+        if sizes is None or depth is None:
+            (info, _ok) = crtc.information(LIBGAMMA_CRTC_INFO_MACRO_RAMP)
+            if sizes is None:
+                if not info.gamma_size_error == 0:
+                    raise create_error(info.gamma_size_error)
+                sizes = (info.red_gamma_size, info.green_gamma_size, info.blue_gamma_size)
+            if depth is None:
+                if not info.gamma_depth_error == 0:
+                    raise create_error(info.gamma_depth_error)
+                depth = info.gamma_depth
+        self.crtc = crtc
+        self._ramps = GammaRamps(*sizes, depth = depth)
+        self._identity = tuple([i / max(n - 1, 1) for i in range(n)] for n in sizes)
+        self._layers = []
+        self._cache = []
+        self._applied = None
+        self._lock = threading.Lock()
+
+
+    def _index(self, name) -> int:
+        '''
+        Find a layer
+        
+        @param   name  The name of the layer
+        @return        The index of the layer in the stack
+        '''
+        for i, (_priority, layer_name, _layer) in enumerate(self._layers):
+            if layer_name == name:
+                return i
+        raise KeyError(name)
+
+
+    def _invalidate(self, index : int):
+        '''
+        Discard the cached results from a layer and onwards
+        
+        @param  index  The index of the first changed layer in the stack
+        '''
+        del self._cache[index:]
+
+
+    def add_layer(self, name, layer, priority : int = 0):
+        '''
+        Add a layer
+        
+        @param  name      The name of the layer, it must not already be in use
+        @param  layer     The curve or lookup table, or a tuple of one for each channel
+        @param  priority  The priority of the layer, layers with lower priority are applied first
+        '''
+        with self._lock:
+            if any(layer_name == name for (_priority, layer_name, _layer) in self._layers):
+                raise KeyError('layer already exists: %s' % repr(name))
+            index = len(self._layers)
+            while index > 0 and self._layers[index - 1][0] > priority:
+                index -= 1
+            self._layers.insert(index, (priority, name, _split(layer)))
+            self._invalidate(index)
+
+
+    def set_layer(self, name, layer):
+        '''
+        Replace a layer, its priority is kept
+        
+        @param  name   The name of the layer
+        @param  layer  The curve or lookup table, or a tuple of one for each channel
+        '''
+        with self._lock:
+            index = self._index(name)
+            self._layers[index] = (self._layers[index][0], name, _split(layer))
+            self._invalidate(index)
+
+
+    def remove_layer(self, name):
+        '''
+        Remove a layer
+        
+        @param  name  The name of the layer
+        '''
+        with self._lock:
+            index = self._index(name)
+            del self._layers[index]
+            self._invalidate(index)
+
+
+    def layers(self) -> list:
+        '''
+        List the layers, in the order they are applied
+        
+        @return  :list<(name, int)>  The name and priority of each layer
+        '''
+        with self._lock:
+            return [(name, priority) for (priority, name, _layer) in self._layers]
+
+
+    def _compose(self) -> tuple:
+        '''
+        Compose the layers, reusing cached prefixes
+        
+        @return  :(list<float>, list<float>, list<float>)  The red, green, and blue ramps
+        '''
+        result = self._cache[-1] if len(self._cache) > 0 else self._identity
+        for (_priority, _name, channels) in self._layers[len(self._cache):]:
+            result = tuple(_filter(channel, values) for channel, values in zip(channels, result))
+            self._cache.append(result)
+        return result
+
+
+    @property
+    def ramps(self) -> GammaRamps:
+        '''
+        Get the composed gamma ramps
+        
+        @return  The composed gamma ramps, they are updated by `apply`
+        '''
+        return self._ramps
+
+
+    def apply(self, force : bool = False):
+        '''
+        Compose the layers and apply the result to the CRTC, unless it is
+        the same as the last time
+        
+        @param  force  Whether to apply the ramps even if they have not changed
+        '''
+        with self._lock:
+            depth = self._ramps.depth
+            maximum = (1 << depth) - 1 if depth > 0 else 1
+            data = []
+            for values in self._compose():
+                values = [min(max(value, 0.0), 1.0) for value in values]
+                if depth > 0:
+                    values = [min(int(value * maximum + 0.5), maximum) for value in values]
+                data.append(array.array(_TYPECODES[depth], values).tobytes())
+            data = b''.join(data)
+            if data == self._applied and not force:
+                return
+            self._ramps.load_bytes(data)
+            self.crtc.set_gamma(self._ramps)
+            self._applied = data
@@ -0,0 +1,122 @@
+# See LICENSE file for copyright and license details.
+_live = {}
+'''
+The type, and for `GammaRamps` also the depth, of each live
+object, and the number of bytes allocated for it, by the
+object's identity; single insertions and deletions do not
+need a lock as they are atomic
+'''
+
+_tracebacks = None
+'''
+Where each live object was created, by the object's identity,
+`None` unless `debug.record_tracebacks` is set
+'''
+
+
+def _allocated(kind, size : int, obj):
+    '''
+    Record the allocation of native memory for an object
+    
+    @param  kind  :str|(str, int)  The type of the object, and its depth if it is a `GammaRamps`
+    @param  size  The number of bytes allocated for the object
+    @param  obj   The object
+    '''
+    _live[id(obj)] = (kind, size)
+    if _tracebacks is not None:
+        import sys, traceback
+        _tracebacks[id(obj)] = traceback.extract_stack(sys._getframe(2))
+
+
+def _released(obj):
+    '''
+    Record the deallocation of native memory for an object
+    
+    @param  obj  The object
+    '''
+    _live.pop(id(obj), None)
+    if _tracebacks is not None:
+        _tracebacks.pop(id(obj), None)
+
+
+class LibgammaDebug:
+    '''
+    Class for `debug`
+    '''
+
+    def live_objects(self) -> dict:
+        '''
+        Get the number of `GammaRamps`, `Site`, `Partition` and `CRTC` objects
+        that have not been closed or garbage collected, and the native memory
+        allocated for them, not including memory allocated internally by the
+        adjustment methods
+        
+        @return  :dict<str, dict>  By type, a dict with the number of objects ('count') and
+                                   the number of bytes ('bytes'), except for 'GammaRamps'
+                                   for which it is a dict of such dicts by depth
+        '''
+        rc = {'Site' : {'count' : 0, 'bytes' : 0},
+              'Partition' : {'count' : 0, 'bytes' : 0},
+              'CRTC' : {'count' : 0, 'bytes' : 0},
+              'GammaRamps' : {}}
+        for kind, size in list(_live.values()):
+            if isinstance(kind, tuple):
+                stat = rc[kind[0]].setdefault(kind[1], {'count' : 0, 'bytes' : 0})
+            else:
+                stat = rc[kind]
+            stat['count'] += 1
+            stat['bytes'] += size
+        return rc
+
+
+    def tracebacks(self) -> list:
+        '''
+        Get where each live object was created, only objects created
+        while `record_tracebacks` was set are included
+        
+        @return  :list<(str, int?, traceback.StackSummary)>  The type of each object, its
+                                                             depth if it is a `GammaRamps`
+                                                             otherwise `None`, and the stack
+                                                             when it was created
+        '''
+        tracebacks = _tracebacks
+        if tracebacks is None:
+            return []
+        rc = []
+        for key, stack in list(tracebacks.items()):
+            (kind, size) = _live.get(key, (None, 0))
+            if kind is not None:
+                (kind, depth) = kind if isinstance(kind, tuple) else (kind, None)
+                rc.append((kind, depth, stack))
+        return rc
+
+
+    @property
+    def record_tracebacks(self) -> bool:
+        '''
+        Getter
+        
+        Whether the stack is recorded when objects are created, for
+        `tracebacks`; this makes creating objects considerably slower
+        '''
+        return _tracebacks is not None
+
+    @record_tracebacks.setter
+    def record_tracebacks(self, value : bool):
+        '''
+        Setter
+        
+        Whether the stack is recorded when objects are created, for
+        `tracebacks`; this makes creating objects considerably slower
+        '''
+        global _tracebacks
+        if not value:
+            _tracebacks = None
+        elif _tracebacks is None:
+            _tracebacks = {}
+
+
+debug = LibgammaDebug()
+'''
+Accounting of native memory, for finding leaks
+'''
@@ -0,0 +1,388 @@
+# See LICENSE file for copyright and license details.
+from libgamma_native import native
+from libgamma_method import MethodCapabilities, CRTCInformation
+
+
+class LibgammaDummy:
+    '''
+    Class for `dummy`
+    
+    The configurations are read by the dummy adjustment method
+    when a site, partition, or CRTC is created, changes do not
+    affect already created sites, partitions, or CRTC:s.
+    '''
+
+    def _configurations(self) -> list:
+        '''
+        Get the configurations
+        
+        @return  The configurations, as `libgamma_native_dummy_get_configurations` returns them
+        '''
+        return list(native.libgamma_native_dummy_get_configurations())
+
+    def _store_configurations(self, conf : list):
+        '''
+        Set the configurations
+        
+        @param  conf  The configurations, as `libgamma_native_dummy_set_configurations` takes them
+        '''
+        native.libgamma_native_dummy_set_configurations(*conf)
+
+    def _information(self) -> list:
+        '''
+        Get the template for the CRTC information
+        
+        @return  The information, as `libgamma_native_dummy_get_crtc_information` returns it
+        '''
+        return native.libgamma_native_dummy_get_crtc_information()
+
+    def _store_information(self, data : list):
+        '''
+        Set the template for the CRTC information
+        
+        @param  data  The information, as `libgamma_native_dummy_set_crtc_information` takes it
+        '''
+        native.libgamma_native_dummy_set_crtc_information(data)
+
+    def _get(self, index : int):
+        '''
+        Get one of the configurations
+        
+        @param   index  The index of the configuration in the
+                        return of `libgamma_native_dummy_get_configurations`
+        @return         The value of the configuration
+        '''
+        return self._configurations()[index]
+
+    def _set(self, index : int, value):
+        '''
+        Set one of the configurations
+        
+        @param  index  The index of the configuration in the
+                       input of `libgamma_native_dummy_set_configurations`
+        @param  value  The new value of the configuration
+        '''
+        conf = self._configurations()
+        conf[index] = value
+        self._store_configurations(conf)
+
+
+    @property
+    def capabilities(self) -> MethodCapabilities:
+        '''
+        Getter
+        
+        The capabilities reported for the dummy adjustment method,
+        `real` and `fake` are ignored by the dummy adjustment method
+        '''
+        conf = self._configurations()
+        return MethodCapabilities(conf[0], conf[1])
+
+    @capabilities.setter
+    def capabilities(self, value : MethodCapabilities):
+        '''
+        Setter
+        
+        The capabilities reported for the dummy adjustment method,
+        `real` and `fake` are ignored by the dummy adjustment method
+        '''
+        booleans = 0
+        for i, name in enumerate(('default_site_known', 'multiple_sites', 'multiple_partitions', 'multiple_crtcs',
+                                  'partitions_are_graphics_cards', 'site_restore', 'partition_restore',
+                                  'crtc_restore', 'identical_gamma_sizes', 'fixed_gamma_size',
+                                  'fixed_gamma_depth', 'real', 'fake')):
+            if getattr(value, name):
+                booleans |= 1 << i
+        conf = self._configurations()
+        conf[0:2] = [value.crtc_information, booleans]
+        self._store_configurations(conf)
+
+
+    @property
+    def real_method(self) -> int:
+        '''
+        Getter
+        
+        The adjustment method to use in the dummy
+        adjustment method, `-1` for the default method
+        '''
+        return self._get(2)
+
+    @real_method.setter
+    def real_method(self, value : int):
+        '''
+        Setter
+        
+        The adjustment method to use in the dummy
+        adjustment method, `-1` for the default method
+        '''
+        self._set(2, value)
+
+
+    @property
+    def site_count(self) -> int:
+        '''
+        Getter
+        
+        The number of sites in the dummy adjustment method
+        '''
+        return self._get(3)
+
+    @site_count.setter
+    def site_count(self, value : int):
+        '''
+        Setter
+        
+        The number of sites in the dummy adjustment method
+        '''
+        self._set(3, value)
+
+
+    @property
+    def partition_count(self) -> int:
+        '''
+        Getter
+        
+        The number of partitions on each site
+        in the dummy adjustment method
+        '''
+        return self._get(4)
+
+    @partition_count.setter
+    def partition_count(self, value : int):
+        '''
+        Setter
+        
+        The number of partitions on each site
+        in the dummy adjustment method
+        '''
+        self._set(4, value)
+
+
+    @property
+    def crtc_count(self) -> int:
+        '''
+        Getter
+        
+        The number of CRTC:s on each partition
+        in the dummy adjustment method
+        '''
+        return self._get(5)
+
+    @crtc_count.setter
+    def crtc_count(self, value : int):
+        '''
+        Setter
+        
+        The number of CRTC:s on each partition
+        in the dummy adjustment method
+        '''
+        self._set(5, value)
+
+
+    @property
+    def inherit_real_ramps(self) -> bool:
+        '''
+        Getter
+        
+        Whether the gamma ramps are inherited from `real_method`
+        '''
+        return self._get(6)
+
+    @inherit_real_ramps.setter
+    def inherit_real_ramps(self, value : bool):
+        '''
+        Setter
+        
+        Whether the gamma ramps are inherited from `real_method`
+        '''
+        self._set(6, value)
+
+
+    @property
+    def verify_gamma_size(self) -> bool:
+        '''
+        Getter
+        
+        Whether to only use the dummy adjustment method, and
+        not `real_method`, when the gamma ramp sizes match
+        '''
+        return self._get(7)
+
+    @verify_gamma_size.setter
+    def verify_gamma_size(self, value : bool):
+        '''
+        Setter
+        
+        Whether to only use the dummy adjustment method, and
+        not `real_method`, when the gamma ramp sizes match
+        '''
+        self._set(7, value)
+
+
+    @property
+    def crtc_information(self) -> CRTCInformation:
+        '''
+        Getter
+        
+        The template for the information about the CRTC:s in the
+        dummy adjustment method; `width_mm_edid`, `height_mm_edid`,
+        `connector_name`, and the error fields except `edid_error`,
+        `width_mm_error`, `height_mm_error` and `gamma_error`, are
+        ignored by the dummy adjustment method
+        '''
+        return CRTCInformation(self._information())
+
+    @crtc_information.setter
+    def crtc_information(self, value : CRTCInformation):
+        '''
+        Setter
+        
+        The template for the information about the CRTC:s in the
+        dummy adjustment method; `width_mm_edid`, `height_mm_edid`,
+        `connector_name`, and the error fields except `edid_error`,
+        `width_mm_error`, `height_mm_error` and `gamma_error`, are
+        ignored by the dummy adjustment method
+        '''
+        data = [value.edid,                 value.edid_error,
+                value.width_mm,             value.width_mm_error,
+                value.height_mm,            value.height_mm_error,
+                value.width_mm_edid,        value.width_mm_edid_error,
+                value.height_mm_edid,       value.height_mm_edid_error,
+                value.red_gamma_size,       value.green_gamma_size,
+                value.blue_gamma_size,      value.gamma_size_error,
+                value.gamma_depth,          value.gamma_depth_error,
+                value.gamma_support,        value.gamma_support_error,
+                value.subpixel_order,       value.subpixel_order_error,
+                value.active,               value.active_error,
+                value.connector_name,       value.connector_name_error,
+                value.connector_type,       value.connector_type_error,
+                value.gamma_red,            value.gamma_green,
+                value.gamma_blue,           value.gamma_error]
+        self._store_information(data)
+
+
+    @property
+    def gamma_size(self) -> tuple:
+        '''
+        Getter
+        
+        The sizes of the red, green, and blue gamma ramps of
+        the CRTC:s in the dummy adjustment method, the setter
+        also accepts a single size for all three ramps
+        '''
+        info = self.crtc_information
+        return (info.red_gamma_size, info.green_gamma_size, info.blue_gamma_size)
+
+    @gamma_size.setter
+    def gamma_size(self, value):
+        '''
+        Setter
+        
+        The sizes of the red, green, and blue gamma ramps of
+        the CRTC:s in the dummy adjustment method, the setter
+        also accepts a single size for all three ramps
+        '''
+        if isinstance(value, int):
+            value = (value, value, value)
+        info = self.crtc_information
+        (info.red_gamma_size, info.green_gamma_size, info.blue_gamma_size) = value
+        self.crtc_information = info
+
+
+    @property
+    def gamma_depth(self) -> int:
+        '''
+        Getter
+        
+        The gamma ramp depth of the CRTC:s in the dummy adjustment method,
+        `-1` for `float` and `-2` for `double`
+        '''
+        return self.crtc_information.gamma_depth
+
+    @gamma_depth.setter
+    def gamma_depth(self, value : int):
+        '''
+        Setter
+        
+        The gamma ramp depth of the CRTC:s in the dummy adjustment method,
+        `-1` for `float` and `-2` for `double`
+        '''
+        info = self.crtc_information
+        info.gamma_depth = value
+        self.crtc_information = info
+
+
+    def configure(self, **kwargs):
+        '''
+        Set multiple configurations at once, for example
+        `dummy.configure(partition_count = 64, crtc_count = 16, gamma_size = 65536)`
+        
+        All configurations are validated before any of them is set,
+        so nothing is changed if any of them is invalid
+        
+        @param  kwargs  The configurations to set, by the names
+                        of the properties of this object
+        '''
+        for name in kwargs:
+            if not isinstance(getattr(LibgammaDummy, name, None), property):
+                raise AttributeError('no dummy configuration named %s' % repr(name))
+        staged = _Staged(self)
+        for name, value in kwargs.items():
+            setattr(staged, name, value)
+        native.libgamma_native_dummy_configure(tuple(staged._conf), staged._data)
+
+
+class _Staged(LibgammaDummy):
+    '''
+    Configurations for the dummy adjustment method that
+    are changed in memory only, used by `LibgammaDummy.configure`
+    '''
+
+    def __init__(self, dummy : LibgammaDummy):
+        '''
+        Constructor
+        
+        @param  dummy  The configurations to start from
+        '''
+        self._conf = dummy._configurations()
+        self._data = dummy._information()
+
+    def _configurations(self) -> list:
+        '''
+        Get the configurations
+        
+        @return  The configurations, as `libgamma_native_dummy_get_configurations` returns them
+        '''
+        return list(self._conf)
+
+    def _store_configurations(self, conf : list):
+        '''
+        Set the configurations
+        
+        @param  conf  The configurations, as `libgamma_native_dummy_set_configurations` takes them
+        '''
+        self._conf = list(conf)
+
+    def _information(self) -> list:
+        '''
+        Get the template for the CRTC information
+        
+        @return  The information, as `libgamma_native_dummy_get_crtc_information` returns it
+        '''
+        return list(self._data)
+
+    def _store_information(self, data : list):
+        '''
+        Set the template for the CRTC information
+        
+        @param  data  The information, as `libgamma_native_dummy_set_crtc_information` takes it
+        '''
+        self._data = list(data)
+
+
+dummy = LibgammaDummy()
+'''
+Configurations for the dummy adjustment method, `LIBGAMMA_METHOD_DUMMY`;
+use this to create synthetic topologies without a display
+'''
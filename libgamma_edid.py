@@ -0,0 +1,173 @@
+# See LICENSE file for copyright and license details.
+from libgamma_error import create_error
+from libgamma_error import LIBGAMMA_EDID_LENGTH_UNSUPPORTED
+from libgamma_error import LIBGAMMA_EDID_WRONG_MAGIC_NUMBER
+from libgamma_error import LIBGAMMA_EDID_REVISION_UNSUPPORTED
+
+
+_EDID_MAGIC = b'\x00\xff\xff\xff\xff\xff\xff\x00'
+
+
+class EDID:
+    '''
+    Parsed Extended Display Identification Data
+    
+    Use `parse_edid` rather than the constructor,
+    it returns the same object for identical EDID:s
+    
+    @variable  edid:bytes               The EDID in raw representation
+    @variable  manufacturer:str         The three letter PNP ID of the manufacturer
+    @variable  product:int              The manufacturer's product code
+    @variable  serial:int               The serial number, zero if not used
+    @variable  serial_string:str?       The serial number descriptor, `None` if not present
+    @variable  name:str?                The display product name descriptor, `None` if not present
+    @variable  week:int                 The week of manufacture, zero if unspecified
+    @variable  year:int                 The year of manufacture, or model year
+    @variable  version:int              The version of the EDID structure
+    @variable  revision:int             The revision of the EDID structure
+    @variable  width_cm:int             The physical width of the screen, in centimetres,
+                                        zero if unknown or variable
+    @variable  height_cm:int            The physical height of the screen, in centimetres,
+                                        zero if unknown or variable
+    @variable  width_mm:int             The physical width of the image in the preferred
+                                        timing, in millimetres, `width_cm` multiplied by
+                                        ten if not specified by the timing
+    @variable  height_mm:int            The physical height of the image in the preferred
+                                        timing, in millimetres, `height_cm` multiplied by
+                                        ten if not specified by the timing
+    @variable  gamma:float?             The gamma characteristics of the monitor,
+                                        `None` if not specified
+    @variable  preferred_timing:Timing? The preferred timing, `None` if not present
+    @variable  checksum_valid:bool      Whether the checksum of the base block is correct
+    '''
+
+    class Timing:
+        '''
+        A detailed timing descriptor
+        
+        @variable  pixel_clock:int     The pixel clock, in hertz
+        @variable  width:int           The number of horizontal active pixels
+        @variable  height:int          The number of vertical active lines
+        @variable  refresh_rate:float  The vertical refresh rate, in hertz
+        @variable  interlaced:bool     Whether the timing is interlaced
+        @variable  width_mm:int        The physical width of the image, in millimetres
+        @variable  height_mm:int       The physical height of the image, in millimetres
+        '''
+
+        def __init__(self, descriptor : bytes):
+            '''
+            Constructor
+            
+            @param  descriptor  The 18 bytes of the detailed timing descriptor
+            '''
+            d = descriptor
+            h_blank = d[3] | ((d[4] & 0x0F) << 8)
+            v_blank = d[6] | ((d[7] & 0x0F) << 8)
+            self.pixel_clock  = (d[0] | (d[1] << 8)) * 10000
+            self.width        = d[2] | ((d[4] & 0xF0) << 4)
+            self.height       = d[5] | ((d[7] & 0xF0) << 4)
+            self.interlaced   = (d[17] & 0x80) != 0
+            self.width_mm     = d[12] | ((d[14] & 0xF0) << 4)
+            self.height_mm    = d[13] | ((d[14] & 0x0F) << 8)
+            total = (self.width + h_blank) * (self.height + v_blank)
+            self.refresh_rate = self.pixel_clock / total if total > 0 else 0.0
+
+        def __repr__(self) -> str:
+            '''
+            Create a string representation of the timing
+            
+            @return  A string representation of the timing
+            '''
+            return 'EDID.Timing(%ix%i%s@%.3f)' % (self.width, self.height, 'i' if self.interlaced else '', self.refresh_rate)
+
+
+    def __init__(self, edid : bytes):
+        '''
+        Constructor
+        
+        @param  edid  The EDID in raw representation
+        '''
+        edid = bytes(edid)
+        if len(edid) < 128 or len(edid) % 128 != 0:
+            raise create_error(LIBGAMMA_EDID_LENGTH_UNSUPPORTED)
+        if not edid[:8] == _EDID_MAGIC:
+            raise create_error(LIBGAMMA_EDID_WRONG_MAGIC_NUMBER)
+        if not edid[18] == 1:
+            raise create_error(LIBGAMMA_EDID_REVISION_UNSUPPORTED)
+        self.edid           = edid
+        manufacturer        = (edid[8] << 8) | edid[9]
+        self.manufacturer   = ''.join(chr(64 + ((manufacturer >> shift) & 31)) for shift in (10, 5, 0))
+        self.product        = int.from_bytes(edid[10 : 12], 'little')
+        self.serial         = int.from_bytes(edid[12 : 16], 'little')
+        self.week           = edid[16]
+        self.year           = edid[17] + 1990
+        self.version        = edid[18]
+        self.revision       = edid[19]
+        self.width_cm       = edid[21]
+        self.height_cm      = edid[22]
+        self.gamma          = None if edid[23] == 0xFF else (edid[23] + 100) / 100
+        self.checksum_valid = sum(edid[:128]) % 256 == 0
+        self.serial_string  = None
+        self.name           = None
+        self.preferred_timing = None
+        for offset in range(54, 126, 18):
+            descriptor = edid[offset : offset + 18]
+            if not descriptor[:2] == b'\0\0':
+                if self.preferred_timing is None:
+                    self.preferred_timing = EDID.Timing(descriptor)
+            elif descriptor[3] == 0xFF:
+                self.serial_string = _descriptor_text(descriptor)
+            elif descriptor[3] == 0xFC:
+                self.name = _descriptor_text(descriptor)
+        if self.preferred_timing is not None and self.preferred_timing.width_mm > 0:
+            self.width_mm  = self.preferred_timing.width_mm
+            self.height_mm = self.preferred_timing.height_mm
+        else:
+            self.width_mm  = self.width_cm * 10
+            self.height_mm = self.height_cm * 10
+
+
+    def __repr__(self) -> str:
+        '''
+        Create a string representation of the EDID
+        
+        @return  A string representation of the EDID
+        '''
+        return 'EDID(%s, %i, %i)' % (repr(self.manufacturer), self.product, self.serial)
+
+
+def _descriptor_text(descriptor : bytes) -> str:
+    '''
+    Get the text in a display descriptor
+    
+    @param   descriptor  The 18 bytes of the display descriptor
+    @return              The text in the descriptor
+    '''
+    return descriptor[5:].split(b'\n')[0].rstrip(b' ').decode('cp437')
+
+
+_parsed_edids = {}
+
+_PARSED_EDIDS_MAX = 4096
+
+
+def parse_edid(edid) -> EDID:
+    '''
+    Parse an EDID, the result is memoised by the EDID's bytes
+    
+    @param   edid  The EDID in raw representation, any bytes-like object,
+                   or in hexadecimal representation
+    @return        The parsed EDID
+    '''
+    if isinstance(edid, str):
+        from libgamma_facade import unhex_edid
+        edid = unhex_edid(edid)
+    elif not isinstance(edid, bytes):
+        edid = bytes(edid)
+    rc = _parsed_edids.get(edid, None)
+    if rc is None:
+        rc = EDID(edid)
+        if len(_parsed_edids) >= _PARSED_EDIDS_MAX:
+            _parsed_edids.clear()
+        _parsed_edids[edid] = rc
+    return rc
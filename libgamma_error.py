@@ -1,4 +1,5 @@
 # See LICENSE file for copyright and license details.
+from libgamma_native import native
 
 class LibgammaGroup:
     '''
@@ -13,8 +14,7 @@ class LibgammaGroup:
         Group that the user needs to be a member of if
         `LIBGAMMA_DEVICE_REQUIRE_GROUP` is returned
         '''
-        from libgamma_native_error import libgamma_native_get_group_gid
-        return libgamma_native_get_group_gid()
+        return native.libgamma_native_get_group_gid()
 
     @gid.setter
     def gid(self, value : int):
@@ -24,8 +24,7 @@ class LibgammaGroup:
         Group that the user needs to be a member of if
         `LIBGAMMA_DEVICE_REQUIRE_GROUP` is returned
         '''
-        from libgamma_native_error import libgamma_native_set_group_gid
-        libgamma_native_set_group_gid(value)
+        native.libgamma_native_set_group_gid(value)
 
 
     @property
@@ -38,8 +37,7 @@ class LibgammaGroup:
         `None` if the name of the group `group.gid`
         cannot be determined
         '''
-        from libgamma_native_error import libgamma_native_get_group_name
-        return libgamma_native_get_group_name()
+        return native.libgamma_native_get_group_name()
 
     @name.setter
     def name(self, value : str):
@@ -51,8 +49,7 @@ class LibgammaGroup:
         `None` if the name of the group `group.gid`
         cannot be determined
         '''
-        from libgamma_native_error import libgamma_native_set_group_name
-        libgamma_native_set_group_name(value)
+        native.libgamma_native_set_group_name(value)
 
 
 group = LibgammaGroup()
@@ -80,8 +77,7 @@ def perror(name : str, error_code : int):
     @param  name   The text to add at the beginning
     @param  value  The error code, may be an `errno` value
     '''
-    from libgamma_native_error import libgamma_native_perror
-    libgamma_native_perror(name, error_code)
+    native.libgamma_native_perror(name, error_code)
 
 
 def name_of_error(value : int) -> str:
@@ -92,8 +88,7 @@ def name_of_error(value : int) -> str:
     @return         The name of the definition associated with the error code,
                     `None` if the error code does not exist
     '''
-    from libgamma_native_error import libgamma_native_name_of_error
-    return libgamma_native_name_of_error(value)
+    return native.libgamma_native_name_of_error(value)
 
 
 def value_of_error(name : str) -> int:
@@ -104,8 +99,7 @@ def value_of_error(name : str) -> int:
     @return        The error code, zero if the name is `None`
                    or does not refer to a `libgamma` error
     '''
-    from libgamma_native_error import libgamma_native_value_of_error
-    return libgamma_native_value_of_error(name)
+    return native.libgamma_native_value_of_error(name)
 
 
 
@@ -399,6 +393,9 @@ class LibgammaError(Exception):
     '''
     libgamma error class
     
+    Each error code has its own subclass, for example
+    `LibgammaNoSuchSiteError` for `LIBGAMMA_NO_SUCH_SITE`
+    
     @variable  errno     The error code
     @variable  strerror  The name of the error
     '''
@@ -430,6 +427,35 @@ class LibgammaError(Exception):
         return 'LibgammaError(%i, %s)' % (self.errno, repr(self.strerror))
 
 
+_error_names = {}
+'''
+The name of each `libgamma` error code known by this module
+'''
+
+_error_classes = {}
+'''
+The `LibgammaError` subclass for each error code in `_error_names`
+'''
+
+for _name, _value in list(globals().items()):
+    if _name.startswith('LIBGAMMA_') and not _name == 'LIBGAMMA_ERROR_MIN':
+        _error_names[_value] = _name
+        if not _value == LIBGAMMA_ERRNO_SET:
+            _words = _name[len('LIBGAMMA_'):].split('_')
+            if _words[-1] == 'ERROR':
+                _words.pop()
+            _class_name = 'Libgamma' + ''.join(w.capitalize() for w in _words) + 'Error'
+            _error_classes[_value] = globals()[_class_name] = type(_class_name, (LibgammaError,), {
+                '__doc__' : '\n    `LibgammaError` for `%s`\n    ' % _name,
+            })
+del _name, _value, _words, _class_name
+
+_strerrors = {}
+'''
+Cache of the description of each `errno` value
+'''
+
+
 def create_error(error_code : int) -> Exception:
     '''
     Create an exception from an error code
@@ -438,16 +464,16 @@ def create_error(error_code : int) -> Exception:
     @return  :OSError|LibgammaError  The error as a throwable object
     '''
     if error_code == LIBGAMMA_ERRNO_SET:
-        import ctypes
-        error_code = ctypes.get_errno()
+        error_code = native.libgamma_native_errno()
     
     if error_code >= 0:
-        import libgamma_native_error as c
-        e = OSError()
-        e.errno = error_code
-        e.strerror = c.strerror(e.errno)
-    else:
-        strerror = name_of_error(error_code)
-        e = LibgammaError(error_code, strerror)
+        strerror = _strerrors.get(error_code, None)
+        if strerror is None:
+            import os
+            strerror = _strerrors[error_code] = os.strerror(error_code)
+        return OSError(error_code, strerror)
     
-    return e
+    error_class = _error_classes.get(error_code, None)
+    if error_class is None:
+        return LibgammaError(error_code, name_of_error(error_code))
+    return error_class(error_code, _error_names[error_code])
@@ -1,5 +1,169 @@
 # See LICENSE file for copyright and license details.
-from libgamma_method import MethodCapabilities
+import os
+import json
+import importlib
+from libgamma_native import native
+from libgamma_error import create_error
+from libgamma_error import LIBGAMMA_NO_SUCH_ADJUSTMENT_METHOD
+from libgamma_method import MethodCapabilities, Site, Partition, CRTC
+
+
+_ENVIRONMENT = ('DISPLAY', 'WAYLAND_DISPLAY', 'XDG_SESSION_TYPE', 'XDG_VTNR')
+'''
+The environment variables that affect which adjustment
+methods are available and what their default sites are
+'''
+
+_probed = {}
+'''
+The memoised results of probing the adjustment methods, by the values of
+the variables in `_ENVIRONMENT`; each is a dict of results by query and argument
+'''
+
+_cache_path = None
+'''
+The pathname of the on-disk cache of `_probed`, `None` if it is not used
+'''
+
+_library_identity = None
+'''
+The memoised return value of `_library`
+'''
+
+
+def _results() -> dict:
+    '''
+    Get the memoised results of probing the adjustment methods in the current environment
+    
+    @return  :dict<(str, int), ¿R?>  The results by query and argument
+    '''
+    environ = os.environ
+    environment = tuple([environ.get(name, None) for name in _ENVIRONMENT])
+    results = _probed.get(environment, None)
+    if results is None:
+        results = _probed[environment] = {}
+    return results
+
+
+def _probe(query : str, function, argument : int):
+    '''
+    Probe the adjustment methods, unless already done in the current environment
+    
+    @param   query     The name of the query
+    @param   function  :(int)→¿R?  The native function that performs the query
+    @param   argument  The argument for `function`
+    @return            :¿R?        The result, as returned by `function`, except
+                                   that tuples are lists if loaded from disk
+    '''
+    results = _results()
+    key = (query, argument)
+    if key in results:
+        return results[key]
+    rc = results[key] = function(argument)
+    if _cache_path is not None:
+        _save_probe_cache()
+    return rc
+
+
+def _library() -> list:
+    '''
+    Identify the installed native module and the libgamma shared object
+    it is linked against, which determine which adjustment methods there
+    are, as libgamma does not report its version
+    
+    The libgamma shared object is found among the files mapped into the
+    process, or if that is not possible, by its name as found by `ctypes`
+    
+    @return  :[str, int, int, str?, int?, int?]  The pathname, size, and modification
+                                                 time of the native module and of the
+                                                 libgamma shared object
+    '''
+    global _library_identity
+    if _library_identity is not None:
+        return _library_identity
+    module = importlib.import_module('libgamma_native_facade')
+    status = os.stat(module.__file__)
+    rc = [module.__file__, status.st_size, status.st_mtime_ns]
+    library = None
+    try:
+        with open('/proc/self/maps') as file:
+            for line in file:
+                path = line.rstrip('\n').split(None, 5)[5:]
+                if len(path) > 0 and os.path.basename(path[0]).startswith('libgamma.so'):
+                    library = path[0]
+                    break
+    except OSError:
+        pass
+    if library is not None:
+        status = os.stat(library)
+        rc += [library, status.st_size, status.st_mtime_ns]
+    else:
+        import ctypes.util
+        rc += [ctypes.util.find_library('gamma'), None, None]
+    _library_identity = rc
+    return rc
+
+
+def _save_probe_cache():
+    '''
+    Write `_probed` to the on-disk cache, errors are ignored
+    '''
+    environments = {}
+    for environment, results in _probed.items():
+        environments[json.dumps(environment)] = [[query, argument, result] for (query, argument), result in results.items()]
+    temporary = '%s.%i.tmp' % (_cache_path, os.getpid())
+    try:
+        data = {'library' : _library(), 'environments' : environments}
+        os.makedirs(os.path.dirname(_cache_path) or '.', exist_ok = True)
+        with open(temporary, 'w') as file:
+            json.dump(data, file)
+        os.replace(temporary, _cache_path)
+    except (OSError, ImportError, AttributeError):
+        try:
+            os.unlink(temporary)
+        except OSError:
+            pass
+
+
+def use_probe_cache(path : str = None):
+    '''
+    Keep the results of probing the adjustment methods on disk, so that other
+    processes do not have to probe them; the results are memoised for the
+    lifetime of the process regardless, for each value of the relevant
+    environment variables, and the cache is invalidated when this library
+    or libgamma is reinstalled
+    
+    @param  path  The pathname of the cache file, `None` for
+                  `$XDG_CACHE_HOME/pylibgamma/probe.json`
+    '''
+    global _cache_path
+    if path is None:
+        directory = os.environ.get('XDG_CACHE_HOME', '') or os.path.join(os.path.expanduser('~'), '.cache')
+        path = os.path.join(directory, 'pylibgamma', 'probe.json')
+    _cache_path = path
+    try:
+        with open(path) as file:
+            data = json.load(file)
+        if not data['library'] == _library():
+            return
+        for environment, results in data['environments'].items():
+            results = {(query, argument) : result for (query, argument, result) in results}
+            _probed.setdefault(tuple(json.loads(environment)), {}).update(results)
+    except (OSError, ImportError, ValueError, KeyError, TypeError, AttributeError):
+        pass
+
+
+def clear_probe_cache():
+    '''
+    Forget the results of probing the adjustment methods, for example after
+    a display server has been started, including those in the on-disk cache
+    '''
+    _probed.clear()
+    if _cache_path is not None:
+        try:
+            os.unlink(_cache_path)
+        except FileNotFoundError:
+            pass
 
 
 def list_methods(operation : int) -> list:
@@ -15,8 +179,7 @@ def list_methods(operation : int) -> list:
                          Other values invoke undefined behaviour
     @return  :list<int>  A list of available adjustment methods
     '''
-    from libgamma_native_facade import libgamma_native_list_methods
-    return libgamma_native_list_methods(operation)
+    return list(_probe('list_methods', native.libgamma_native_list_methods, operation))
 
 
 def is_method_available(method : int) -> bool:
@@ -27,8 +190,7 @@ def is_method_available(method : int) -> bool:
     @param   method  The adjustment method
     @return          Whether the adjustment method is available
     '''
-    from libgamma_native_facade import libgamma_native_is_method_available
-    return not libgamma_native_is_method_available(method) == 0
+    return not _probe('is_method_available', native.libgamma_native_is_method_available, method) == 0
 
 
 def method_capabilities(method : int) -> MethodCapabilities:
@@ -38,8 +200,7 @@ def method_capabilities(method : int) -> MethodCapabilities:
     @param  this    The data structure to fill with the method's capabilities
     @param  method  The adjustment method (display server and protocol)
     '''
-    from libgamma_native_facade import libgamma_native_method_capabilities
-    caps = libgamma_native_method_capabilities(method)
+    caps = _probe('method_capabilities', native.libgamma_native_method_capabilities, method)
     return MethodCapabilities(*caps)
 
 
@@ -52,8 +213,7 @@ def method_default_site(method : int) -> str:
                      if multiple sites are not supported by the adjustment
                      method
     '''
-    from libgamma_native_facade import libgamma_native_method_default_site
-    return libgamma_native_method_default_site(method)
+    return _probe('method_default_site', native.libgamma_native_method_default_site, method)
 
 
 def method_default_site_variable(method : int) -> str:
@@ -66,61 +226,148 @@ def method_default_site_variable(method : int) -> str:
                      default site. `None` if there is none, that is, if
                      the method does not support multiple sites.
     '''
-    from libgamma_native_facade import libgamma_native_method_default_site_variable
-    return libgamma_native_method_default_site_variable(method)
+    return _probe('method_default_site_variable', native.libgamma_native_method_default_site_variable, method)
+
 
+def _try_site(method : int, site : str) -> Site:
+    '''
+    Open a site and all of its partitions and CRTC:s
+    
+    @param   method  The adjustment method
+    @param   site    The site identifier, `None` for the default site
+    @return          The site, its partitions and CRTC:s are closed
+    '''
+    rc = Site(method, site)
+    try:
+        for p in range(rc.partitions_available):
+            with Partition(rc, p) as partition:
+                for c in range(partition.crtcs_available):
+                    CRTC(partition, c).close()
+    except BaseException:
+        rc.close()
+        raise
+    return rc
+
+
+def _attempt(method : int, site : str, condition, state : dict):
+    '''
+    Try to open a site for `open_best_site`
+    
+    @param  method     The adjustment method
+    @param  site       The site identifier, `None` for the default site
+    @param  condition  :threading.Condition  Notified when the attempt has finished
+    @param  state      The state of the round of attempts: the winning site ('site',
+                       `None` until there is one, `False` if the round is over), its
+                       adjustment method ('method'), the number of unfinished attempts
+                       ('pending'), and the errors by adjustment method ('errors')
+    '''
+    try:
+        rc = _try_site(method, site)
+    except Exception as err:
+        rc = None
+        with condition:
+            state['errors'][method] = err
+    with condition:
+        state['pending'] -= 1
+        if rc is not None and state['site'] is None:
+            (state['site'], state['method'], rc) = (rc, method, None)
+        condition.notify_all()
+    if rc is not None:
+        rc.close()
+
+
+def open_best_site(timeout : float = 5, operation : int = 0, site : str = None) -> Site:
+    '''
+    Open a site with the adjustment method that works and responds first
+    
+    The adjustment methods from `list_methods(operation)` are tried concurrently,
+    each by opening a site and all of its partitions and CRTC:s. Sites opened by
+    other attempts are closed, also if they succeed after this function returns.
+    The method that won is remembered, in the cache used by `list_methods`, and
+    tried on its own first the next time.
+    
+    @param   timeout    The number of seconds to wait for each round of attempts
+    @param   operation  The `operation` argument for `list_methods`
+    @param   site       The site identifier, `None` for the default site of each method
+    @return             :Site  The site
+    '''
+    import threading
+    methods = list_methods(operation)
+    results = _results()
+    key = ('open_best_site', operation)
+    winner = results.get(key, None)
+    rounds = [methods]
+    if winner in methods:
+        rounds = [[winner], [method for method in methods if not method == winner]]
+    error = None
+    for candidates in rounds:
+        if len(candidates) == 0:
+            continue
+        condition = threading.Condition()
+        state = {'site' : None, 'method' : None, 'pending' : len(candidates), 'errors' : {}}
+        for method in candidates:
+            threading.Thread(target = _attempt, args = (method, site, condition, state),
+                             name = 'libgamma-probe', daemon = True).start()
+        with condition:
+            condition.wait_for(lambda : state['site'] is not None or state['pending'] == 0, timeout)
+            rc = state['site']
+            if rc is None:
+                # Attempts that finish later close their sites
+                state['site'] = False
+                for method in candidates:
+                    if error is None and method in state['errors']:
+                        error = state['errors'][method]
+                if error is None and state['pending'] > 0:
+                    error = TimeoutError('no adjustment method responded in time')
+                continue
+        if not winner == state['method']:
+            results[key] = state['method']
+            if _cache_path is not None:
+                _save_probe_cache()
+        return rc
+    if error is None:
+        error = create_error(LIBGAMMA_NO_SUCH_ADJUSTMENT_METHOD)
+    raise error
 
 
 def behex_edid(edid : bytes) -> str:
     '''
     Convert a raw representation of an EDID to a lowercase hexadecimal representation
     
-    @param   edid  The EDID in raw representation
+    @param   edid  The EDID in raw representation, any bytes-like object
     @return        The EDID in lowercase hexadecimal representation
     '''
-    return behex_edid_lowercase(edid)
+    return memoryview(edid).hex()
 
 
 def behex_edid_lowercase(edid : bytes) -> str:
     '''
     Convert a raw representation of an EDID to a lowercase hexadecimal representation
     
-    @param   edid  The EDID in raw representation
+    @param   edid  The EDID in raw representation, any bytes-like object
     @return        The EDID in lowercase hexadecimal representation
     '''
-    rc = ''
-    for b in edid:
-        rc += '0123456789abcdef'[(b >> 4) & 15]
-        rc += '0123456789abcdef'[(b >> 0) & 15]
-    return rc
+    return memoryview(edid).hex()
 
 
 def behex_edid_uppercase(edid : bytes) -> str:
     '''
     Convert a raw representation of an EDID to an uppercase hexadecimal representation
     
-    @param   edid  The EDID in raw representation
+    @param   edid  The EDID in raw representation, any bytes-like object
     @return        The EDID in uppercase hexadecimal representation
     '''
-    rc = ''
-    for b in edid:
-        rc += '0123456789ABCDEF'[(b >> 4) & 15]
-        rc += '0123456789ABCDEF'[(b >> 0) & 15]
-    return rc
+    return memoryview(edid).hex().upper()
 
 
 def unhex_edid(edid : str) -> bytes:
     '''
     Convert an hexadecimal representation of an EDID to a raw representation
     
-    @param   edid  The EDID in hexadecimal representation
+    @param   edid  The EDID in hexadecimal representation, either as a string
+                   or as a bytes-like object with ASCII characters
     @return        The EDID in raw representation
     '''
-    rc = []
-    edid = edid.lower()
-    for i in range(0, len(edid), 2):
-        a, b = edid[i + 0], edid[i + 1]
-        a = '0123456789abcdef'.find(a) << 4
-        b = '0123456789abcdef'.find(b) << 0
-        rc.append(a | b)
-    return bytes(rc)
+    if not isinstance(edid, str):
+        edid = str(edid, 'ascii')
+    return bytes.fromhex(edid)
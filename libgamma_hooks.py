@@ -0,0 +1,133 @@
+# See LICENSE file for copyright and license details.
+from time import perf_counter_ns
+
+
+_hooks = []
+'''
+The registered hooks, in the order they are called
+'''
+
+
+class TraceEvent:
+    '''
+    An event passed to the functions registered with `add_hook`
+    
+    The events are 'crtc.set_gamma', 'crtc.get_gamma' and 'crtc.restore',
+    which are reported both before ('pre') and after ('post') the call to
+    the adjustment method, and 'site.open', 'site.close', 'partition.open',
+    'partition.close', 'crtc.open' and 'crtc.close', which are only reported
+    after ('post'). The same object is passed in both phases of a call.
+    
+    @variable  name:str          The name of the event
+    @variable  phase:str         'pre' or 'post'
+    @variable  target            :Site|Partition|CRTC  The object the event is for
+    @variable  method:int        The adjustment method of the site
+    @variable  partition:int?    The index of the partition, `None` for sites
+    @variable  crtc:int?         The index of the CRTC, `None` for sites and partitions
+    @variable  depth:int?        The depth of the gamma ramps, `None` unless
+                                 the event is 'crtc.set_gamma' or 'crtc.get_gamma'
+    @variable  sizes:tuple?      The sizes of the red, green, and blue gamma ramps,
+                                 `None` unless the event is 'crtc.set_gamma' or
+                                 'crtc.get_gamma'
+    @variable  start_ns:int      The value of `time.perf_counter_ns` when the call started
+    @variable  duration_ns:int?  The number of nanoseconds the call took,
+                                 not including time spent in the hooks;
+                                 `None` in the 'pre' phase
+    @variable  result:int?       Zero on success, otherwise the value of an error identifier
+                                 provided by this library or `errno`; `None` in the 'pre' phase
+    '''
+
+    def __init__(self, name : str, target, ramps = None):
+        '''
+        Constructor
+        
+        @param  name    The name of the event
+        @param  target  :Site|Partition|CRTC  The object the event is for
+        @param  ramps   :GammaRamps?          The gamma ramps passed in the call
+        '''
+        self.name        = name
+        self.phase       = 'pre'
+        self.target      = target
+        self.partition   = None
+        self.crtc        = None
+        self.depth       = None
+        self.sizes       = None
+        self.duration_ns = None
+        self.result      = None
+        if hasattr(target, 'crtc'):
+            self.crtc = target.crtc
+            target = target.partition
+        if hasattr(target, 'partition'):
+            self.partition = target.partition
+            target = target.site
+        self.method = target.method
+        if ramps is not None:
+            self.depth = ramps.depth
+            self.sizes = ramps.size
+        self.start_ns = perf_counter_ns()
+
+
+    def __repr__(self) -> str:
+        '''
+        Create a string representation of the event
+        
+        @return  A string representation of the event
+        '''
+        return 'TraceEvent(%s, %s, %s, %s, %s)' % (repr(self.name), repr(self.phase),
+                                                   repr(self.partition), repr(self.crtc), repr(self.result))
+
+
+def add_hook(hook):
+    '''
+    Register a function to call around gamma operations and when
+    sites, partitions and CRTC:s are opened and closed
+    
+    Hooks are called on the thread that performs the operation,
+    exceptions raised by a hook are propagated to the caller of
+    the operation. When no hooks are registered, checking for
+    hooks is the only cost.
+    
+    @param  hook  :(TraceEvent)→void  The function to call for each event
+    '''
+    _hooks.append(hook)
+
+
+def remove_hook(hook):
+    '''
+    Unregister a function registered with `add_hook`
+    
+    @param  hook  :(TraceEvent)→void  The function
+    '''
+    _hooks.remove(hook)
+
+
+def _pre(name : str, target, ramps = None) -> TraceEvent:
+    '''
+    Report the start of an operation to the hooks
+    
+    @param   name    The name of the event
+    @param   target  :Site|Partition|CRTC  The object the event is for
+    @param   ramps   :GammaRamps?          The gamma ramps passed in the call
+    @return          The event, to pass to `_post`
+    '''
+    event = TraceEvent(name, target, ramps)
+    if not event.name.endswith(('.open', '.close')):
+        for hook in list(_hooks):
+            hook(event)
+        event.start_ns = perf_counter_ns()
+    return event
+
+
+def _post(event : TraceEvent, result : int):
+    '''
+    Report the end of an operation to the hooks
+    
+    @param  event   The event returned by `_pre`
+    @param  result  Zero on success, otherwise the value of an error
+                    identifier provided by this library or `errno`
+    '''
+    event.duration_ns = perf_counter_ns() - event.start_ns
+    event.phase = 'post'
+    event.result = result
+    for hook in list(_hooks):
+        hook(event)
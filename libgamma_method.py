@@ -1,5 +1,10 @@
 # See LICENSE file for copyright and license details.
+import time
+import weakref
+from libgamma_native import native
 from libgamma_error import create_error
+from libgamma_hooks import _hooks, _pre, _post
+from libgamma_debug import _allocated, _released
 
 
 LIBGAMMA_METHOD_DUMMY = 0
@@ -582,9 +587,88 @@ that status itself
 
 
 
+class _Closed:
+    '''
+    Stand-in for the native functions of closed objects
+    '''
+
+    def __getattr__(self, name : str):
+        '''
+        Get a function that raises an exception
+        
+        @param   name  The name of the native function
+        @return        A function that raises `ValueError`
+        '''
+        return _closed
+
+
+def _closed(*args):
+    '''
+    Raise an exception for an operation on a closed object
+    '''
+    raise ValueError('operation on closed object')
+
+
+_closed_native = _Closed()
+'''
+The native functions of closed objects
+'''
+
+
+_state_sizes = None
+'''
+The sizes of site, partition and CRTC states, `None` until first needed
+'''
+
+def _state_size(index : int) -> int:
+    '''
+    Get the size of a state structure
+    
+    @param   index  0 for sites, 1 for partitions, 2 for CRTC:s
+    @return         The size of the state structure
+    '''
+    global _state_sizes
+    if _state_sizes is None:
+        _state_sizes = native.libgamma_native_state_sizes()
+    return _state_sizes[index]
+
+
 class GammaRamps:
     '''
     Gamma ramp structure
+    
+    Call `close`, or use a `with` statement, to release the
+    ramps deterministically rather than when they are garbage
+    collected; the ramps cannot be used after they are closed.
+    '''
+
+    _sizes = None
+    '''
+    The sizes of the gamma ramp structures and their
+    stops by depth, `None` until first needed
+    '''
+
+    _buffer = None
+    '''
+    The buffer the stops are stored in, `None` if
+    they are allocated by the gamma ramps
+    '''
+
+    _shared = None
+    '''
+    The stops shared with other gamma ramps, `None`
+    if the gamma ramps have stops of their own
+    '''
+
+    _hash = None
+    '''
+    The cached hash of the stops, `None` if not calculated
+    since the gamma ramps were last modified
+    '''
+
+    _watched = False
+    '''
+    Whether `_modify` must be called before the stops are modified
     '''
 
     class Ramp:
@@ -600,26 +684,14 @@ class GammaRamps:
             @param  size   The number of stops in the gamma ramp
             @param  depth  The depth of the gamma ramp
             '''
-            from libgamma_native_method import libgamma_native_gamma_ramps8_get
-            from libgamma_native_method import libgamma_native_gamma_ramps16_get
-            from libgamma_native_method import libgamma_native_gamma_ramps32_get
-            from libgamma_native_method import libgamma_native_gamma_ramps64_get
-            from libgamma_native_method import libgamma_native_gamma_rampsf_get
-            from libgamma_native_method import libgamma_native_gamma_rampsd_get
-            from libgamma_native_method import libgamma_native_gamma_ramps8_set
-            from libgamma_native_method import libgamma_native_gamma_ramps16_set
-            from libgamma_native_method import libgamma_native_gamma_ramps32_set
-            from libgamma_native_method import libgamma_native_gamma_ramps64_set
-            from libgamma_native_method import libgamma_native_gamma_rampsf_set
-            from libgamma_native_method import libgamma_native_gamma_rampsd_set
             self._size = size
             self._ramp = ramp
-            if   depth ==  8:  fs = (libgamma_native_gamma_ramps8_get,  libgamma_native_gamma_ramps8_set)
-            elif depth == 16:  fs = (libgamma_native_gamma_ramps16_get, libgamma_native_gamma_ramps16_set)
-            elif depth == 32:  fs = (libgamma_native_gamma_ramps32_get, libgamma_native_gamma_ramps32_set)
-            elif depth == 64:  fs = (libgamma_native_gamma_ramps64_get, libgamma_native_gamma_ramps64_set)
-            elif depth == -1:  fs = (libgamma_native_gamma_rampsf_get,  libgamma_native_gamma_rampsf_set)
-            elif depth == -2:  fs = (libgamma_native_gamma_rampsd_get,  libgamma_native_gamma_rampsd_set)
+            if   depth ==  8:  fs = (native.libgamma_native_gamma_ramps8_get,  native.libgamma_native_gamma_ramps8_set)
+            elif depth == 16:  fs = (native.libgamma_native_gamma_ramps16_get, native.libgamma_native_gamma_ramps16_set)
+            elif depth == 32:  fs = (native.libgamma_native_gamma_ramps32_get, native.libgamma_native_gamma_ramps32_set)
+            elif depth == 64:  fs = (native.libgamma_native_gamma_ramps64_get, native.libgamma_native_gamma_ramps64_set)
+            elif depth == -1:  fs = (native.libgamma_native_gamma_rampsf_get,  native.libgamma_native_gamma_rampsf_set)
+            elif depth == -2:  fs = (native.libgamma_native_gamma_rampsd_get,  native.libgamma_native_gamma_rampsd_set)
             (self._get, self._set) = fs
 
 
@@ -741,53 +813,512 @@ class GammaRamps:
         if green_size is ...:  green_size = red_size
         if blue_size is ...:   blue_size = green_size
         
+        self._ramps = 0
         self._depth = depth
         
-        from libgamma_native_method import libgamma_native_gamma_ramps8_create
-        from libgamma_native_method import libgamma_native_gamma_ramps16_create
-        from libgamma_native_method import libgamma_native_gamma_ramps32_create
-        from libgamma_native_method import libgamma_native_gamma_ramps64_create
-        from libgamma_native_method import libgamma_native_gamma_rampsf_create
-        from libgamma_native_method import libgamma_native_gamma_rampsd_create
-        if   depth ==  8:  ramp_struct = libgamma_native_gamma_ramps8_create (red_size, green_size, blue_size)
-        elif depth == 16:  ramp_struct = libgamma_native_gamma_ramps16_create(red_size, green_size, blue_size)
-        elif depth == 32:  ramp_struct = libgamma_native_gamma_ramps32_create(red_size, green_size, blue_size)
-        elif depth == 64:  ramp_struct = libgamma_native_gamma_ramps64_create(red_size, green_size, blue_size)
-        elif depth == -1:  ramp_struct = libgamma_native_gamma_rampsf_create (red_size, green_size, blue_size)
-        elif depth == -2:  ramp_struct = libgamma_native_gamma_rampsd_create (red_size, green_size, blue_size)
+        if   depth ==  8:  ramp_struct = native.libgamma_native_gamma_ramps8_create (red_size, green_size, blue_size)
+        elif depth == 16:  ramp_struct = native.libgamma_native_gamma_ramps16_create(red_size, green_size, blue_size)
+        elif depth == 32:  ramp_struct = native.libgamma_native_gamma_ramps32_create(red_size, green_size, blue_size)
+        elif depth == 64:  ramp_struct = native.libgamma_native_gamma_ramps64_create(red_size, green_size, blue_size)
+        elif depth == -1:  ramp_struct = native.libgamma_native_gamma_rampsf_create (red_size, green_size, blue_size)
+        elif depth == -2:  ramp_struct = native.libgamma_native_gamma_rampsd_create (red_size, green_size, blue_size)
         else:
             raise ValueError('invalid gamma ramp depth')
         if isinstance(ramp_struct, int):
-            import libgamma_native_error as c
-            error = OSError()
-            error.errno = ramp_struct
-            error.strerror = c.strerror(error.errno)
-            raise error
+            raise create_error(ramp_struct)
         (self._ramps, red, green, blue) = ramp_struct
         
         self._red   = GammaRamps.Ramp(red,   red_size,   depth)
         self._green = GammaRamps.Ramp(green, green_size, depth)
         self._blue  = GammaRamps.Ramp(blue,  blue_size,  depth)
+        
+        sizes = GammaRamps._sizes
+        if sizes is None:
+            sizes = GammaRamps._sizes = native.libgamma_native_gamma_ramps_sizes()
+        (struct_size, stop_size) = sizes[depth]
+        self._stop_size = stop_size
+        self._bytes = struct_size + (red_size + green_size + blue_size) * stop_size
+        _allocated(('GammaRamps', depth), self._bytes, self)
+
+
+    @classmethod
+    def from_buffer(cls, buffer, red_size : int, green_size : int = ..., blue_size : int = ...,
+                    *, depth : int = 16, offset : int = 0):
+        '''
+        Create gamma ramps whose stops are stored in a writable buffer, for example
+        an `mmap.mmap`, rather than allocated; nothing is copied, changes to the
+        buffer are changes to the ramps and vice versa
+        
+        The stops of the red, green, and blue ramps are contiguous, in that order,
+        in the format of `to_bytes`. The buffer is referenced until the ramps are
+        closed, it must not be closed or resized before that.
+        
+        @param   buffer      :bytes-like  The buffer, it must be writable and C-contiguous
+        @param   red_size    The number of stops in the gamma ramp for the red channel
+        @param   green_size  The number of stops in the gamma ramp for the green channel, `...` for `red_size`
+        @param   blue_size   The number of stops in the gamma ramp for the blue channel, `...` for `green_size`
+        @param   depth       The depth of the gamma ramps
+        @param   offset      The index of the first byte of the stops in `buffer`, it must
+                             be aligned to the size of a stop
+        @return              :GammaRamps  The gamma ramps
+        '''
+        if green_size is ...:  green_size = red_size
+        if blue_size is ...:   blue_size = green_size
+        
+        sizes = GammaRamps._sizes
+        if sizes is None:
+            sizes = GammaRamps._sizes = native.libgamma_native_gamma_ramps_sizes()
+        if depth not in sizes:
+            raise ValueError('invalid gamma ramp depth')
+        (struct_size, stop_size) = sizes[depth]
+        (address, n) = native.libgamma_native_buffer_address(buffer)
+        if offset < 0 or offset + (red_size + green_size + blue_size) * stop_size > n:
+            raise ValueError('buffer too small')
+        if not (address + offset) % stop_size == 0:
+            raise ValueError('misaligned buffer')
+        ramp_struct = native.libgamma_native_gamma_ramps_wrap(depth, address + offset, red_size, green_size, blue_size)
+        if isinstance(ramp_struct, int):
+            raise create_error(ramp_struct)
+        
+        self = cls.__new__(cls)
+        self._depth = depth
+        (self._ramps, red, green, blue) = ramp_struct
+        self._buffer = buffer
+        
+        self._red   = GammaRamps.Ramp(red,   red_size,   depth)
+        self._green = GammaRamps.Ramp(green, green_size, depth)
+        self._blue  = GammaRamps.Ramp(blue,  blue_size,  depth)
+        
+        self._stop_size = stop_size
+        self._bytes = struct_size
+        _allocated(('GammaRamps', depth), self._bytes, self)
+        return self
 
 
     def __del__(self):
         '''
         This function is called when the object is not longer in use
         '''
-        from libgamma_native_method import libgamma_native_gamma_ramps8_free
-        from libgamma_native_method import libgamma_native_gamma_ramps16_free
-        from libgamma_native_method import libgamma_native_gamma_ramps32_free
-        from libgamma_native_method import libgamma_native_gamma_ramps64_free
-        from libgamma_native_method import libgamma_native_gamma_rampsf_free
-        from libgamma_native_method import libgamma_native_gamma_rampsd_free
+        self.close()
+
+
+    def close(self):
+        '''
+        Release the gamma ramps, further use of them raises `ValueError`;
+        nothing is done if they are already closed
+        '''
+        if self._ramps == 0:
+            return
+        (ramps, self._ramps) = (self._ramps, 0)
+        self._red._get   = self._red._set   = _closed
+        self._green._get = self._green._set = _closed
+        self._blue._get  = self._blue._set  = _closed
+        if self._shared is not None:
+            (shared, self._shared) = (self._shared, None)
+            shared.users -= 1
+            if shared.users == 0:
+                shared.free()
+            return
+        if self._buffer is not None:
+            native.libgamma_native_gamma_ramps_unwrap(ramps)
+            self._buffer = None
+        elif self._depth ==  8:  native.libgamma_native_gamma_ramps8_free(ramps)
+        elif self._depth == 16:  native.libgamma_native_gamma_ramps16_free(ramps)
+        elif self._depth == 32:  native.libgamma_native_gamma_ramps32_free(ramps)
+        elif self._depth == 64:  native.libgamma_native_gamma_ramps64_free(ramps)
+        elif self._depth == -1:  native.libgamma_native_gamma_rampsf_free(ramps)
+        elif self._depth == -2:  native.libgamma_native_gamma_rampsd_free(ramps)
+        _released(self)
+
+
+    def share(self):
+        '''
+        Create gamma ramps that share their stops with these gamma ramps
+        rather than copying them; the stops are copied the first time
+        any of the gamma ramps sharing them is modified, so modifications
+        are never visible through the other gamma ramps
+        
+        If the stops are stored in a buffer, see `from_buffer`, changes
+        made directly to the buffer are however visible through all of
+        the gamma ramps until they are modified.
+        
+        @return  :GammaRamps  The new gamma ramps
+        '''
+        if self._ramps == 0:
+            _closed()
+        if self._shared is None:
+            self._shared = _SharedStops(self)
+            self._shared.users = 1
+            self._buffer = None
+            self._watch_writes()
+        return GammaRamps._from_shared(self._shared)
+
+
+    @staticmethod
+    def _from_shared(shared):
+        '''
+        Create gamma ramps that use shared stops
+        
+        @param   shared  :_SharedStops  The stops
+        @return          :GammaRamps    The new gamma ramps
+        '''
+        self = GammaRamps.__new__(GammaRamps)
+        self._depth = shared._depth
+        self._ramps = shared._ramps
+        ((red, red_size), (green, green_size), (blue, blue_size)) = shared._channels
+        self._red   = GammaRamps.Ramp(red,   red_size,   shared._depth)
+        self._green = GammaRamps.Ramp(green, green_size, shared._depth)
+        self._blue  = GammaRamps.Ramp(blue,  blue_size,  shared._depth)
+        self._stop_size = shared._stop_size
+        self._bytes = shared._bytes
+        self._shared = shared
+        shared.users += 1
+        self._watch_writes()
+        return self
+
+
+    def _watch_writes(self):
+        '''
+        Make the ramps call `_modify` before they are first modified
+        '''
+        if self._watched:
+            return
+        self._watched = True
+        owner = weakref.ref(self)
+        for ramp in (self._red, self._green, self._blue):
+            def set_watched(_address, index : int, value, ramp = ramp):
+                owner()._modify()
+                ramp._set(ramp._ramp, index, value)
+            (ramp._unwatched_set, ramp._set) = (ramp._set, set_watched)
+
+
+    def _modify(self):
+        '''
+        Prepare for the stops to be modified: stop sharing them
+        and discard the cached hash
+        '''
+        if self._shared is not None:
+            self._unshare()
+        self._hash = None
+        self._watched = False
+        for ramp in (self._red, self._green, self._blue):
+            ramp._set = ramp._unwatched_set
+
+
+    def _unshare(self):
+        '''
+        Stop sharing the stops with other gamma ramps; the stops
+        are copied unless no other gamma ramps use them anymore
+        '''
+        (shared, self._shared) = (self._shared, None)
+        shared.users -= 1
+        if shared.users == 0:
+            self._buffer = shared._buffer
+            (shared._ramps, shared._buffer) = (0, None)
+            _released(shared)
+        else:
+            ramps = (self._red, self._green, self._blue)
+            copy = GammaRamps(*(ramp._size for ramp in ramps), depth = self._depth)
+            for ramp, new in zip(ramps, (copy._red, copy._green, copy._blue)):
+                native.libgamma_native_gamma_ramp_copy(new._ramp, ramp._ramp, ramp._size * self._stop_size)
+                ramp._ramp = new._ramp
+            (self._ramps, copy._ramps) = (copy._ramps, 0)
+            self._bytes = copy._bytes
+            _released(copy)
+        _allocated(('GammaRamps', self._depth), self._bytes, self)
+
+
+    def to_bytes(self) -> bytes:
+        '''
+        Get the stops of the gamma ramps as a byte string
+        
+        @return  The stops of the red, green, and blue gamma ramps, in
+                 that order, in the machine's byte order; see `load_bytes`
+        '''
+        if self._ramps == 0:
+            _closed()
+        read = native.libgamma_native_gamma_ramp_read
+        n = self._stop_size
+        return read(self._red._ramp,   self._red._size   * n) + \
+               read(self._green._ramp, self._green._size * n) + \
+               read(self._blue._ramp,  self._blue._size  * n)
+
+
+    def load_bytes(self, data, offset : int = 0):
+        '''
+        Set the stops of the gamma ramps from a buffer
+        
+        @param  data    :bytes-like  The stops of the red, green, and blue gamma ramps,
+                                     in that order, in the machine's byte order, as
+                                     returned by `to_bytes` for ramps of the same sizes
+                                     and depth
+        @param  offset  The index of the first byte of the stops in `data`
+        '''
         if self._ramps == 0:
+            _closed()
+        if self._watched:
+            self._modify()
+        write = native.libgamma_native_gamma_ramp_write
+        n = self._stop_size
+        for ramp in (self._red, self._green, self._blue):
+            write(ramp._ramp, data, offset, ramp._size * n)
+            offset += ramp._size * n
+
+
+    def copy(self):
+        '''
+        Create gamma ramps with the same sizes, depth, and values
+        
+        @return  :GammaRamps  The new gamma ramps
+        '''
+        if self._ramps == 0:
+            _closed()
+        rc = GammaRamps(self._red._size, self._green._size, self._blue._size, depth = self._depth)
+        copy = native.libgamma_native_gamma_ramp_copy
+        n = self._stop_size
+        copy(rc._red._ramp,   self._red._ramp,   self._red._size   * n)
+        copy(rc._green._ramp, self._green._ramp, self._green._size * n)
+        copy(rc._blue._ramp,  self._blue._ramp,  self._blue._size  * n)
+        return rc
+
+
+    def copy_from(self, other):
+        '''
+        Set the stops of the gamma ramps to those of other gamma ramps
+        
+        If the depths differ, the values are converted: integer values are
+        scaled so that full intensity is preserved, rounding to the nearest
+        value, and floating-point values are clipped to [0, 1] when converted
+        to integers
+        
+        @param  other  :GammaRamps  The gamma ramps to copy, they must have the same sizes
+        '''
+        if self._ramps == 0 or other._ramps == 0:
+            _closed()
+        if not self.size == other.size:
+            raise ValueError('cannot resize ramps')
+        if self._ramps == other._ramps:
             return
-        if   self._depth ==  8:  libgamma_native_gamma_ramps8_free(self._ramps)
-        elif self._depth == 16:  libgamma_native_gamma_ramps16_free(self._ramps)
-        elif self._depth == 32:  libgamma_native_gamma_ramps32_free(self._ramps)
-        elif self._depth == 64:  libgamma_native_gamma_ramps64_free(self._ramps)
-        elif self._depth == -1:  libgamma_native_gamma_rampsf_free(self._ramps)
-        elif self._depth == -2:  libgamma_native_gamma_rampsd_free(self._ramps)
+        if self._watched:
+            self._modify()
+        ramps = zip((self._red, self._green, self._blue), (other._red, other._green, other._blue))
+        if self._depth == other._depth:
+            copy = native.libgamma_native_gamma_ramp_copy
+            for ramp, source in ramps:
+                copy(ramp._ramp, source._ramp, source._size * self._stop_size)
+        else:
+            convert = native.libgamma_native_gamma_ramp_convert
+            for ramp, source in ramps:
+                convert(ramp._ramp, self._depth, source._ramp, other._depth, source._size)
+
+
+    def __eq__(self, other) -> bool:
+        '''
+        Compare the gamma ramps with other gamma ramps
+        
+        @param   other  :GammaRamps  The other gamma ramps
+        @return         Whether the gamma ramps have the same sizes,
+                        depth, and stops; the stops are compared bytewise
+        '''
+        if not isinstance(other, GammaRamps):
+            return NotImplemented
+        if self._ramps == 0 or other._ramps == 0:
+            _closed()
+        if not (self._depth == other._depth and self.size == other.size):
+            return False
+        if self._ramps == other._ramps:
+            return True
+        if self._hash is not None and other._hash is not None and not self._hash == other._hash:
+            return False
+        equal = native.libgamma_native_gamma_ramp_equal
+        n = self._stop_size
+        return equal(self._red._ramp,   other._red._ramp,   self._red._size   * n) and \
+               equal(self._green._ramp, other._green._ramp, self._green._size * n) and \
+               equal(self._blue._ramp,  other._blue._ramp,  self._blue._size  * n)
+
+
+    def __hash__(self) -> int:
+        '''
+        Calculate a hash of the sizes, depth, and stops of the gamma ramps
+        
+        The hash is cached until the gamma ramps are modified; changes made
+        directly to the buffer of gamma ramps created with `from_buffer`
+        are however not detected.
+        
+        @return  The hash
+        '''
+        if self._ramps == 0:
+            _closed()
+        if self._hash is None:
+            digest = native.libgamma_native_gamma_ramp_hash
+            n = self._stop_size
+            self._hash = hash((self._depth, self.size,
+                               digest(self._red._ramp,   self._red._size   * n),
+                               digest(self._green._ramp, self._green._size * n),
+                               digest(self._blue._ramp,  self._blue._size  * n)))
+            self._watch_writes()
+        return self._hash
+
+
+    def compose(self, inner):
+        '''
+        Compose the gamma ramps with other gamma ramps, channel by channel:
+        the output of `inner` is used as the encoding value of these gamma
+        ramps, interpolating linearly between their stops
+        
+        @param   inner  :GammaRamps  The gamma ramps to apply first, of any sizes and depth
+        @return         :GammaRamps  `self ∘ inner`, with the sizes of `inner`
+                                     and the depth of these gamma ramps
+        '''
+        if self._ramps == 0 or inner._ramps == 0:
+            _closed()
+        if 0 in self.size or 0 in inner.size:
+            raise ValueError('operation on empty ramp')
+        rc = GammaRamps(*inner.size, depth = self._depth)
+        compose = native.libgamma_native_gamma_ramp_compose
+        for ramp, a, b in zip((rc._red, rc._green, rc._blue),
+                              (self._red, self._green, self._blue),
+                              (inner._red, inner._green, inner._blue)):
+            r = compose(ramp._ramp, ramp._size, self._depth,
+                        a._ramp, a._size, self._depth, b._ramp, b._size, inner._depth)
+            if not r == 0:
+                rc.close()
+                raise create_error(r)
+        return rc
+
+
+    def _combine(self, other, wa : float, wb : float, wab : float):
+        '''
+        Combine the gamma ramps with other gamma ramps pointwise,
+        as `wa * self + wb * other + wab * self * other`
+        
+        @param   other  :GammaRamps  The other gamma ramps, of any sizes and depth
+        @param   wa     The weight of these gamma ramps
+        @param   wb     The weight of `other`
+        @param   wab    The weight of the product of the gamma ramps
+        @return         :GammaRamps  The result
+        '''
+        if self._ramps == 0 or other._ramps == 0:
+            _closed()
+        if 0 in self.size or 0 in other.size:
+            raise ValueError('operation on empty ramp')
+        rc = GammaRamps(*self.size, depth = self._depth)
+        combine = native.libgamma_native_gamma_ramp_combine
+        for ramp, a, b in zip((rc._red, rc._green, rc._blue),
+                              (self._red, self._green, self._blue),
+                              (other._red, other._green, other._blue)):
+            r = combine(ramp._ramp, ramp._size, self._depth,
+                        a._ramp, a._size, self._depth, b._ramp, b._size, other._depth, wa, wb, wab)
+            if not r == 0:
+                rc.close()
+                raise create_error(r)
+        return rc
+
+
+    def multiply(self, other):
+        '''
+        Multiply the gamma ramps with other gamma ramps pointwise
+        
+        The values are multiplied in [0, 1] scale, and the result is clipped
+        to [0, 1]; if the sizes differ, `other` is interpolated linearly
+        
+        @param   other  :GammaRamps  The other gamma ramps, of any sizes and depth
+        @return         :GammaRamps  The product, with the sizes and depth of these gamma ramps
+        '''
+        return self._combine(other, 0.0, 0.0, 1.0)
+
+
+    def add(self, other):
+        '''
+        Add other gamma ramps to the gamma ramps pointwise
+        
+        The values are added in [0, 1] scale, and the result is clipped
+        to [0, 1]; if the sizes differ, `other` is interpolated linearly
+        
+        @param   other  :GammaRamps  The other gamma ramps, of any sizes and depth
+        @return         :GammaRamps  The sum, with the sizes and depth of these gamma ramps
+        '''
+        return self._combine(other, 1.0, 1.0, 0.0)
+
+
+    def lerp(self, other, t : float):
+        '''
+        Interpolate linearly between the gamma ramps and other gamma ramps
+        
+        The values are interpolated in [0, 1] scale, and the result is clipped
+        to [0, 1]; if the sizes differ, `other` is interpolated linearly
+        
+        @param   other  :GammaRamps  The other gamma ramps, of any sizes and depth
+        @param   t      The position between the gamma ramps, 0 for these and 1 for `other`
+        @return         :GammaRamps  The interpolation, with the sizes and depth of these gamma ramps
+        '''
+        return self._combine(other, 1.0 - t, t, 0.0)
+
+
+    def invert(self, tolerance : float = 0):
+        '''
+        Invert the gamma ramps, channel by channel, for example to
+        undo an adjustment; the ramps must be monotone, increasing or
+        decreasing, and flat parts are inverted to one of their ends
+        
+        Output values outside the range of a ramp are inverted to the
+        encoding value of the ramp's nearest extreme.
+        
+        @param   tolerance  How much, in [0, 1] scale, a ramp may go against its
+                            direction, for example because of rounding; such
+                            stops are treated as being level with the previous stop
+        @return             :GammaRamps  The inverse, with the sizes and depth of these gamma ramps
+        '''
+        if self._ramps == 0:
+            _closed()
+        if 0 in self.size:
+            raise ValueError('operation on empty ramp')
+        rc = GammaRamps(*self.size, depth = self._depth)
+        invert = native.libgamma_native_gamma_ramp_invert
+        for ramp, source in zip((rc._red, rc._green, rc._blue), (self._red, self._green, self._blue)):
+            r = invert(ramp._ramp, ramp._size, self._depth, source._ramp, source._size, self._depth, tolerance)
+            if not r == 0:
+                rc.close()
+                if r == -1:
+                    raise ValueError('ramp is not monotone')
+                raise create_error(r)
+        return rc
+
+
+    def estimate_gamma(self) -> tuple:
+        '''
+        Estimate the gamma, black level, and white level of each ramp, by fitting
+        `black + (white - black) * x ** gamma`, where `x` is the encoding value in
+        [0, 1], to the ramp; the levels are the first and last stops, and the gamma
+        is fitted with least squares in log-log space
+        
+        @return  :((float, float, float, float){3})  For the red, green, and blue ramps: the gamma,
+                                                     the black level, the white level, and the
+                                                     root-mean-square error of the fitted curve;
+                                                     the levels and error are in [0, 1] scale
+        '''
+        if self._ramps == 0:
+            _closed()
+        estimate = native.libgamma_native_gamma_ramp_estimate
+        return (estimate(self._red._ramp,   self._red._size,   self._depth),
+                estimate(self._green._ramp, self._green._size, self._depth),
+                estimate(self._blue._ramp,  self._blue._size,  self._depth))
+
+
+    def __enter__(self):
+        '''
+        Enter a `with` statement
+        
+        @return  :GammaRamps  `self`
+        '''
+        return self
+
+
+    def __exit__(self, *exc_info):
+        '''
+        Leave a `with` statement, closes the gamma ramps
+        '''
+        self.close()
 
 
     @property
@@ -886,6 +1417,86 @@ class GammaRamps:
         raise AttributeError('cannot change depth')
 
 
+class _SharedStops:
+    '''
+    The stops of gamma ramps shared by multiple `GammaRamps`
+    
+    @variable  users:int  The number of `GammaRamps` using the stops
+    '''
+
+    def __init__(self, ramps : GammaRamps):
+        '''
+        Constructor, takes over the stops of gamma ramps
+        
+        @param  ramps  The gamma ramps, they must not already use shared stops
+        '''
+        self._ramps = ramps._ramps
+        self._depth = ramps._depth
+        self._buffer = ramps._buffer
+        self._channels = ((ramps._red._ramp,   ramps._red._size),
+                          (ramps._green._ramp, ramps._green._size),
+                          (ramps._blue._ramp,  ramps._blue._size))
+        self._stop_size = ramps._stop_size
+        self._bytes = ramps._bytes
+        self.users = 0
+        _released(ramps)
+        _allocated(('GammaRamps', self._depth), self._bytes, self)
+
+
+    def __del__(self):
+        '''
+        This function is called when the object is not longer in use
+        '''
+        self.free()
+
+
+    def free(self):
+        '''
+        Release the stops; nothing is done if they are already released
+        '''
+        if self._ramps == 0:
+            return
+        (ramps, self._ramps) = (self._ramps, 0)
+        if self._buffer is not None:
+            native.libgamma_native_gamma_ramps_unwrap(ramps)
+            self._buffer = None
+        elif self._depth ==  8:  native.libgamma_native_gamma_ramps8_free(ramps)
+        elif self._depth == 16:  native.libgamma_native_gamma_ramps16_free(ramps)
+        elif self._depth == 32:  native.libgamma_native_gamma_ramps32_free(ramps)
+        elif self._depth == 64:  native.libgamma_native_gamma_ramps64_free(ramps)
+        elif self._depth == -1:  native.libgamma_native_gamma_rampsf_free(ramps)
+        elif self._depth == -2:  native.libgamma_native_gamma_rampsd_free(ramps)
+        _released(self)
+
+
+_interned = weakref.WeakValueDictionary()
+'''
+The shared stops of interned gamma ramps, by their hash
+'''
+
+
+def intern_ramps(ramps : GammaRamps) -> GammaRamps:
+    '''
+    Get gamma ramps that share their stops with all interned gamma ramps
+    with the same sizes, depth, and values, so that identical ramps used
+    on many CRTC:s are only stored once
+    
+    @param   ramps  The gamma ramps, they are not modified
+    @return         Gamma ramps with the same sizes, depth, and values; their stops are
+                    copied the first time they are modified, see `GammaRamps.share`
+    '''
+    key = hash(ramps)
+    shared = _interned.get(key, None)
+    if shared is not None and not shared._ramps == 0:
+        rc = GammaRamps._from_shared(shared)
+        if rc == ramps:
+            return rc
+        rc.close()
+    rc = ramps.share()
+    _interned[key] = rc._shared
+    return rc
+
+
 class Site:
     '''
     Site state
@@ -896,46 +1507,104 @@ class Site:
     and the BSD:s, there can usually be any (feasible) number of
     sites. In X.org parlance they are called displays.
     
+    Call `close`, or use a `with` statement, to release the site
+    deterministically rather than when it is garbage collected.
+    
     @variable  method:int                The adjustment method of the site
     @variable  site:str?                 The site identifier
     @variable  partitions_available:int  The number of paritions available in the site
     '''
 
-    def __init__(self, method : int, site : str = None):
+    def __init__(self, method : int, site : str = None, *, backend = None):
         '''
         Constructor
         
         @param  method:int  The adjustment method of the site
         @param  site:str?   The site identifier
+        @param  backend     :Backend?  The backend to use instead of libgamma, for
+                                       the site and its partitions and CRTC:s
         '''
-        from libgamma_native_facade import libgamma_native_site_create
-        (self._state, n) = libgamma_native_site_create(method, site)
+        self._state = 0
+        self._native = native if backend is None else backend
+        self.method = method
+        self.site = site
+        event = _pre('site.open', self) if _hooks else None
+        (self._state, n) = self._native.libgamma_native_site_create(method, site)
+        if event is not None:
+            _post(event, n if self._state == 0 else 0)
         if self._state == 0:
             raise create_error(n)
         self.partitions_available = n
-        self.method = method
-        self.site = site
+        self._partitions = weakref.WeakSet()
+        self._bytes = _state_size(0) + (0 if site is None else len(site.encode('utf-8')) + 1)
+        _allocated('Site', self._bytes, self)
 
 
     def __del__(self):
         '''
         This function is called when the object is not longer in use
         '''
-        from libgamma_native_facade import libgamma_native_site_free
-        if not self._state == 0:
-            libgamma_native_site_free(self._state)
+        self.close()
+
+
+    def close(self):
+        '''
+        Release the site, first closing its open partitions and their
+        CRTC:s, further use of them raises `ValueError`; nothing is
+        done if the site is already closed
+        '''
+        if self._state == 0:
+            return
+        for partition in list(self._partitions):
+            partition.close()
+        event = _pre('site.close', self) if _hooks else None
+        (state, self._state) = (self._state, 0)
+        self._native.libgamma_native_site_free(state)
+        self._native = _closed_native
+        if event is not None:
+            _post(event, 0)
+        _released(self)
+
+
+    def __enter__(self):
+        '''
+        Enter a `with` statement
+        
+        @return  :Site  `self`
+        '''
+        return self
+
+
+    def __exit__(self, *exc_info):
+        '''
+        Leave a `with` statement, closes the site
+        '''
+        self.close()
 
 
     def restore(self):
         '''
         Restore the gamma ramps all CRTC:s with the site to the system settings
         '''
-        from libgamma_native_facade import libgamma_native_site_restore
-        r = libgamma_native_site_restore(self._state)
+        r = self._native.libgamma_native_site_restore(self._state)
+        for partition in list(self._partitions):
+            for crtc in list(partition._crtcs):
+                crtc.refresh()
         if not r == 0:
             raise create_error(r)
 
 
+    def snapshot(self):
+        '''
+        Read the gamma ramps of all CRTC:s of the site into one buffer,
+        so that they can be reverted to later, see `Snapshot`
+        
+        @return  :Snapshot  The snapshot
+        '''
+        from libgamma_snapshot import Snapshot
+        return Snapshot(self)
+
+
 class Partition:
     '''
     Partition state
@@ -949,6 +1618,9 @@ class Partition:
     On hardware-level adjustment methods, such as Direct
     Rendering Manager, a partition is a graphics card
     
+    Call `close`, or use a `with` statement, to release the partition
+    deterministically rather than when it is garbage collected.
+    
     @variable  site:Site            The site of the partition
     @variable  partition:int        The index of the partition
     @variable  crtcs_available:int  The number of CRTC:s available in the parition
@@ -961,34 +1633,149 @@ class Partition:
         @param  site       The site of the partition
         @param  partition  The index of the partition
         '''
-        from libgamma_native_facade import libgamma_native_partition_create
-        (self._state, n) = libgamma_native_partition_create(site._state, partition)
+        self._state = 0
+        self._native = site._native
+        self.site = site
+        self.partition = partition
+        event = _pre('partition.open', self) if _hooks else None
+        (self._state, n) = self._native.libgamma_native_partition_create(site._state, partition)
+        if event is not None:
+            _post(event, n if self._state == 0 else 0)
         if self._state == 0:
             raise create_error(n)
         self.crtcs_available = n
-        self.site = site
-        self.partition = partition
+        self._crtcs = weakref.WeakSet()
+        site._partitions.add(self)
+        self._bytes = _state_size(1)
+        _allocated('Partition', self._bytes, self)
 
 
     def __del__(self):
         '''
         This function is called when the object is not longer in use
         '''
-        from libgamma_native_facade import libgamma_native_partition_free
-        if not self._state == 0:
-            libgamma_native_partition_free(self._state)
+        self.close()
+
+
+    def close(self):
+        '''
+        Release the partition, first closing its open CRTC:s,
+        further use of them raises `ValueError`; nothing is
+        done if the partition is already closed
+        '''
+        if self._state == 0:
+            return
+        for crtc in list(self._crtcs):
+            crtc.close()
+        event = _pre('partition.close', self) if _hooks else None
+        (state, self._state) = (self._state, 0)
+        self._native.libgamma_native_partition_free(state)
+        self._native = _closed_native
+        if event is not None:
+            _post(event, 0)
+        _released(self)
+
+
+    def __enter__(self):
+        '''
+        Enter a `with` statement
+        
+        @return  :Partition  `self`
+        '''
+        return self
+
+
+    def __exit__(self, *exc_info):
+        '''
+        Leave a `with` statement, closes the partition
+        '''
+        self.close()
 
 
     def restore(self):
         '''
         Restore the gamma ramps all CRTC:s with the partition to the system settings
         '''
-        from libgamma_native_facade import libgamma_native_partition_restore
-        r = libgamma_native_partition_restore(self._state)
+        r = self._native.libgamma_native_partition_restore(self._state)
+        for crtc in list(self._crtcs):
+            crtc.refresh()
         if not r == 0:
             raise create_error(r)
 
 
+class _Shadow:
+    '''
+    Copy of the gamma ramps of a CRTC, see `CRTC.enable_shadow`
+    
+    @variable  ttl:float?  The number of seconds the copy is used for, `None` for no limit
+    '''
+
+    def __init__(self, ttl : float):
+        '''
+        Constructor
+        
+        @param  ttl  The number of seconds the copy is used for, `None` for no limit
+        '''
+        self.ttl = ttl
+        self._ramps = None
+        self._key = None
+        self._expires = 0.0
+
+
+    def load(self, ramps : GammaRamps) -> bool:
+        '''
+        Copy the copy into gamma ramps
+        
+        @param   ramps  The gamma ramps to fill
+        @return         Whether the copy was valid and had the same sizes
+                        and depth as `ramps`, otherwise `ramps` is unchanged
+        '''
+        if not self._key == (ramps._depth, ramps._red._size, ramps._green._size, ramps._blue._size):
+            return False
+        if self.ttl is not None and time.monotonic() >= self._expires:
+            self.clear()
+            return False
+        if ramps._ramps == 0:
+            _closed()
+        if ramps._watched:
+            ramps._modify()
+        shadow = self._ramps
+        copy = native.libgamma_native_gamma_ramp_copy
+        n = shadow._stop_size
+        copy(ramps._red._ramp,   shadow._red._ramp,   shadow._red._size   * n)
+        copy(ramps._green._ramp, shadow._green._ramp, shadow._green._size * n)
+        copy(ramps._blue._ramp,  shadow._blue._ramp,  shadow._blue._size  * n)
+        return True
+
+
+    def store(self, ramps : GammaRamps):
+        '''
+        Replace the copy
+        
+        @param  ramps  The gamma ramps of the CRTC
+        '''
+        shadow = self._ramps
+        key = (ramps._depth, ramps._red._size, ramps._green._size, ramps._blue._size)
+        if key == self._key:
+            shadow.copy_from(ramps)
+        else:
+            self._ramps = ramps.copy()
+            self._key = key
+            if shadow is not None:
+                shadow.close()
+        if self.ttl is not None:
+            self._expires = time.monotonic() + self.ttl
+
+
+    def clear(self):
+        '''
+        Discard the copy
+        '''
+        (shadow, self._ramps, self._key) = (self._ramps, None, None)
+        if shadow is not None:
+            shadow.close()
+
+
 class CRTC:
     '''
     Cathode ray tube controller state
@@ -997,10 +1784,19 @@ class CRTC:
     monitor that is plugged in to the connector
     that the CRTC belongs to
     
+    Call `close`, or use a `with` statement, to release the CRTC
+    deterministically rather than when it is garbage collected.
+    
     @variable  partition:Partition  The partition of the CRTC
     @variable  crtc:int             The index of the CRTC
     '''
 
+    _shadow = None
+    '''
+    The copy of the gamma ramps that `get_gamma` is served
+    from, `None` unless enabled with `enable_shadow`
+    '''
+
     def __init__(self, partition : Partition, crtc : int):
         '''
         Constructor
@@ -1008,33 +1804,90 @@ class CRTC:
         @param  partition  The partition the of the CRTC
         @param  crtc       The index of the CRTC
         '''
-        from libgamma_native_facade import libgamma_native_crtc_create
-        (self._state, n) = libgamma_native_crtc_create(partition._state, crtc)
-        if self._state == 0:
-            raise create_error(n)
+        self._state = 0
+        self._native = partition._native
         self.partition = partition
         self.crtc = crtc
+        event = _pre('crtc.open', self) if _hooks else None
+        (self._state, n) = self._native.libgamma_native_crtc_create(partition._state, crtc)
+        if event is not None:
+            _post(event, n if self._state == 0 else 0)
+        if self._state == 0:
+            raise create_error(n)
+        partition._crtcs.add(self)
+        self._bytes = _state_size(2)
+        _allocated('CRTC', self._bytes, self)
 
 
     def __del__(self):
         '''
         This function is called when the object is not longer in use
         '''
-        from libgamma_native_facade import libgamma_native_crtc_free
-        if not self._state == 0:
-            libgamma_native_crtc_free(self._state)
+        self.close()
+
+
+    def close(self):
+        '''
+        Release the CRTC, further use of it raises `ValueError`;
+        nothing is done if the CRTC is already closed
+        '''
+        if self._state == 0:
+            return
+        event = _pre('crtc.close', self) if _hooks else None
+        (state, self._state) = (self._state, 0)
+        self._native.libgamma_native_crtc_free(state)
+        if self._shadow is not None:
+            self._shadow.clear()
+            self._shadow = None
+        self._native = _closed_native
+        if event is not None:
+            _post(event, 0)
+        _released(self)
+
+
+    def __enter__(self):
+        '''
+        Enter a `with` statement
+        
+        @return  :CRTC  `self`
+        '''
+        return self
+
+
+    def __exit__(self, *exc_info):
+        '''
+        Leave a `with` statement, closes the CRTC
+        '''
+        self.close()
 
 
     def restore(self):
         '''
         Restore the gamma ramps for a CRTC to the system settings for that CRTC
         '''
-        from libgamma_native_facade import libgamma_native_crtc_restore
-        r = libgamma_native_crtc_restore(self._state)
+        r = self.try_restore()
         if not r == 0:
             raise create_error(r)
 
 
+    def try_restore(self) -> int:
+        '''
+        Restore the gamma ramps for a CRTC to the system settings for that CRTC,
+        without raising an exception on failure
+        
+        @return  Zero on success, otherwise the value of an error
+                 identifier provided by this library or `errno`,
+                 `create_error` can convert it to an exception
+        '''
+        event = _pre('crtc.restore', self) if _hooks else None
+        r = self._native.libgamma_native_crtc_restore(self._state)
+        if self._shadow is not None:
+            self._shadow.clear()
+        if event is not None:
+            _post(event, r)
+        return r
+
+
     def information(self, fields : int) -> tuple:
         '''
         Read information about a CRTC
@@ -1044,8 +1897,7 @@ class CRTC:
         @return  :(:CRTCInformation, :bool)  The information about the CRTC and
                                              whether no errors occurred
         '''
-        from libgamma_native_facade import libgamma_native_get_crtc_information
-        (data, e) = libgamma_native_get_crtc_information(self._state, fields)
+        (data, e) = self._native.libgamma_native_get_crtc_information(self._state, fields)
         return (CRTCInformation(data), e == 0)
 
 
@@ -1055,39 +1907,115 @@ class CRTC:
         
         @param  ramps  The gamma ramps to fill with the current values
         '''
-        from libgamma_native_facade import libgamma_native_crtc_get_gamma_ramps8
-        from libgamma_native_facade import libgamma_native_crtc_get_gamma_ramps16
-        from libgamma_native_facade import libgamma_native_crtc_get_gamma_ramps32
-        from libgamma_native_facade import libgamma_native_crtc_get_gamma_ramps64
-        from libgamma_native_facade import libgamma_native_crtc_get_gamma_rampsf
-        from libgamma_native_facade import libgamma_native_crtc_get_gamma_rampsd
-        if   ramps.depth ==  8:  r = libgamma_native_crtc_get_gamma_ramps8(self._state, ramps._ramps)
-        elif ramps.depth == 16:  r = libgamma_native_crtc_get_gamma_ramps16(self._state, ramps._ramps)
-        elif ramps.depth == 32:  r = libgamma_native_crtc_get_gamma_ramps32(self._state, ramps._ramps)
-        elif ramps.depth == 64:  r = libgamma_native_crtc_get_gamma_ramps64(self._state, ramps._ramps)
-        elif ramps.depth == -1:  r = libgamma_native_crtc_get_gamma_rampsf(self._state, ramps._ramps)
-        elif ramps.depth == -2:  r = libgamma_native_crtc_get_gamma_rampsd(self._state, ramps._ramps)
+        r = self.try_get_gamma(ramps)
         if not r == 0:
             raise create_error(r)
 
 
+    def try_get_gamma(self, ramps : GammaRamps) -> int:
+        '''
+        Get the current gamma ramps for the CRTC, without
+        raising an exception on failure
+        
+        @param   ramps  The gamma ramps to fill with the current values
+        @return         Zero on success, otherwise the value of an error
+                        identifier provided by this library or `errno`,
+                        `create_error` can convert it to an exception
+        '''
+        if ramps._ramps == 0:
+            _closed()
+        shadow = self._shadow
+        if shadow is not None and shadow.load(ramps):
+            return 0
+        if ramps._watched:
+            ramps._modify()
+        event = _pre('crtc.get_gamma', self, ramps) if _hooks else None
+        if   ramps.depth ==  8:  r = self._native.libgamma_native_crtc_get_gamma_ramps8(self._state, ramps._ramps)
+        elif ramps.depth == 16:  r = self._native.libgamma_native_crtc_get_gamma_ramps16(self._state, ramps._ramps)
+        elif ramps.depth == 32:  r = self._native.libgamma_native_crtc_get_gamma_ramps32(self._state, ramps._ramps)
+        elif ramps.depth == 64:  r = self._native.libgamma_native_crtc_get_gamma_ramps64(self._state, ramps._ramps)
+        elif ramps.depth == -1:  r = self._native.libgamma_native_crtc_get_gamma_rampsf(self._state, ramps._ramps)
+        elif ramps.depth == -2:  r = self._native.libgamma_native_crtc_get_gamma_rampsd(self._state, ramps._ramps)
+        if shadow is not None and r == 0:
+            shadow.store(ramps)
+        if event is not None:
+            _post(event, r)
+        return r
+
+
     def set_gamma(self, ramps : GammaRamps):
         '''
         Set gamma ramps for the CRTC
         
         @param  ramps  The gamma ramps to apply
         '''
-        from libgamma_native_facade import libgamma_native_crtc_set_gamma_ramps8
-        from libgamma_native_facade import libgamma_native_crtc_set_gamma_ramps16
-        from libgamma_native_facade import libgamma_native_crtc_set_gamma_ramps32
-        from libgamma_native_facade import libgamma_native_crtc_set_gamma_ramps64
-        from libgamma_native_facade import libgamma_native_crtc_set_gamma_rampsf
-        from libgamma_native_facade import libgamma_native_crtc_set_gamma_rampsd
-        if   ramps.depth ==  8:  r = libgamma_native_crtc_set_gamma_ramps8(self._state, ramps._ramps)
-        elif ramps.depth == 16:  r = libgamma_native_crtc_set_gamma_ramps16(self._state, ramps._ramps)
-        elif ramps.depth == 32:  r = libgamma_native_crtc_set_gamma_ramps32(self._state, ramps._ramps)
-        elif ramps.depth == 64:  r = libgamma_native_crtc_set_gamma_ramps64(self._state, ramps._ramps)
-        elif ramps.depth == -1:  r = libgamma_native_crtc_set_gamma_rampsf(self._state, ramps._ramps)
-        elif ramps.depth == -2:  r = libgamma_native_crtc_set_gamma_rampsd(self._state, ramps._ramps)
+        r = self.try_set_gamma(ramps)
         if not r == 0:
             raise create_error(r)
+
+
+    def try_set_gamma(self, ramps : GammaRamps) -> int:
+        '''
+        Set gamma ramps for the CRTC, without raising an exception on failure
+        
+        @param   ramps  The gamma ramps to apply
+        @return         Zero on success, otherwise the value of an error
+                        identifier provided by this library or `errno`,
+                        `create_error` can convert it to an exception
+        '''
+        if ramps._ramps == 0:
+            _closed()
+        event = _pre('crtc.set_gamma', self, ramps) if _hooks else None
+        if   ramps.depth ==  8:  r = self._native.libgamma_native_crtc_set_gamma_ramps8(self._state, ramps._ramps)
+        elif ramps.depth == 16:  r = self._native.libgamma_native_crtc_set_gamma_ramps16(self._state, ramps._ramps)
+        elif ramps.depth == 32:  r = self._native.libgamma_native_crtc_set_gamma_ramps32(self._state, ramps._ramps)
+        elif ramps.depth == 64:  r = self._native.libgamma_native_crtc_set_gamma_ramps64(self._state, ramps._ramps)
+        elif ramps.depth == -1:  r = self._native.libgamma_native_crtc_set_gamma_rampsf(self._state, ramps._ramps)
+        elif ramps.depth == -2:  r = self._native.libgamma_native_crtc_set_gamma_rampsd(self._state, ramps._ramps)
+        if self._shadow is not None:
+            if r == 0:
+                self._shadow.store(ramps)
+            else:
+                self._shadow.clear()
+        if event is not None:
+            _post(event, r)
+        return r
+
+
+    def enable_shadow(self, ttl : float = None):
+        '''
+        Keep a copy of the gamma ramps last applied or read, so that
+        `get_gamma` is served from memory rather than from the adjustment
+        method, as long as the gamma ramps have the same sizes and depth
+        
+        The copy is discarded when it is older than `ttl`, when `refresh`
+        is called, when the CRTC is restored, and when a `Watcher` of the
+        site reports that the CRTC has changed. Changes made by other
+        programs, or through other `CRTC` objects, are not noticed
+        until the copy is discarded.
+        
+        @param  ttl  The number of seconds the copy is used for, `None` for no limit
+        '''
+        if self._shadow is None:
+            self._shadow = _Shadow(ttl)
+        else:
+            self._shadow.ttl = ttl
+            self._shadow.clear()
+
+
+    def disable_shadow(self):
+        '''
+        Stop keeping a copy of the gamma ramps, see `enable_shadow`
+        '''
+        (shadow, self._shadow) = (self._shadow, None)
+        if shadow is not None:
+            shadow.clear()
+
+
+    def refresh(self):
+        '''
+        Discard the copy of the gamma ramps, if `enable_shadow` has been
+        called, so that the next `get_gamma` reads from the adjustment method
+        '''
+        if self._shadow is not None:
+            self._shadow.clear()
@@ -0,0 +1,243 @@
+# See LICENSE file for copyright and license details.
+from libgamma_error import LibgammaError
+from libgamma_method import Site, Partition, CRTC
+from libgamma_method import LIBGAMMA_CRTC_INFO_EDID, LIBGAMMA_CRTC_INFO_CONNECTOR_NAME
+from libgamma_edid import parse_edid
+
+
+LIBGAMMA_MONITOR_INDEX_FIELDS = LIBGAMMA_CRTC_INFO_EDID | \
+                                LIBGAMMA_CRTC_INFO_CONNECTOR_NAME
+'''
+The `CRTCInformation` fields that `MonitorIndex` reads
+'''
+
+
+class MonitorIndex:
+    '''
+    Index of the CRTC:s in a site by the monitors connected to them
+    
+    The index is built from one enumeration pass over the site, and
+    the `CRTC` objects it creates are kept open. Lookups are constant
+    time and do not query the adjustment method. Use `update` with the
+    events from `watch` to keep the index current.
+    
+    @variable  site:Site  The indexed site
+    '''
+
+    def __init__(self, site : Site):
+        '''
+        Constructor
+        
+        @param  site  The site to index
+        '''
+        self.site = site
+        self._partitions  = {}
+        self._crtcs       = {}
+        self._information = {}
+        self._by_edid      = {}
+        self._by_serial    = {}
+        self._by_connector = {}
+        for p in range(site.partitions_available):
+            partition = self._partition(p)
+            if partition is None:
+                continue
+            for c in range(partition.crtcs_available):
+                self.refresh(p, c)
+
+
+    def _partition(self, partition : int) -> Partition:
+        '''
+        Get a partition, open it if it is not already open
+        
+        @param   partition  The index of the partition
+        @return             The partition, `None` if it cannot be opened
+        '''
+        rc = self._partitions.get(partition, None)
+        if rc is None:
+            try:
+                rc = Partition(self.site, partition)
+            except (LibgammaError, OSError):
+                return None
+            self._partitions[partition] = rc
+        return rc
+
+
+    def _unindex(self, key : tuple):
+        '''
+        Remove a CRTC from the lookup tables
+        
+        @param  key  The partition index and CRTC index of the CRTC
+        '''
+        info = self._information.pop(key, None)
+        if info is None:
+            return
+        for table, value in self._keys(info):
+            keys = table.get(value, [])
+            if key in keys:
+                keys.remove(key)
+            if len(keys) == 0:
+                table.pop(value, None)
+
+
+    def _index(self, key : tuple, info):
+        '''
+        Add a CRTC to the lookup tables
+        
+        @param  key   The partition index and CRTC index of the CRTC
+        @param  info  :CRTCInformation  The information about the CRTC
+        '''
+        self._information[key] = info
+        for table, value in self._keys(info):
+            keys = table.setdefault(value, [])
+            keys.append(key)
+            keys.sort()
+
+
+    def _keys(self, info) -> list:
+        '''
+        Get the lookup keys for a CRTC, each table maps a key
+        to the CRTC:s with it, sorted by partition and CRTC index
+        
+        @param   info  :CRTCInformation               The information about the CRTC
+        @return        :list<(dict, bytes|int|str)>  Each lookup table and the CRTC's key in it
+        '''
+        rc = []
+        if info.connector_name is not None:
+            rc.append((self._by_connector, info.connector_name))
+        if info.edid is None or info.edid_error != 0:
+            return rc
+        rc.append((self._by_edid, info.edid))
+        try:
+            edid = parse_edid(info.edid)
+        except LibgammaError:
+            return rc
+        if edid.serial != 0:
+            rc.append((self._by_serial, edid.serial))
+        if edid.serial_string is not None:
+            rc.append((self._by_serial, edid.serial_string))
+        return rc
+
+
+    def refresh(self, partition : int, crtc : int, information = None):
+        '''
+        Reindex one CRTC
+        
+        @param  partition    The index of the partition of the CRTC
+        @param  crtc         The index of the CRTC within the partition
+        @param  information  :CRTCInformation?  The current information about the CRTC, it must include
+                                                the fields in `LIBGAMMA_MONITOR_INDEX_FIELDS`; `None` to
+                                                read it from the adjustment method
+        '''
+        key = (partition, crtc)
+        self._unindex(key)
+        handle = self._crtcs.get(key, None)
+        if handle is None:
+            partition_ = self._partition(partition)
+            if partition_ is None:
+                return
+            try:
+                handle = CRTC(partition_, crtc)
+            except (LibgammaError, OSError):
+                return
+            self._crtcs[key] = handle
+        if information is None:
+            information = handle.information(LIBGAMMA_MONITOR_INDEX_FIELDS)[0]
+        self._index(key, information)
+
+
+    def remove(self, partition : int, crtc : int):
+        '''
+        Remove a CRTC from the index and release it
+        
+        @param  partition  The index of the partition of the CRTC
+        @param  crtc       The index of the CRTC within the partition
+        '''
+        key = (partition, crtc)
+        self._unindex(key)
+        self._crtcs.pop(key, None)
+
+
+    def update(self, events):
+        '''
+        Update the index with changes reported by `watch`
+        
+        @param  events  :WatchEvent|itr<WatchEvent>  The changes
+        '''
+        from libgamma_watch import WatchEvent
+        if isinstance(events, WatchEvent):
+            events = (events,)
+        for event in events:
+            if event.kind == WatchEvent.REMOVED:
+                self.remove(event.partition, event.crtc)
+            else:
+                self.refresh(event.partition, event.crtc, event.information)
+
+
+    def by_edid(self, edid : bytes) -> CRTC:
+        '''
+        Look up a CRTC by the EDID of its monitor
+        
+        @param   edid  The EDID in raw representation
+        @return        The CRTC, `None` if not found; if multiple CRTC:s have
+                       the EDID, the one with the lowest partition and CRTC index
+        '''
+        keys = self._by_edid.get(bytes(edid), None)
+        return None if keys is None else self._crtcs[keys[0]]
+
+
+    def by_serial(self, serial) -> CRTC:
+        '''
+        Look up a CRTC by the serial number of its monitor
+        
+        @param   serial  :int|str  The serial number in the EDID, or the serial
+                                   number descriptor in the EDID
+        @return          The CRTC, `None` if not found; if multiple CRTC:s have the
+                         serial number, the one with the lowest partition and CRTC index
+        '''
+        keys = self._by_serial.get(serial, None)
+        return None if keys is None else self._crtcs[keys[0]]
+
+
+    def by_connector_name(self, name : str, partition : int = None) -> CRTC:
+        '''
+        Look up a CRTC by the name of its connector
+        
+        @param   name       The name of the connector
+        @param   partition  The index of the partition, connector names are only
+                            unique within a partition; `None` for the first CRTC,
+                            in the partition with the lowest index, with the name
+        @return             The CRTC, `None` if not found
+        '''
+        for key in self._by_connector.get(name, ()):
+            if partition is None or key[0] == partition:
+                return self._crtcs[key]
+        return None
+
+
+    def information(self, crtc : CRTC):
+        '''
+        Get the indexed information about a CRTC
+        
+        @param   crtc  The CRTC, as returned by the index
+        @return        :CRTCInformation?  The information, `None` if not indexed
+        '''
+        return self._information.get((crtc.partition.partition, crtc.crtc), None)
+
+
+    def __len__(self) -> int:
+        '''
+        Get the number of indexed CRTC:s
+        
+        @return  The number of indexed CRTC:s
+        '''
+        return len(self._information)
+
+
+    def __iter__(self):
+        '''
+        Iterate over the indexed CRTC:s
+        
+        @return  :itr<CRTC>  The indexed CRTC:s, by partition index and CRTC index
+        '''
+        for key in sorted(self._information):
+            yield self._crtcs[key]
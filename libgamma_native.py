@@ -0,0 +1,51 @@
+# See LICENSE file for copyright and license details.
+import importlib
+
+
+class LibgammaNative:
+    '''
+    Class for `native`
+    '''
+
+    _modules = ('libgamma_native_facade', 'libgamma_native_method', 'libgamma_native_error',
+                'libgamma_native_dummy')
+    '''
+    The native modules, in the order they are searched
+    '''
+
+    _loaded = {}
+    '''
+    The native modules that have been imported, by name; they are
+    kept here so that objects released during interpreter shutdown,
+    when the modules can no longer be imported, can still be freed
+    '''
+
+    def __getattr__(self, name : str):
+        '''
+        Look up a native function that has not been bound yet,
+        and bind it so that it is found directly next time
+        
+        @param   name  The name of the function
+        @return        The function
+        '''
+        for module in LibgammaNative._modules:
+            loaded = LibgammaNative._loaded.get(module, None)
+            if loaded is None:
+                loaded = LibgammaNative._loaded[module] = importlib.import_module(module)
+            module = loaded
+            if hasattr(module, name):
+                function = getattr(module, name)
+                setattr(self, name, function)
+                return function
+        raise AttributeError('no native function named %s' % repr(name))
+
+
+native = LibgammaNative()
+'''
+The functions in the native modules
+
+A native module is imported the first time one of its functions is used,
+and each function is bound as an attribute of this object the first time
+it is used. Python code in this package shall always call native functions
+through this object.
+'''
@@ -0,0 +1,328 @@
+# -*- python -*-
+# See LICENSE file for copyright and license details.
+cimport cython
+
+from libc.stddef cimport size_t
+from libc.stdlib cimport malloc, free
+from libc.string cimport memcpy
+from libc.stdint cimport int32_t
+
+
+ctypedef int libgamma_subpixel_order_t
+ctypedef int libgamma_connector_type_t
+
+cdef extern from "include-libgamma-dummy.h":
+
+    ctypedef struct struct_libgamma_method_capabilities "struct libgamma_method_capabilities":
+        # Capabilities of adjustment methods, only the fields used here are declared
+
+        int32_t crtc_information
+        unsigned default_site_known # : 1
+        unsigned multiple_sites # : 1
+        unsigned multiple_partitions # : 1
+        unsigned multiple_crtcs # : 1
+        unsigned partitions_are_graphics_cards # : 1
+        unsigned site_restore # : 1
+        unsigned partition_restore # : 1
+        unsigned crtc_restore # : 1
+        unsigned identical_gamma_sizes # : 1
+        unsigned fixed_gamma_size # : 1
+        unsigned fixed_gamma_depth # : 1
+        unsigned real # : 1
+        unsigned fake # : 1
+
+    ctypedef struct libgamma_crtc_information "struct libgamma_crtc_information":
+        # Cathode ray tube controller information data structure,
+        # only the fields used here are declared
+
+        unsigned char *edid
+        size_t edid_length
+        int edid_error
+        size_t width_mm
+        int width_mm_error
+        size_t height_mm
+        int height_mm_error
+        size_t width_mm_edid
+        int width_mm_edid_error
+        size_t height_mm_edid
+        int height_mm_edid_error
+        size_t red_gamma_size
+        size_t green_gamma_size
+        size_t blue_gamma_size
+        int gamma_size_error
+        signed gamma_depth
+        int gamma_depth_error
+        int gamma_support
+        int gamma_support_error
+        libgamma_subpixel_order_t subpixel_order
+        int subpixel_order_error
+        int active
+        int active_error
+        int connector_name_error
+        libgamma_connector_type_t connector_type
+        int connector_type_error
+        float gamma_red
+        float gamma_green
+        float gamma_blue
+        int gamma_error
+
+    ctypedef struct libgamma_dummy_configurations "struct libgamma_dummy_configurations":
+        # Configuration set for the dummy adjustment method
+
+        struct_libgamma_method_capabilities capabilities
+        # The method's capabilities
+
+        libgamma_crtc_information crtc_info_template
+        # Template for CRTC:s information
+
+        int real_method
+        # The adjustment method to use in the dummy or
+        # `-1` to use the default method if any
+
+        size_t site_count
+        # The number of sites on the system
+
+        size_t default_partition_count
+        # The number of partitions on a site before it has been configured
+
+        size_t default_crtc_count
+        # The number of CRTC:s on a partition before it has been configured
+
+        unsigned inherit_real_ramps # : 1
+        # Whether the sites should be inherited from the real method
+
+        unsigned verify_gamma_size # : 1
+        # When the dummy adjustment method is used with a real
+        # method, whether to only use the dummy and not the real
+        # method when the gamma ramps sizes match
+
+    libgamma_dummy_configurations libgamma_dummy_internal_configurations
+    # Configurations for the dummy adjustment method
+
+
+cdef unsigned char *template_edid = NULL
+'''
+The EDID, allocated by this module, in the CRTC information template
+'''
+
+
+def libgamma_native_dummy_get_configurations() -> tuple:
+    '''
+    Get the configurations of the dummy adjustment method
+    
+    @return  :(int, int, int, int, int, int, bool, bool)  The OR of the readable CRTC information
+                                                         fields, the boolean capabilities (as
+                                                         `MethodCapabilities.__init__` takes them),
+                                                         the real adjustment method, the number of
+                                                         sites, the number of partitions per site,
+                                                         the number of CRTC:s per partition, whether
+                                                         the real ramps are inherited, and whether
+                                                         the gamma ramp size is verified
+    '''
+    cdef libgamma_dummy_configurations *conf = &libgamma_dummy_internal_configurations
+    cdef struct_libgamma_method_capabilities *caps = &conf.capabilities
+    booleans = 0
+    booleans |= (0 if caps.default_site_known            == 0 else 1) <<  0
+    booleans |= (0 if caps.multiple_sites                == 0 else 1) <<  1
+    booleans |= (0 if caps.multiple_partitions           == 0 else 1) <<  2
+    booleans |= (0 if caps.multiple_crtcs                == 0 else 1) <<  3
+    booleans |= (0 if caps.partitions_are_graphics_cards == 0 else 1) <<  4
+    booleans |= (0 if caps.site_restore                  == 0 else 1) <<  5
+    booleans |= (0 if caps.partition_restore             == 0 else 1) <<  6
+    booleans |= (0 if caps.crtc_restore                  == 0 else 1) <<  7
+    booleans |= (0 if caps.identical_gamma_sizes         == 0 else 1) <<  8
+    booleans |= (0 if caps.fixed_gamma_size              == 0 else 1) <<  9
+    booleans |= (0 if caps.fixed_gamma_depth             == 0 else 1) << 10
+    booleans |= (0 if caps.real                          == 0 else 1) << 11
+    booleans |= (0 if caps.fake                          == 0 else 1) << 12
+    return (int(caps.crtc_information), booleans, int(conf.real_method), int(conf.site_count),
+            int(conf.default_partition_count), int(conf.default_crtc_count),
+            conf.inherit_real_ramps != 0, conf.verify_gamma_size != 0)
+
+
+cdef int convert_configurations(libgamma_dummy_configurations *conf, tuple values) except -1:
+    '''
+    Convert configurations of the dummy adjustment method
+    
+    @param   conf    Output parameter for the configurations, the CRTC information template is not changed
+    @param   values  The configurations, as `libgamma_native_dummy_set_configurations` takes them
+    @return          Zero, -1 with an exception set if a value cannot be converted
+    '''
+    cdef struct_libgamma_method_capabilities *caps = &conf.capabilities
+    (crtc_information, booleans, real_method, site_count, partition_count,
+     crtc_count, inherit_real_ramps, verify_gamma_size) = values
+    caps.crtc_information              = <int32_t>crtc_information
+    caps.default_site_known            = 1 if (booleans & (1 <<  0)) else 0
+    caps.multiple_sites                = 1 if (booleans & (1 <<  1)) else 0
+    caps.multiple_partitions           = 1 if (booleans & (1 <<  2)) else 0
+    caps.multiple_crtcs                = 1 if (booleans & (1 <<  3)) else 0
+    caps.partitions_are_graphics_cards = 1 if (booleans & (1 <<  4)) else 0
+    caps.site_restore                  = 1 if (booleans & (1 <<  5)) else 0
+    caps.partition_restore             = 1 if (booleans & (1 <<  6)) else 0
+    caps.crtc_restore                  = 1 if (booleans & (1 <<  7)) else 0
+    caps.identical_gamma_sizes         = 1 if (booleans & (1 <<  8)) else 0
+    caps.fixed_gamma_size              = 1 if (booleans & (1 <<  9)) else 0
+    caps.fixed_gamma_depth             = 1 if (booleans & (1 << 10)) else 0
+    caps.real                          = 1 if (booleans & (1 << 11)) else 0
+    caps.fake                          = 1 if (booleans & (1 << 12)) else 0
+    conf.real_method             = <int>real_method
+    conf.site_count              = <size_t>site_count
+    conf.default_partition_count = <size_t>partition_count
+    conf.default_crtc_count      = <size_t>crtc_count
+    conf.inherit_real_ramps      = 1 if inherit_real_ramps else 0
+    conf.verify_gamma_size       = 1 if verify_gamma_size else 0
+    return 0
+
+
+def libgamma_native_dummy_set_configurations(crtc_information : int, booleans : int, real_method : int,
+                                             site_count : int, partition_count : int, crtc_count : int,
+                                             inherit_real_ramps : bool, verify_gamma_size : bool):
+    '''
+    Set the configurations of the dummy adjustment method,
+    nothing is changed if any value is invalid
+    
+    @param  crtc_information    The OR of the readable CRTC information fields
+    @param  booleans            The boolean capabilities, as `MethodCapabilities.__init__` takes them
+    @param  real_method         The real adjustment method, `-1` for the default method
+    @param  site_count          The number of sites
+    @param  partition_count     The number of partitions per site
+    @param  crtc_count          The number of CRTC:s per partition
+    @param  inherit_real_ramps  Whether the real ramps are inherited
+    @param  verify_gamma_size   Whether the gamma ramp size is verified
+    '''
+    cdef libgamma_dummy_configurations *live = &libgamma_dummy_internal_configurations
+    cdef libgamma_dummy_configurations conf = live[0]
+    convert_configurations(&conf, (crtc_information, booleans, real_method, site_count,
+                                   partition_count, crtc_count, inherit_real_ramps, verify_gamma_size))
+    live[0] = conf
+
+
+def libgamma_native_dummy_get_crtc_information() -> list:
+    '''
+    Get the template for the CRTC information in the dummy adjustment method
+    
+    @return  Input parameters for `CRTCInformation.__init__`
+    '''
+    cdef libgamma_crtc_information *info = &libgamma_dummy_internal_configurations.crtc_info_template
+    cdef bytes bs
+    edid = None
+    if info.edid is not NULL:
+        bs = info.edid[:info.edid_length]
+        edid = bs
+    return [edid,                          int(info.edid_error),
+            int(info.width_mm),            int(info.width_mm_error),
+            int(info.height_mm),           int(info.height_mm_error),
+            int(info.width_mm_edid),       int(info.width_mm_edid_error),
+            int(info.height_mm_edid),      int(info.height_mm_edid_error),
+            int(info.red_gamma_size),      int(info.green_gamma_size),
+            int(info.blue_gamma_size),     int(info.gamma_size_error),
+            int(info.gamma_depth),         int(info.gamma_depth_error),
+            int(info.gamma_support),       int(info.gamma_support_error),
+            int(info.subpixel_order),      int(info.subpixel_order_error),
+            int(info.active),              int(info.active_error),
+            None,                          int(info.connector_name_error),
+            int(info.connector_type),      int(info.connector_type_error),
+            float(info.gamma_red),         float(info.gamma_green),
+            float(info.gamma_blue),        int(info.gamma_error)]
+
+
+cdef int convert_crtc_information(libgamma_crtc_information *info, list data) except -1:
+    '''
+    Convert CRTC information, except the EDID
+    
+    @param   info  Output parameter for the information, the EDID is not changed
+    @param   data  The information, in the order `CRTCInformation.__init__` takes it
+    @return        Zero, -1 with an exception set if a value cannot be converted
+    '''
+    info.edid_error           = <int>data[1]
+    info.width_mm             = <size_t>data[2]
+    info.width_mm_error       = <int>data[3]
+    info.height_mm            = <size_t>data[4]
+    info.height_mm_error      = <int>data[5]
+    info.width_mm_edid        = <size_t>data[6]
+    info.width_mm_edid_error  = <int>data[7]
+    info.height_mm_edid       = <size_t>data[8]
+    info.height_mm_edid_error = <int>data[9]
+    info.red_gamma_size       = <size_t>data[10]
+    info.green_gamma_size     = <size_t>data[11]
+    info.blue_gamma_size      = <size_t>data[12]
+    info.gamma_size_error     = <int>data[13]
+    info.gamma_depth          = <signed>data[14]
+    info.gamma_depth_error    = <int>data[15]
+    info.gamma_support        = <int>data[16]
+    info.gamma_support_error  = <int>data[17]
+    info.subpixel_order       = <libgamma_subpixel_order_t>data[18]
+    info.subpixel_order_error = <int>data[19]
+    info.active               = <int>data[20]
+    info.active_error         = <int>data[21]
+    info.connector_name_error = <int>data[23]
+    info.connector_type       = <libgamma_connector_type_t>data[24]
+    info.connector_type_error = <int>data[25]
+    info.gamma_red            = <float>data[26]
+    info.gamma_green          = <float>data[27]
+    info.gamma_blue           = <float>data[28]
+    info.gamma_error          = <int>data[29]
+    return 0
+
+
+cdef int allocate_edid(object data, libgamma_crtc_information *info) except -1:
+    '''
+    Allocate a copy of an EDID
+    
+    @param   data  :bytes-like?  The EDID, `None` for none
+    @param   info  Output parameter for the EDID and its length
+    @return        Zero, -1 with an exception set on failure
+    '''
+    cdef const unsigned char *edid_data
+    cdef bytes bs
+    cdef size_t n = 0
+    info.edid = NULL
+    info.edid_length = 0
+    if data is None:
+        return 0
+    bs = bytes(data)
+    n = <size_t>len(bs)
+    info.edid = <unsigned char *>malloc(n if n > 0 else 1)
+    if info.edid is NULL:
+        raise MemoryError()
+    edid_data = bs
+    memcpy(info.edid, edid_data, n)
+    info.edid_length = n
+    return 0
+
+
+def libgamma_native_dummy_set_crtc_information(data : list):
+    '''
+    Set the template for the CRTC information in the dummy adjustment
+    method, nothing is changed if any value is invalid
+    
+    @param  data  The information, in the order `CRTCInformation.__init__` takes
+                  it; the connector name is ignored
+    '''
+    global template_edid
+    cdef libgamma_crtc_information *live = &libgamma_dummy_internal_configurations.crtc_info_template
+    cdef libgamma_crtc_information info = live[0]
+    convert_crtc_information(&info, data)
+    allocate_edid(data[0], &info)
+    live[0] = info
+    free(template_edid)
+    template_edid = info.edid
+
+
+def libgamma_native_dummy_configure(configurations : tuple, data : list):
+    '''
+    Set the configurations and the template for the CRTC information in the
+    dummy adjustment method at once, nothing is changed if any value is invalid
+    
+    @param  configurations  The configurations, as `libgamma_native_dummy_set_configurations` takes them
+    @param  data            The information, as `libgamma_native_dummy_set_crtc_information` takes it
+    '''
+    global template_edid
+    cdef libgamma_dummy_configurations *live = &libgamma_dummy_internal_configurations
+    cdef libgamma_dummy_configurations conf = live[0]
+    convert_configurations(&conf, tuple(configurations))
+    convert_crtc_information(&conf.crtc_info_template, data)
+    allocate_edid(data[0], &conf.crtc_info_template)
+    live[0] = conf
+    free(template_edid)
+    template_edid = conf.crtc_info_template.edid
@@ -2,6 +2,7 @@
 # See LICENSE file for copyright and license details.
 cimport cython
 
+from libc.errno cimport errno
 from posix.unistd cimport gid_t
 from libc.string cimport strerror as c_strerror
 
@@ -186,3 +187,12 @@ def strerror(error : int) -> str:
     text = c_strerror(<int>error)
     bs = text
     return bs.decode('utf-8', 'strict')
+
+
+def libgamma_native_errno() -> int:
+    '''
+    Get the current value of `errno`
+    
+    @return  The current value of `errno`
+    '''
+    return int(errno)
@@ -2,6 +2,7 @@
 # See LICENSE file for copyright and license details.
 cimport cython
 
+from libc.errno cimport errno
 
 cdef extern short libgamma_group_gid
 '''
@@ -165,3 +166,11 @@ def libgamma_native_value_of_error(name : str) -> int:
     bs = name.encode('utf-8') + bytes([0])
     return int(libgamma_value_of_error(bs))
 
+
+def libgamma_native_errno() -> int:
+    '''
+    Get the current value of `errno`
+    
+    @return  The current value of `errno`
+    '''
+    return int(errno)
@@ -711,18 +711,15 @@ def libgamma_native_list_methods(operation : int) -> list:
                          Other values invoke undefined behaviour
     @return  :list<int>  A list of available adjustment methods
     '''
-    cdef int *methods
+    cdef int buf[16]
+    cdef int *methods = buf
     cdef size_t buf_size
     cdef size_t r, r2
-    buf_size = 6
-    methods = <int *>malloc(buf_size * sizeof(size_t))
-    if methods == NULL:
-        raise MemoryError()
+    buf_size = 16
     r = libgamma_list_methods(methods, buf_size, operation)
     if r > buf_size:
         buf_size = r
-        free(methods)
-        methods = <int *>malloc(buf_size * sizeof(size_t))
+        methods = <int *>malloc(buf_size * sizeof(int))
         if methods == NULL:
             raise MemoryError()
         r2 = libgamma_list_methods(methods, buf_size, operation)
@@ -731,7 +728,8 @@ def libgamma_native_list_methods(operation : int) -> list:
     rc = []
     for i in range(r):
         rc.append(methods[i])
-    free(methods)
+    if not methods == buf:
+        free(methods)
     return rc
 
 
@@ -754,9 +752,10 @@ def libgamma_native_method_capabilities(method : int) -> tuple:
     @return  :(int, int)  Input parameters for `MethodCapabilities.__init__`
     '''
     cdef struct_libgamma_method_capabilities caps
-    r = int(libgamma_method_capabilities(&caps, sizeof(struct_libgamma_method_capabilities), <int>method))
+    cdef int r
+    r = libgamma_method_capabilities(&caps, sizeof(struct_libgamma_method_capabilities), <int>method)
     if not r == 0:
-        return (0, int(errno) if r == -1 else r)
+        return (0, int(errno) if r == -1 else int(r))
     booleans = 0
     crtc_information = int(caps.crtc_information)
     booleans |= (0 if caps.default_site_known            == 0 else 1) <<  0
@@ -831,6 +830,8 @@ def libgamma_native_site_create(method : int, site : str | NoneType) -> tuple:
     cdef libgamma_site_state *this
     cdef char *site_
     cdef size_t this_address
+    cdef int method_ = method
+    cdef int r
     this = <libgamma_site_state *>malloc(sizeof(libgamma_site_state))
     if this is NULL:
         raise MemoryError()
@@ -844,10 +845,14 @@ def libgamma_native_site_create(method : int, site : str | NoneType) -> tuple:
             raise MemoryError()
         for i in range(len(site_bs)):
             site_[i] = <char>(site_bs[i])
-    r = int(libgamma_site_initialise(this, <int>method, site_))
+    # The GIL is released as connecting to a display server can take long
+    with nogil:
+        r = libgamma_site_initialise(this, method_, site_)
+        if r == -1:
+            r = errno
     if not r == 0:
         libgamma_site_free(this)
-        return (0, int(errno) if r == -1 else r)
+        return (0, int(r))
     return (int(this_address), int(this.partitions_available))
 
 
@@ -875,10 +880,13 @@ def libgamma_native_site_restore(this : int) -> int:
     '''
     cdef size_t this_address
     cdef libgamma_site_state *this_
+    cdef int r
     this_address = <size_t>this
     this_ = <libgamma_site_state *><void *>this_address
-    r = int(libgamma_site_restore(this_))
-    return int(errno) if r == -1 else r
+    r = libgamma_site_restore(this_)
+    if r == -1:
+        r = errno
+    return int(r)
 
 
 def libgamma_native_partition_create(site : int, partition : int) -> tuple:
@@ -896,16 +904,22 @@ def libgamma_native_partition_create(site : int, partition : int) -> tuple:
     cdef libgamma_site_state *site_
     cdef size_t this_address
     cdef size_t site_address
+    cdef size_t partition_
+    cdef int r
     site_address = <size_t>site
     site_ = <libgamma_site_state *><void *>site_address
     this = <libgamma_partition_state *>malloc(sizeof(libgamma_partition_state))
     if this is NULL:
         raise MemoryError()
     this_address = <size_t><void *>this
-    r = int(libgamma_partition_initialise(this, site_, <size_t>partition))
+    partition_ = <size_t>partition
+    with nogil:
+        r = libgamma_partition_initialise(this, site_, partition_)
+        if r == -1:
+            r = errno
     if not r == 0:
         libgamma_partition_free(this)
-        return (0, int(errno) if r == -1 else r)
+        return (0, int(r))
     return (int(this_address), int(this.crtcs_available))
 
 
@@ -933,10 +947,13 @@ def libgamma_native_partition_restore(this : int) -> int:
     '''
     cdef size_t this_address
     cdef libgamma_partition_state *this_
+    cdef int r
     this_address = <size_t>this
     this_ = <libgamma_partition_state *><void *>this_address
-    r = int(libgamma_partition_restore(this_))
-    return int(errno) if r == -1 else r
+    r = libgamma_partition_restore(this_)
+    if r == -1:
+        r = errno
+    return int(r)
 
 
 def libgamma_native_crtc_create(partition : int, crtc : int) -> tuple:
@@ -953,16 +970,22 @@ def libgamma_native_crtc_create(partition : int, crtc : int) -> tuple:
     cdef libgamma_partition_state *partition_
     cdef size_t this_address
     cdef size_t partition_address
+    cdef size_t crtc_
+    cdef int r
     partition_address = <size_t>partition
     partition_ = <libgamma_partition_state *><void *>partition_address
     this = <libgamma_crtc_state *>malloc(sizeof(libgamma_crtc_state))
     if this is NULL:
         raise MemoryError()
     this_address = <size_t><void *>this
-    r = int(libgamma_crtc_initialise(this, partition_, <size_t>crtc))
+    crtc_ = <size_t>crtc
+    with nogil:
+        r = libgamma_crtc_initialise(this, partition_, crtc_)
+        if r == -1:
+            r = errno
     if not r == 0:
         libgamma_crtc_free(this)
-        return (0, int(errno) if r == -1 else r)
+        return (0, int(r))
     return (int(this_address), 0)
 
 
@@ -990,10 +1013,13 @@ def libgamma_native_crtc_restore(this : int) -> int:
     '''
     cdef size_t this_address
     cdef libgamma_crtc_state *this_
+    cdef int r
     this_address = <size_t>this
     this_ = <libgamma_crtc_state *><void *>this_address
-    r = int(libgamma_crtc_restore(this_))
-    return int(errno) if r == -1 else r
+    r = libgamma_crtc_restore(this_)
+    if r == -1:
+        r = errno
+    return int(r)
 
 
 def libgamma_native_get_crtc_information(crtc : int, fields : int) -> tuple:
@@ -1069,12 +1095,15 @@ def libgamma_native_crtc_get_gamma_ramps8(this : int, ramps : int) -> int:
     cdef size_t ramps_address
     cdef libgamma_crtc_state *this_
     cdef libgamma_gamma_ramps8 *ramps_
+    cdef int r
     this_address = <size_t>this
     ramps_address = <size_t>ramps
     this_ = <libgamma_crtc_state *><void *>this_address
     ramps_ = <libgamma_gamma_ramps8 *><void *>ramps_address
-    r = int(libgamma_crtc_get_gamma_ramps8(this_, ramps_))
-    return int(errno) if r == -1 else r
+    r = libgamma_crtc_get_gamma_ramps8(this_, ramps_)
+    if r == -1:
+        r = errno
+    return int(r)
 
 
 def libgamma_native_crtc_set_gamma_ramps8(this : int, ramps : int) -> int:
@@ -1090,12 +1119,15 @@ def libgamma_native_crtc_set_gamma_ramps8(this : int, ramps : int) -> int:
     cdef size_t ramps_address
     cdef libgamma_crtc_state *this_
     cdef libgamma_gamma_ramps8 *ramps_
+    cdef int r
     this_address = <size_t>this
     ramps_address = <size_t>ramps
     this_ = <libgamma_crtc_state *><void *>this_address
     ramps_ = <libgamma_gamma_ramps8 *><void *>ramps_address
-    r = int(libgamma_crtc_set_gamma_ramps8(this_, ramps_))
-    return int(errno) if r == -1 else r
+    r = libgamma_crtc_set_gamma_ramps8(this_, ramps_)
+    if r == -1:
+        r = errno
+    return int(r)
 
 
 def libgamma_native_crtc_get_gamma_ramps16(this : int, ramps : int) -> int:
@@ -1111,12 +1143,15 @@ def libgamma_native_crtc_get_gamma_ramps16(this : int, ramps : int) -> int:
     cdef size_t ramps_address
     cdef libgamma_crtc_state *this_
     cdef libgamma_gamma_ramps16 *ramps_
+    cdef int r
     this_address = <size_t>this
     ramps_address = <size_t>ramps
     this_ = <libgamma_crtc_state *><void *>this_address
     ramps_ = <libgamma_gamma_ramps16 *><void *>ramps_address
-    r = int(libgamma_crtc_get_gamma_ramps16(this_, ramps_))
-    return int(errno) if r == -1 else r
+    r = libgamma_crtc_get_gamma_ramps16(this_, ramps_)
+    if r == -1:
+        r = errno
+    return int(r)
 
 
 def libgamma_native_crtc_set_gamma_ramps16(this : int, ramps : int) -> int:
@@ -1132,12 +1167,15 @@ def libgamma_native_crtc_set_gamma_ramps16(this : int, ramps : int) -> int:
     cdef size_t ramps_address
     cdef libgamma_crtc_state *this_
     cdef libgamma_gamma_ramps16 *ramps_
+    cdef int r
     this_address = <size_t>this
     ramps_address = <size_t>ramps
     this_ = <libgamma_crtc_state *><void *>this_address
     ramps_ = <libgamma_gamma_ramps16 *><void *>ramps_address
-    r = int(libgamma_crtc_set_gamma_ramps16(this_, ramps_))
-    return int(errno) if r == -1 else r
+    r = libgamma_crtc_set_gamma_ramps16(this_, ramps_)
+    if r == -1:
+        r = errno
+    return int(r)
 
 
 def libgamma_native_crtc_get_gamma_ramps32(this : int, ramps : int) -> int:
@@ -1153,12 +1191,15 @@ def libgamma_native_crtc_get_gamma_ramps32(this : int, ramps : int) -> int:
     cdef size_t ramps_address
     cdef libgamma_crtc_state *this_
     cdef libgamma_gamma_ramps32 *ramps_
+    cdef int r
     this_address = <size_t>this
     ramps_address = <size_t>ramps
     this_ = <libgamma_crtc_state *><void *>this_address
     ramps_ = <libgamma_gamma_ramps32 *><void *>ramps_address
-    r = int(libgamma_crtc_get_gamma_ramps32(this_, ramps_))
-    return int(errno) if r == -1 else r
+    r = libgamma_crtc_get_gamma_ramps32(this_, ramps_)
+    if r == -1:
+        r = errno
+    return int(r)
 
 
 def libgamma_native_crtc_set_gamma_ramps32(this : int, ramps : int) -> int:
@@ -1174,12 +1215,15 @@ def libgamma_native_crtc_set_gamma_ramps32(this : int, ramps : int) -> int:
     cdef size_t ramps_address
     cdef libgamma_crtc_state *this_
     cdef libgamma_gamma_ramps32 *ramps_
+    cdef int r
     this_address = <size_t>this
     ramps_address = <size_t>ramps
     this_ = <libgamma_crtc_state *><void *>this_address
     ramps_ = <libgamma_gamma_ramps32 *><void *>ramps_address
-    r = int(libgamma_crtc_set_gamma_ramps32(this_, ramps_))
-    return int(errno) if r == -1 else r
+    r = libgamma_crtc_set_gamma_ramps32(this_, ramps_)
+    if r == -1:
+        r = errno
+    return int(r)
 
 
 def libgamma_native_crtc_get_gamma_ramps64(this : int, ramps : int) -> int:
@@ -1195,12 +1239,15 @@ def libgamma_native_crtc_get_gamma_ramps64(this : int, ramps : int) -> int:
     cdef size_t ramps_address
     cdef libgamma_crtc_state *this_
     cdef libgamma_gamma_ramps64 *ramps_
+    cdef int r
     this_address = <size_t>this
     ramps_address = <size_t>ramps
     this_ = <libgamma_crtc_state *><void *>this_address
     ramps_ = <libgamma_gamma_ramps64 *><void *>ramps_address
-    r = int(libgamma_crtc_get_gamma_ramps64(this_, ramps_))
-    return int(errno) if r == -1 else r
+    r = libgamma_crtc_get_gamma_ramps64(this_, ramps_)
+    if r == -1:
+        r = errno
+    return int(r)
 
 
 def libgamma_native_crtc_set_gamma_ramps64(this : int, ramps : int) -> int:
@@ -1216,12 +1263,15 @@ def libgamma_native_crtc_set_gamma_ramps64(this : int, ramps : int) -> int:
     cdef size_t ramps_address
     cdef libgamma_crtc_state * this_
     cdef libgamma_gamma_ramps64 * ramps_
+    cdef int r
     this_address = <size_t>this
     ramps_address = <size_t>ramps
     this_ = <libgamma_crtc_state *><void *>this_address
     ramps_ = <libgamma_gamma_ramps64 *><void *>ramps_address
-    r = int(libgamma_crtc_set_gamma_ramps64(this_, ramps_))
-    return int(errno) if r == -1 else r
+    r = libgamma_crtc_set_gamma_ramps64(this_, ramps_)
+    if r == -1:
+        r = errno
+    return int(r)
 
 
 def libgamma_native_crtc_get_gamma_rampsf(this : int, ramps : int) -> int:
@@ -1237,12 +1287,15 @@ def libgamma_native_crtc_get_gamma_rampsf(this : int, ramps : int) -> int:
     cdef size_t ramps_address
     cdef libgamma_crtc_state *this_
     cdef libgamma_gamma_rampsf *ramps_
+    cdef int r
     this_address = <size_t>this
     ramps_address = <size_t>ramps
     this_ = <libgamma_crtc_state *><void *>this_address
     ramps_ = <libgamma_gamma_rampsf *><void *>ramps_address
-    r = int(libgamma_crtc_get_gamma_rampsf(this_, ramps_))
-    return int(errno) if r == -1 else r
+    r = libgamma_crtc_get_gamma_rampsf(this_, ramps_)
+    if r == -1:
+        r = errno
+    return int(r)
 
 
 def libgamma_native_crtc_set_gamma_rampsf(this : int, ramps : int) -> int:
@@ -1258,12 +1311,15 @@ def libgamma_native_crtc_set_gamma_rampsf(this : int, ramps : int) -> int:
     cdef size_t ramps_address
     cdef libgamma_crtc_state *this_
     cdef libgamma_gamma_rampsf *ramps_
+    cdef int r
     this_address = <size_t>this
     ramps_address = <size_t>ramps
     this_ = <libgamma_crtc_state *><void *>this_address
     ramps_ = <libgamma_gamma_rampsf *><void *>ramps_address
-    r = int(libgamma_crtc_set_gamma_rampsf(this_, ramps_))
-    return int(errno) if r == -1 else r
+    r = libgamma_crtc_set_gamma_rampsf(this_, ramps_)
+    if r == -1:
+        r = errno
+    return int(r)
 
 
 def libgamma_native_crtc_get_gamma_rampsd(this : int, ramps : int) -> int:
@@ -1279,12 +1335,15 @@ def libgamma_native_crtc_get_gamma_rampsd(this : int, ramps : int) -> int:
     cdef size_t ramps_address
     cdef libgamma_crtc_state *this_
     cdef libgamma_gamma_rampsd *ramps_
+    cdef int r
     this_address = <size_t>this
     ramps_address = <size_t>ramps
     this_ = <libgamma_crtc_state *><void *>this_address
     ramps_ = <libgamma_gamma_rampsd *><void *>ramps_address
-    r = int(libgamma_crtc_get_gamma_rampsd(this_, ramps_))
-    return int(errno) if r == -1 else r
+    r = libgamma_crtc_get_gamma_rampsd(this_, ramps_)
+    if r == -1:
+        r = errno
+    return int(r)
 
 
 def libgamma_native_crtc_set_gamma_rampsd(this : int, ramps : int) -> int:
@@ -1300,9 +1359,23 @@ def libgamma_native_crtc_set_gamma_rampsd(this : int, ramps : int) -> int:
     cdef size_t ramps_address
     cdef libgamma_crtc_state *this_
     cdef libgamma_gamma_rampsd *ramps_
+    cdef int r
     this_address = <size_t>this
     ramps_address = <size_t>ramps
     this_ = <libgamma_crtc_state *><void *>this_address
     ramps_ = <libgamma_gamma_rampsd *><void *>ramps_address
-    r = int(libgamma_crtc_set_gamma_rampsd(this_, ramps_))
-    return int(errno) if r == -1 else r
+    r = libgamma_crtc_set_gamma_rampsd(this_, ramps_)
+    if r == -1:
+        r = errno
+    return int(r)
+
+
+def libgamma_native_state_sizes() -> tuple:
+    '''
+    Get the amount of memory used by state structures
+    
+    @return  :(int, int, int)  The size of a site state, a partition state, and a CRTC state,
+                               not including memory allocated by the adjustment method
+    '''
+    return (int(sizeof(libgamma_site_state)), int(sizeof(libgamma_partition_state)),
+            int(sizeof(libgamma_crtc_state)))
@@ -3,7 +3,9 @@
 cimport cython
 
 from libc.stdint cimport *
-from libc.stdlib cimport malloc
+from libc.stdlib cimport malloc, free
+from libc.string cimport memcpy, memcmp
+from libc.math cimport log, pow, sqrt, INFINITY
 from libc.stddef cimport size_t
 from libc.errno cimport errno
 
@@ -213,13 +215,16 @@ def libgamma_native_gamma_ramps8_create(red_size : int, green_size : int, blue_s
     cdef void *allocation = malloc(sizeof(libgamma_gamma_ramps8))
     cdef libgamma_gamma_ramps8 *item = <libgamma_gamma_ramps8 *>allocation
     cdef size_t red, green, blue
+    cdef int saved_errno
     if item is NULL:
         return int(errno)
     item.red_size   = red_size
     item.green_size = green_size
     item.blue_size  = blue_size
     if libgamma_gamma_ramps8_initialise(item) < 0:
-        return int(errno)
+        saved_errno = errno
+        free(allocation)
+        return int(saved_errno)
     red   = <size_t><void *>(item.red)
     green = <size_t><void *>(item.green)
     blue  = <size_t><void *>(item.blue)
@@ -283,13 +288,16 @@ def libgamma_native_gamma_ramps16_create(red_size : int, green_size : int, blue_
     cdef void *allocation = malloc(sizeof(libgamma_gamma_ramps16))
     cdef libgamma_gamma_ramps16 *item = <libgamma_gamma_ramps16 *>allocation
     cdef size_t red, green, blue
+    cdef int saved_errno
     if item is NULL:
         return int(errno)
     item.red_size   = red_size
     item.green_size = green_size
     item.blue_size  = blue_size
     if libgamma_gamma_ramps16_initialise(item) < 0:
-        return int(errno)
+        saved_errno = errno
+        free(allocation)
+        return int(saved_errno)
     red   = <size_t><void *>(item.red)
     green = <size_t><void *>(item.green)
     blue  = <size_t><void *>(item.blue)
@@ -353,13 +361,16 @@ def libgamma_native_gamma_ramps32_create(red_size : int, green_size : int, blue_
     cdef void *allocation = malloc(sizeof(libgamma_gamma_ramps32))
     cdef libgamma_gamma_ramps32 *item = <libgamma_gamma_ramps32 *>allocation
     cdef size_t red, green, blue
+    cdef int saved_errno
     if item is NULL:
         return int(errno)
     item.red_size   = red_size
     item.green_size = green_size
     item.blue_size  = blue_size
     if libgamma_gamma_ramps32_initialise(item) < 0:
-        return int(errno)
+        saved_errno = errno
+        free(allocation)
+        return int(saved_errno)
     red   = <size_t><void *>(item.red)
     green = <size_t><void *>(item.green)
     blue  = <size_t><void *>(item.blue)
@@ -423,13 +434,16 @@ def libgamma_native_gamma_ramps64_create(red_size : int, green_size : int, blue_
     cdef void *allocation = malloc(sizeof(libgamma_gamma_ramps64))
     cdef libgamma_gamma_ramps64 *item = <libgamma_gamma_ramps64 *>allocation
     cdef size_t red, green, blue
+    cdef int saved_errno
     if item is NULL:
         return int(errno)
     item.red_size   = red_size
     item.green_size = green_size
     item.blue_size  = blue_size
     if libgamma_gamma_ramps64_initialise(item) < 0:
-        return int(errno)
+        saved_errno = errno
+        free(allocation)
+        return int(saved_errno)
     red   = <size_t><void *>(item.red)
     green = <size_t><void *>(item.green)
     blue  = <size_t><void *>(item.blue)
@@ -493,13 +507,16 @@ def libgamma_native_gamma_rampsf_create(red_size : int, green_size : int, blue_s
     cdef void *allocation = malloc(sizeof(libgamma_gamma_rampsf))
     cdef libgamma_gamma_rampsf *item = <libgamma_gamma_rampsf *>allocation
     cdef size_t red, green, blue
+    cdef int saved_errno
     if item is NULL:
         return int(errno)
     item.red_size   = red_size
     item.green_size = green_size
     item.blue_size  = blue_size
     if libgamma_gamma_rampsf_initialise(item) < 0:
-        return int(errno)
+        saved_errno = errno
+        free(allocation)
+        return int(saved_errno)
     red   = <size_t><void *>(item.red)
     green = <size_t><void *>(item.green)
     blue  = <size_t><void *>(item.blue)
@@ -563,13 +580,16 @@ def libgamma_native_gamma_rampsd_create(red_size : int, green_size : int, blue_s
     cdef void *allocation = malloc(sizeof(libgamma_gamma_rampsd))
     cdef libgamma_gamma_rampsd *item = <libgamma_gamma_rampsd *>allocation
     cdef size_t red, green, blue
+    cdef int saved_errno
     if item is NULL:
         return int(errno)
     item.red_size   = red_size
     item.green_size = green_size
     item.blue_size  = blue_size
     if libgamma_gamma_rampsd_initialise(item) < 0:
-        return int(errno)
+        saved_errno = errno
+        free(allocation)
+        return int(saved_errno)
     red   = <size_t><void *>(item.red)
     green = <size_t><void *>(item.green)
     blue  = <size_t><void *>(item.blue)
@@ -614,3 +634,792 @@ def libgamma_native_gamma_rampsd_set(this : int, index : int, value : float):
     cdef void *address = <void *><size_t>this
     cdef double *ramp = <double *>address
     ramp[<size_t>index] = <double>value
+
+
+def libgamma_native_gamma_ramps_sizes() -> dict:
+    '''
+    Get the amount of memory used by gamma ramp structures
+    
+    @return  :dict<int, (int, int)>  By depth: the size of the gamma ramp
+                                     structure, and the size of each stop
+    '''
+    return {  8 : (int(sizeof(libgamma_gamma_ramps8)),  int(sizeof(uint8_t))),
+             16 : (int(sizeof(libgamma_gamma_ramps16)), int(sizeof(uint16_t))),
+             32 : (int(sizeof(libgamma_gamma_ramps32)), int(sizeof(uint32_t))),
+             64 : (int(sizeof(libgamma_gamma_ramps64)), int(sizeof(uint64_t))),
+             -1 : (int(sizeof(libgamma_gamma_rampsf)),  int(sizeof(float))),
+             -2 : (int(sizeof(libgamma_gamma_rampsd)),  int(sizeof(double))) }
+
+
+def libgamma_native_gamma_ramp_read(this : int, size : int) -> bytes:
+    '''
+    Copy the stops of a gamma ramp into a byte string
+    
+    @param   this  The gamma ramp
+    @param   size  The number of bytes to copy
+    @return        The stops, in the machine's byte order
+    '''
+    cdef char *address = <char *><void *><size_t>this
+    return address[:<size_t>size]
+
+
+def libgamma_native_gamma_ramp_write(this : int, data, offset : int, size : int):
+    '''
+    Copy the stops of a gamma ramp from a buffer
+    
+    @param  this    The gamma ramp
+    @param  data    :bytes-like  The stops, in the machine's byte order
+    @param  offset  The index of the first byte in `data` to copy
+    @param  size    The number of bytes to copy
+    '''
+    cdef const unsigned char[::1] view = data
+    cdef void *address = <void *><size_t>this
+    if offset < 0 or size < 0 or offset + size > view.shape[0]:
+        raise ValueError('buffer too small')
+    if size > 0:
+        memcpy(address, &view[<size_t>offset], <size_t>size)
+
+
+def libgamma_native_gamma_ramp_copy(this : int, source : int, size : int):
+    '''
+    Copy the stops of a gamma ramp to another gamma ramp
+    
+    @param  this    The gamma ramp to copy to
+    @param  source  The gamma ramp to copy from
+    @param  size    The number of bytes to copy
+    '''
+    if size > 0:
+        memcpy(<void *><size_t>this, <void *><size_t>source, <size_t>size)
+
+
+cdef extern from *:
+    """
+    #include <stdint.h>
+    static inline uint64_t libgamma_native_load_acquire(uint64_t *p) { return __atomic_load_n(p, __ATOMIC_ACQUIRE); }
+    static inline void libgamma_native_store_release(uint64_t *p, uint64_t v) { __atomic_store_n(p, v, __ATOMIC_RELEASE); }
+    """
+    uint64_t libgamma_native_load_acquire(uint64_t *p) nogil
+    void libgamma_native_store_release(uint64_t *p, uint64_t v) nogil
+
+
+def libgamma_native_buffer_address(data) -> tuple:
+    '''
+    Get the address of a writable buffer
+    
+    @param   data  :bytes-like  The buffer, it must be C-contiguous
+    @return        :(int, int)  The address of the first byte, and the number of bytes
+    '''
+    cdef unsigned char[::1] view = data
+    if view.shape[0] == 0:
+        return (0, 0)
+    return (int(<size_t><void *>&view[0]), int(view.shape[0]))
+
+
+def libgamma_native_gamma_ramps_wrap(depth : int, this : int, red_size : int, green_size : int, blue_size : int):
+    '''
+    Create a gamma ramp structure for stops stored in memory not allocated
+    by this library, the gamma ramps for the red, green, and blue channels
+    are contiguous, in that order
+    
+    @param   depth          The depth of the gamma ramps
+    @param   this           The address of the first stop of the red gamma ramp
+    @param   red_size       The size of the gamma ramp for the red channel
+    @param   green_size     The size of the gamma ramp for the green channel
+    @param   blue_size      The size of the gamma ramp for the blue channel
+    @return  :(int){4}|int  The tuple that describes the created data, `errno` on failure:
+                              Element 1:  The address of the gamma ramp structure
+                              Element 2:  The address of the gamma ramp for the red channel
+                              Element 3:  The address of the gamma ramp for the green channel
+                              Element 4:  The address of the gamma ramp for the blue channel
+    '''
+    cdef size_t stop
+    cdef size_t red = <size_t>this
+    cdef size_t green, blue
+    cdef void *allocation
+    cdef libgamma_gamma_ramps8 *item
+    if   depth ==  8:  stop = sizeof(uint8_t)
+    elif depth == 16:  stop = sizeof(uint16_t)
+    elif depth == 32:  stop = sizeof(uint32_t)
+    elif depth == 64:  stop = sizeof(uint64_t)
+    elif depth == -1:  stop = sizeof(float)
+    else:              stop = sizeof(double)
+    green = red + <size_t>red_size * stop
+    blue = green + <size_t>green_size * stop
+    # All gamma ramp structures have the same layout, only the type of the stops differ
+    allocation = malloc(sizeof(libgamma_gamma_ramps8))
+    if allocation is NULL:
+        return int(errno)
+    item = <libgamma_gamma_ramps8 *>allocation
+    item.red_size   = red_size
+    item.green_size = green_size
+    item.blue_size  = blue_size
+    item.red   = <uint8_t *><void *>red
+    item.green = <uint8_t *><void *>green
+    item.blue  = <uint8_t *><void *>blue
+    return (int(<size_t>allocation), int(red), int(green), int(blue))
+
+
+def libgamma_native_gamma_ramps_unwrap(this : int):
+    '''
+    Release a gamma ramp structure created by `libgamma_native_gamma_ramps_wrap`,
+    the memory of the stops is not released
+    
+    @param  this  The gamma ramps
+    '''
+    free(<void *><size_t>this)
+
+
+def libgamma_native_sequence_load(this : int) -> int:
+    '''
+    Read a 64-bit counter, no memory access after
+    this can be performed before the counter is read
+    
+    @param   this  The address of the counter, it must be aligned to 8 bytes
+    @return        The value of the counter
+    '''
+    return int(libgamma_native_load_acquire(<uint64_t *><void *><size_t>this))
+
+
+def libgamma_native_sequence_store(this : int, value : int):
+    '''
+    Write a 64-bit counter, no memory access before
+    this can be performed after the counter is written
+    
+    @param  this   The address of the counter, it must be aligned to 8 bytes
+    @param  value  The new value of the counter
+    '''
+    libgamma_native_store_release(<uint64_t *><void *><size_t>this, <uint64_t>value)
+
+
+ctypedef fused stop_t:
+    uint8_t
+    uint16_t
+    uint32_t
+    uint64_t
+    float
+    double
+
+
+cdef void estimate_gamma(const stop_t *ramp, size_t n, double maximum, double *out) noexcept nogil:
+    '''
+    Estimate the gamma, black level and white level of a gamma ramp,
+    the black and white levels are the first and last stops, and the
+    gamma is fitted with least squares in log-log space
+    
+    @param  ramp     The gamma ramp
+    @param  n        The number of stops in the gamma ramp
+    @param  maximum  The value of a stop that represents full intensity
+    @param  out      Output array for the gamma, the black level, the white level, and the
+                     root-mean-square error of the estimated curve; the levels and error are
+                     relative to `maximum`
+    '''
+    cdef double black, white, span, x, y, z, lx, sxx = 0, sxz = 0, gamma = 1, e, error = 0
+    cdef double last = <double>(n - 1)
+    cdef size_t i
+    if n == 0:
+        out[0] = 1
+        out[1] = out[2] = out[3] = 0
+        return
+    black = <double>ramp[0] / maximum
+    white = <double>ramp[n - 1] / maximum
+    span = white - black
+    if not span == 0:
+        for i in range(1, n - 1):
+            z = (<double>ramp[i] / maximum - black) / span
+            if 0 < z < 1:
+                lx = log(<double>i / last)
+                sxx += lx * lx
+                sxz += lx * log(z)
+    if sxx > 0:
+        gamma = sxz / sxx
+    for i in range(n):
+        x = <double>i / last if n > 1 else 0
+        y = <double>ramp[i] / maximum
+        e = black + span * pow(x, gamma) - y
+        error += e * e
+    out[0] = gamma
+    out[1] = black
+    out[2] = white
+    out[3] = sqrt(error / <double>n)
+
+
+def libgamma_native_gamma_ramp_estimate(this : int, size : int, depth : int) -> tuple:
+    '''
+    Estimate the gamma, black level and white level of a gamma ramp
+    
+    @param   this   The gamma ramp
+    @param   size   The number of stops in the gamma ramp
+    @param   depth  The depth of the gamma ramp
+    @return         :(float, float, float, float)  The gamma, the black level, the white level,
+                                                   and the root-mean-square error of the estimate;
+                                                   the levels and error are in [0, 1] scale
+    '''
+    cdef void *address = <void *><size_t>this
+    cdef size_t n = <size_t>size
+    cdef double out[4]
+    with nogil:
+        if   depth ==  8:  estimate_gamma(<uint8_t *>address,  n, <double>UINT8_MAX,  out)
+        elif depth == 16:  estimate_gamma(<uint16_t *>address, n, <double>UINT16_MAX, out)
+        elif depth == 32:  estimate_gamma(<uint32_t *>address, n, <double>UINT32_MAX, out)
+        elif depth == 64:  estimate_gamma(<uint64_t *>address, n, <double>UINT64_MAX, out)
+        elif depth == -1:  estimate_gamma(<float *>address,    n, 1.0, out)
+        else:              estimate_gamma(<double *>address,   n, 1.0, out)
+    return (float(out[0]), float(out[1]), float(out[2]), float(out[3]))
+
+
+cdef size_t compress_ramp(const stop_t *ramp, size_t n, double maximum, double tolerance,
+                          double *xs, double *ys) noexcept nogil:
+    '''
+    Approximate a gamma ramp with a piecewise linear curve, greedily making each
+    segment as long as possible while keeping it within the tolerance of all
+    stops it covers
+    
+    @param   ramp       The gamma ramp
+    @param   n          The number of stops in the gamma ramp, at least 1
+    @param   maximum    The value of a stop that represents full intensity
+    @param   tolerance  The greatest allowed error, relative to `maximum`
+    @param   xs         Output array, with room for `n` elements, for the indices
+                        of the stops where the segments start and end
+    @param   ys         Output array, with room for `n` elements, for the values,
+                        relative to `maximum`, of the curve at the indices in `xs`
+    @return             The number of control points written to `xs` and `ys`
+    '''
+    cdef size_t k = 1, anchor = 0, i = 1
+    cdef double ya = <double>ramp[0] / maximum
+    cdef double lo = -INFINITY, hi = INFINITY, new_lo, new_hi, dx, slope
+    xs[0] = 0
+    ys[0] = ya
+    while i < n:
+        dx = <double>(i - anchor)
+        new_lo = max(lo, (<double>ramp[i] / maximum - tolerance - ya) / dx)
+        new_hi = min(hi, (<double>ramp[i] / maximum + tolerance - ya) / dx)
+        if new_lo > new_hi and i == anchor + 1:
+            # Not even the adjacent stop is within the tolerance, which
+            # can only happen if the tolerance is negative, so take it as is
+            anchor = i
+            ya = <double>ramp[i] / maximum
+            xs[k] = <double>anchor
+            ys[k] = ya
+            k += 1
+            i += 1
+            continue
+        if new_lo > new_hi:
+            # End the segment at the previous stop, with a slope that keeps it
+            # within the tolerance of all its stops, and start a new segment there
+            dx = <double>(i - 1 - anchor)
+            slope = min(max((<double>ramp[i - 1] / maximum - ya) / dx, lo), hi)
+            anchor = i - 1
+            ya += slope * dx
+            xs[k] = <double>anchor
+            ys[k] = ya
+            k += 1
+            lo = -INFINITY
+            hi = INFINITY
+            continue
+        lo = new_lo
+        hi = new_hi
+        i += 1
+    if not anchor == n - 1:
+        dx = <double>(n - 1 - anchor)
+        slope = min(max((<double>ramp[n - 1] / maximum - ya) / dx, lo), hi)
+        xs[k] = <double>(n - 1)
+        ys[k] = ya + slope * dx
+        k += 1
+    return k
+
+
+cdef void expand_ramp(stop_t *ramp, size_t n, double maximum,
+                      const double *xs, const double *ys, size_t k) noexcept nogil:
+    '''
+    Evaluate a piecewise linear curve at evenly spaced points
+    
+    @param  ramp     The gamma ramp to fill
+    @param  n        The number of stops in the gamma ramp
+    @param  maximum  The value of a stop that represents full intensity
+    @param  xs       The positions, in [0, 1] and in ascending order, of the control points
+    @param  ys       The values, relative to `maximum`, of the control points
+    @param  k        The number of control points, at least 1
+    '''
+    cdef size_t i, j = 0
+    cdef double x, y, last = <double>(n - 1) if n > 1 else 1
+    for i in range(n):
+        x = <double>i / last
+        while j + 2 < k and xs[j + 1] < x:
+            j += 1
+        if k == 1 or xs[j + 1] == xs[j]:
+            y = ys[j]
+        else:
+            y = ys[j] + (ys[j + 1] - ys[j]) * (x - xs[j]) / (xs[j + 1] - xs[j])
+        if stop_t is float or stop_t is double:
+            ramp[i] = <stop_t>y
+        elif y <= 0:
+            ramp[i] = 0
+        elif y >= 1:
+            ramp[i] = ~(<stop_t>0)
+        else:
+            ramp[i] = <stop_t>(y * maximum + 0.5)
+
+
+def libgamma_native_gamma_ramp_compress(this : int, size : int, depth : int, tolerance : float) -> tuple:
+    '''
+    Approximate a gamma ramp with a piecewise linear curve
+    
+    @param   this       The gamma ramp
+    @param   size       The number of stops in the gamma ramp
+    @param   depth      The depth of the gamma ramp
+    @param   tolerance  The greatest allowed error, in [0, 1] scale
+    @return             :(bytes, bytes)  The positions, in [0, 1], and the values, in
+                                         [0, 1] scale, of the control points, as arrays
+                                         of `double` in the machine's byte order;
+                                         `errno` on failure
+    '''
+    cdef void *address = <void *><size_t>this
+    cdef size_t n = <size_t>size, k = 0, i
+    cdef double tol = <double>tolerance
+    cdef double last = <double>(n - 1) if n > 1 else 1
+    cdef double *xs = <double *>malloc(2 * n * sizeof(double))
+    cdef double *ys
+    cdef bytes rx, ry
+    if n == 0:
+        free(xs)
+        return (b'', b'')
+    if xs is NULL:
+        return int(errno)
+    ys = xs + n
+    with nogil:
+        if   depth ==  8:  k = compress_ramp(<uint8_t *>address,  n, <double>UINT8_MAX,  tol, xs, ys)
+        elif depth == 16:  k = compress_ramp(<uint16_t *>address, n, <double>UINT16_MAX, tol, xs, ys)
+        elif depth == 32:  k = compress_ramp(<uint32_t *>address, n, <double>UINT32_MAX, tol, xs, ys)
+        elif depth == 64:  k = compress_ramp(<uint64_t *>address, n, <double>UINT64_MAX, tol, xs, ys)
+        elif depth == -1:  k = compress_ramp(<float *>address,    n, 1.0, tol, xs, ys)
+        else:              k = compress_ramp(<double *>address,   n, 1.0, tol, xs, ys)
+        for i in range(k):
+            xs[i] /= last
+    rx = (<char *>xs)[:k * sizeof(double)]
+    ry = (<char *>ys)[:k * sizeof(double)]
+    free(xs)
+    return (rx, ry)
+
+
+def libgamma_native_gamma_ramp_expand(this : int, size : int, depth : int, xs, ys):
+    '''
+    Fill a gamma ramp from a piecewise linear curve
+    
+    @param  this   The gamma ramp
+    @param  size   The number of stops in the gamma ramp
+    @param  depth  The depth of the gamma ramp
+    @param  xs     :bytes-like  The positions, in [0, 1] and in ascending order, of
+                                the control points, as an array of `double`
+    @param  ys     :bytes-like  The values, in [0, 1] scale, of the control
+                                points, as an array of `double`
+    '''
+    cdef void *address = <void *><size_t>this
+    cdef const double[::1] vx = xs
+    cdef const double[::1] vy = ys
+    cdef size_t n = <size_t>size
+    cdef size_t k = <size_t>vx.shape[0]
+    if k == 0 or not vy.shape[0] == vx.shape[0]:
+        raise ValueError('invalid control points')
+    with nogil:
+        if   depth ==  8:  expand_ramp(<uint8_t *>address,  n, <double>UINT8_MAX,  &vx[0], &vy[0], k)
+        elif depth == 16:  expand_ramp(<uint16_t *>address, n, <double>UINT16_MAX, &vx[0], &vy[0], k)
+        elif depth == 32:  expand_ramp(<uint32_t *>address, n, <double>UINT32_MAX, &vx[0], &vy[0], k)
+        elif depth == 64:  expand_ramp(<uint64_t *>address, n, <double>UINT64_MAX, &vx[0], &vy[0], k)
+        elif depth == -1:  expand_ramp(<float *>address,    n, 1.0, &vx[0], &vy[0], k)
+        else:              expand_ramp(<double *>address,   n, 1.0, &vx[0], &vy[0], k)
+
+
+ctypedef fused source_t:
+    uint8_t
+    uint16_t
+    uint32_t
+    uint64_t
+    float
+    double
+
+
+cdef void convert_ramp(stop_t *ramp, int depth, const source_t *source, int source_depth, size_t n) noexcept nogil:
+    '''
+    Copy the stops of a gamma ramp to a gamma ramp of another depth
+    
+    Integer stops are scaled so that the greatest value of one depth
+    becomes the greatest value of the other depth, rounding to the
+    nearest value; floating-point stops are clipped to [0, 1] when
+    converted to integers
+    
+    @param  ramp          The gamma ramp to copy to
+    @param  depth         The depth of `ramp`
+    @param  source        The gamma ramp to copy from, with `n` stops
+    @param  source_depth  The depth of `source`
+    @param  n             The number of stops in the gamma ramps
+    '''
+    cdef size_t i
+    cdef uint64_t maximum, source_maximum, ratio, v
+    cdef double x, m
+    if depth > 0:
+        maximum = (<uint64_t>0xFFFFFFFFFFFFFFFF) >> (64 - depth)
+    if source_depth > 0:
+        source_maximum = (<uint64_t>0xFFFFFFFFFFFFFFFF) >> (64 - source_depth)
+    if depth > 0 and source_depth > 0:
+        # All depths are powers of two, so the ratio between the maximums is an integer
+        if depth >= source_depth:
+            ratio = maximum // source_maximum
+            for i in range(n):
+                ramp[i] = <stop_t>(<uint64_t>source[i] * ratio)
+        else:
+            ratio = source_maximum // maximum
+            for i in range(n):
+                v = <uint64_t>source[i]
+                ramp[i] = <stop_t>(v // ratio + (1 if (v % ratio) * 2 >= ratio else 0))
+    elif depth > 0:
+        m = <double>maximum
+        for i in range(n):
+            x = <double>source[i]
+            if not x > 0:
+                ramp[i] = <stop_t>0
+            else:
+                x = x * m + 0.5
+                ramp[i] = <stop_t>maximum if x >= m else <stop_t>(<uint64_t>x)
+    elif source_depth > 0:
+        m = <double>source_maximum
+        for i in range(n):
+            ramp[i] = <stop_t>(<double>source[i] / m)
+    else:
+        for i in range(n):
+            ramp[i] = <stop_t>source[i]
+
+
+cdef void convert_from(stop_t *ramp, int depth, const void *source, int source_depth, size_t n) noexcept nogil:
+    '''
+    Copy the stops of a gamma ramp to a gamma ramp of another depth
+    
+    @param  ramp          The gamma ramp to copy to
+    @param  depth         The depth of `ramp`
+    @param  source        The gamma ramp to copy from, with `n` stops
+    @param  source_depth  The depth of `source`
+    @param  n             The number of stops in the gamma ramps
+    '''
+    if   source_depth ==  8:  convert_ramp(ramp, depth, <const uint8_t *>source,  source_depth, n)
+    elif source_depth == 16:  convert_ramp(ramp, depth, <const uint16_t *>source, source_depth, n)
+    elif source_depth == 32:  convert_ramp(ramp, depth, <const uint32_t *>source, source_depth, n)
+    elif source_depth == 64:  convert_ramp(ramp, depth, <const uint64_t *>source, source_depth, n)
+    elif source_depth == -1:  convert_ramp(ramp, depth, <const float *>source,    source_depth, n)
+    else:                     convert_ramp(ramp, depth, <const double *>source,   source_depth, n)
+
+
+def libgamma_native_gamma_ramp_convert(this : int, depth : int, source : int, source_depth : int, size : int):
+    '''
+    Copy the stops of a gamma ramp to a gamma ramp of another depth
+    
+    @param  this          The gamma ramp to copy to
+    @param  depth         The depth of `this`
+    @param  source        The gamma ramp to copy from
+    @param  source_depth  The depth of `source`
+    @param  size          The number of stops in the gamma ramps
+    '''
+    cdef void *address = <void *><size_t>this
+    cdef const void *source_address = <const void *><size_t>source
+    cdef size_t n = <size_t>size
+    cdef int d = depth
+    cdef int sd = source_depth
+    with nogil:
+        if   d ==  8:  convert_from(<uint8_t *>address,  d, source_address, sd, n)
+        elif d == 16:  convert_from(<uint16_t *>address, d, source_address, sd, n)
+        elif d == 32:  convert_from(<uint32_t *>address, d, source_address, sd, n)
+        elif d == 64:  convert_from(<uint64_t *>address, d, source_address, sd, n)
+        elif d == -1:  convert_from(<float *>address,    d, source_address, sd, n)
+        else:          convert_from(<double *>address,   d, source_address, sd, n)
+
+
+def libgamma_native_gamma_ramp_equal(this : int, other : int, size : int) -> bool:
+    '''
+    Compare the stops of two gamma ramps
+    
+    @param   this   The first gamma ramp
+    @param   other  The second gamma ramp
+    @param   size   The number of bytes to compare
+    @return         Whether the gamma ramps have the same bytes
+    '''
+    cdef const void *a = <const void *><size_t>this
+    cdef const void *b = <const void *><size_t>other
+    cdef size_t n = <size_t>size
+    cdef int r = 0
+    if n > 0:
+        with nogil:
+            r = memcmp(a, b, n)
+    return r == 0
+
+
+def libgamma_native_gamma_ramp_hash(this : int, size : int) -> int:
+    '''
+    Calculate a hash of the stops of a gamma ramp, using 64-bit FNV-1a
+    
+    @param   this  The gamma ramp
+    @param   size  The number of bytes to hash
+    @return        The hash
+    '''
+    cdef const unsigned char *address = <const unsigned char *><size_t>this
+    cdef size_t n = <size_t>size
+    cdef size_t i
+    cdef uint64_t h = <uint64_t>0xCBF29CE484222325
+    cdef uint64_t prime = <uint64_t>0x100000001B3
+    with nogil:
+        for i in range(n):
+            h = (h ^ address[i]) * prime
+    return h
+
+
+cdef void load_ramp(const stop_t *ramp, size_t n, double maximum, double *values) noexcept nogil:
+    '''
+    Read the stops of a gamma ramp in [0, 1] scale
+    
+    @param  ramp     The gamma ramp
+    @param  n        The number of stops in the gamma ramp
+    @param  maximum  The value of a stop that represents full intensity
+    @param  values   Output array, with room for `n` elements, for the values
+    '''
+    cdef size_t i
+    for i in range(n):
+        values[i] = <double>ramp[i] / maximum
+
+
+cdef void store_ramp(stop_t *ramp, size_t n, double maximum, const double *values) noexcept nogil:
+    '''
+    Set the stops of a gamma ramp from values in [0, 1] scale, saturating
+    values outside [0, 1] and rounding to the nearest integer value
+    
+    @param  ramp     The gamma ramp
+    @param  n        The number of stops in the gamma ramp
+    @param  maximum  The value of a stop that represents full intensity
+    @param  values   The values, `n` elements
+    '''
+    cdef size_t i
+    cdef double y
+    for i in range(n):
+        y = values[i]
+        if not y > 0:
+            ramp[i] = 0
+        elif y >= 1:
+            if stop_t is float or stop_t is double:
+                ramp[i] = 1
+            else:
+                ramp[i] = ~(<stop_t>0)
+        elif stop_t is float or stop_t is double:
+            ramp[i] = <stop_t>y
+        else:
+            y = y * maximum + 0.5
+            ramp[i] = ~(<stop_t>0) if y >= maximum else <stop_t>y
+
+
+cdef double *load_values(const void *ramp, size_t n, int depth) noexcept nogil:
+    '''
+    Read the stops of a gamma ramp in [0, 1] scale into a new array
+    
+    @param   ramp   The gamma ramp
+    @param   n      The number of stops in the gamma ramp
+    @param   depth  The depth of the gamma ramp
+    @return         The values, to be released with `free`,
+                    `NULL` on failure, `errno` will be set
+    '''
+    cdef double *values = <double *>malloc((n if n > 0 else 1) * sizeof(double))
+    if values is NULL:
+        return NULL
+    if   depth ==  8:  load_ramp(<const uint8_t *>ramp,  n, <double>UINT8_MAX,  values)
+    elif depth == 16:  load_ramp(<const uint16_t *>ramp, n, <double>UINT16_MAX, values)
+    elif depth == 32:  load_ramp(<const uint32_t *>ramp, n, <double>UINT32_MAX, values)
+    elif depth == 64:  load_ramp(<const uint64_t *>ramp, n, <double>UINT64_MAX, values)
+    elif depth == -1:  load_ramp(<const float *>ramp,    n, 1.0, values)
+    else:              load_ramp(<const double *>ramp,   n, 1.0, values)
+    return values
+
+
+cdef void store_values(void *ramp, size_t n, int depth, const double *values) noexcept nogil:
+    '''
+    Set the stops of a gamma ramp from values in [0, 1] scale
+    
+    @param  ramp    The gamma ramp
+    @param  n       The number of stops in the gamma ramp
+    @param  depth   The depth of the gamma ramp
+    @param  values  The values, `n` elements
+    '''
+    if   depth ==  8:  store_ramp(<uint8_t *>ramp,  n, <double>UINT8_MAX,  values)
+    elif depth == 16:  store_ramp(<uint16_t *>ramp, n, <double>UINT16_MAX, values)
+    elif depth == 32:  store_ramp(<uint32_t *>ramp, n, <double>UINT32_MAX, values)
+    elif depth == 64:  store_ramp(<uint64_t *>ramp, n, <double>UINT64_MAX, values)
+    elif depth == -1:  store_ramp(<float *>ramp,    n, 1.0, values)
+    else:              store_ramp(<double *>ramp,   n, 1.0, values)
+
+
+cdef double sample(const double *values, size_t n, double x) noexcept nogil:
+    '''
+    Evaluate a ramp at any encoding value, interpolating linearly between the stops
+    
+    @param   values  The values of the stops, in [0, 1] scale
+    @param   n       The number of stops, at least 1
+    @param   x       The encoding value, it is clipped to [0, 1]
+    @return          The value of the ramp at `x`
+    '''
+    cdef size_t i
+    if not x > 0 or n == 1:
+        return values[0]
+    if x >= 1:
+        return values[n - 1]
+    x *= <double>(n - 1)
+    i = <size_t>x
+    if i >= n - 1:
+        return values[n - 1]
+    return values[i] + (values[i + 1] - values[i]) * (x - <double>i)
+
+
+def libgamma_native_gamma_ramp_compose(this : int, size : int, depth : int,
+                                      outer : int, outer_size : int, outer_depth : int,
+                                      inner : int, inner_size : int, inner_depth : int) -> int:
+    '''
+    Compose two gamma ramps, using the output of one as the encoding value of the other
+    
+    @param   this         The gamma ramp to store the composition in
+    @param   size         The number of stops in `this`
+    @param   depth        The depth of `this`
+    @param   outer        The gamma ramp applied last
+    @param   outer_size   The number of stops in `outer`, at least 1
+    @param   outer_depth  The depth of `outer`
+    @param   inner        The gamma ramp applied first
+    @param   inner_size   The number of stops in `inner`, at least 1
+    @param   inner_depth  The depth of `inner`
+    @return               Zero on success, `errno` on failure
+    '''
+    cdef size_t n = <size_t>size, no = <size_t>outer_size, ni = <size_t>inner_size, i
+    cdef int d = depth, do = outer_depth, di = inner_depth
+    cdef void *address = <void *><size_t>this
+    cdef const void *a = <const void *><size_t>outer
+    cdef const void *b = <const void *><size_t>inner
+    cdef double last = <double>(n - 1) if n > 1 else 1
+    cdef double *result = NULL
+    cdef double *vo = NULL
+    cdef double *vi = NULL
+    cdef int r = 0
+    with nogil:
+        result = <double *>malloc((n if n > 0 else 1) * sizeof(double))
+        vo = load_values(a, no, do) if result is not NULL else NULL
+        vi = load_values(b, ni, di) if vo is not NULL else NULL
+        if vi is NULL:
+            r = errno
+        else:
+            for i in range(n):
+                result[i] = sample(vo, no, sample(vi, ni, <double>i / last))
+            store_values(address, n, d, result)
+        free(result)
+        free(vo)
+        free(vi)
+    return r
+
+
+def libgamma_native_gamma_ramp_combine(this : int, size : int, depth : int,
+                                      a : int, a_size : int, a_depth : int,
+                                      b : int, b_size : int, b_depth : int,
+                                      wa : float, wb : float, wab : float) -> int:
+    '''
+    Combine two gamma ramps pointwise, as `wa * a + wb * b + wab * a * b` in [0, 1] scale
+    
+    @param   this     The gamma ramp to store the result in
+    @param   size     The number of stops in `this`
+    @param   depth    The depth of `this`
+    @param   a        The first gamma ramp
+    @param   a_size   The number of stops in `a`, at least 1
+    @param   a_depth  The depth of `a`
+    @param   b        The second gamma ramp
+    @param   b_size   The number of stops in `b`, at least 1
+    @param   b_depth  The depth of `b`
+    @param   wa       The weight of `a`
+    @param   wb       The weight of `b`
+    @param   wab      The weight of the product of `a` and `b`
+    @return           Zero on success, `errno` on failure
+    '''
+    cdef size_t n = <size_t>size, na = <size_t>a_size, nb = <size_t>b_size, i
+    cdef int d = depth, da = a_depth, db = b_depth
+    cdef void *address = <void *><size_t>this
+    cdef const void *pa = <const void *><size_t>a
+    cdef const void *pb = <const void *><size_t>b
+    cdef double ka = wa, kb = wb, kab = wab, x, y
+    cdef double last = <double>(n - 1) if n > 1 else 1
+    cdef double *result = NULL
+    cdef double *va = NULL
+    cdef double *vb = NULL
+    cdef int r = 0
+    with nogil:
+        result = <double *>malloc((n if n > 0 else 1) * sizeof(double))
+        va = load_values(pa, na, da) if result is not NULL else NULL
+        vb = load_values(pb, nb, db) if va is not NULL else NULL
+        if vb is NULL:
+            r = errno
+        else:
+            for i in range(n):
+                x = sample(va, na, <double>i / last)
+                y = sample(vb, nb, <double>i / last)
+                result[i] = ka * x + kb * y + kab * x * y
+            store_values(address, n, d, result)
+        free(result)
+        free(va)
+        free(vb)
+    return r
+
+
+def libgamma_native_gamma_ramp_invert(this : int, size : int, depth : int,
+                                     source : int, source_size : int, source_depth : int,
+                                     tolerance : float) -> int:
+    '''
+    Invert a monotone gamma ramp
+    
+    @param   this          The gamma ramp to store the inverse in
+    @param   size          The number of stops in `this`
+    @param   depth         The depth of `this`
+    @param   source        The gamma ramp to invert, it may be increasing or decreasing
+    @param   source_size   The number of stops in `source`, at least 1
+    @param   source_depth  The depth of `source`
+    @param   tolerance     How much, in [0, 1] scale, `source` may go against its direction
+    @return                Zero on success, `errno` on failure, -1 if `source` is not monotone
+    '''
+    cdef size_t n = <size_t>size, ns = <size_t>source_size, i, j, k = 1
+    cdef int d = depth, ds = source_depth
+    cdef void *address = <void *><size_t>this
+    cdef const void *ps = <const void *><size_t>source
+    cdef double tol = tolerance, y, x, t
+    cdef double last = <double>(n - 1) if n > 1 else 1
+    cdef double *result = NULL
+    cdef double *v = NULL
+    cdef bint decreasing
+    cdef int r = 0
+    with nogil:
+        result = <double *>malloc((n if n > 0 else 1) * sizeof(double))
+        v = load_values(ps, ns, ds) if result is not NULL else NULL
+        if v is NULL:
+            r = errno
+        else:
+            # Make the ramp increasing, and replace it with its running maximum
+            decreasing = v[ns - 1] < v[0]
+            if decreasing:
+                for i in range(ns // 2):
+                    (v[i], v[ns - 1 - i]) = (v[ns - 1 - i], v[i])
+            for i in range(1, ns):
+                if v[i] < v[i - 1] - tol:
+                    r = -1
+                    break
+                if v[i] < v[i - 1]:
+                    v[i] = v[i - 1]
+            if r == 0:
+                for j in range(n):
+                    y = <double>j / last
+                    if y <= v[0]:
+                        x = 0
+                    elif y >= v[ns - 1]:
+                        x = 1
+                    else:
+                        while v[k] < y:
+                            k += 1
+                        t = (y - v[k - 1]) / (v[k] - v[k - 1])
+                        x = (<double>(k - 1) + t) / <double>(ns - 1)
+                    result[j] = 1 - x if decreasing else x
+                store_values(address, n, d, result)
+        free(result)
+        free(v)
+    return r
@@ -0,0 +1,400 @@
+# See LICENSE file for copyright and license details.
+import os
+import time
+import bisect
+import math
+import select
+import threading
+from libgamma_composite import CompositeCRTC
+
+
+_DAY = 24 * 60 * 60
+'''
+The number of seconds in a day
+'''
+
+_MAX_SLEEP = 5 * 60
+'''
+The longest time, in seconds, slept at once when timerfd is not available,
+as the sleep does not include time the computer was suspended
+'''
+
+_TFD_TIMER_CANCEL_ON_SET = 1 << 1
+'''
+Linux's flag for making a real-time timerfd report when the
+clock is changed, which the `os` module does not provide
+'''
+
+
+def _blackbody(temperature : float) -> tuple:
+    '''
+    Get the colour of a blackbody, approximated by a fitted curve
+    
+    @param   temperature  The temperature, in kelvins, in [1000, 40000]
+    @return               :(float, float, float)  The red, green, and blue
+                                                  components, in [0, 1]
+    '''
+    t = min(max(temperature, 1000.0), 40000.0) / 100.0
+    if t <= 66:
+        red = 255.0
+        green = 99.4708025861 * math.log(t) - 161.1195681661
+    else:
+        red = 329.698727446 * (t - 60) ** -0.1332047592
+        green = 288.1221695283 * (t - 60) ** -0.0755148492
+    if t >= 66:
+        blue = 255.0
+    elif t <= 19:
+        blue = 0.0
+    else:
+        blue = 138.5177312231 * math.log(t - 10) - 305.0447927307
+    return tuple(min(max(c / 255.0, 0.0), 1.0) for c in (red, green, blue))
+
+
+def _whitepoint(temperature : float) -> tuple:
+    '''
+    Get the multipliers of the channels for a colour temperature
+    
+    @param   temperature  The temperature, in kelvins
+    @return               :(float, float, float)  The red, green, and blue multipliers,
+                                                  all 1 for 6500 kelvins
+    '''
+    return tuple(min(c / d, 1.0) for c, d in zip(_blackbody(temperature), _blackbody(6500)))
+
+
+def _seconds(when) -> float:
+    '''
+    Parse a time of day
+    
+    @param   when  :float|str  The number of seconds since midnight, or 'HH:MM' or 'HH:MM:SS'
+    @return        The number of seconds since midnight
+    '''
+    if isinstance(when, str):
+        parts = [float(part) for part in when.split(':')]
+        if not 2 <= len(parts) <= 3:
+            raise ValueError('invalid time of day: %s' % repr(when))
+        return parts[0] * 3600 + parts[1] * 60 + (parts[2] if len(parts) == 3 else 0)
+    return float(when)
+
+
+def _time_of_day(now : float) -> float:
+    '''
+    Get the local time of day
+    
+    @param   now  The time, as returned by `time.time`
+    @return       The number of seconds since local midnight
+    '''
+    local = time.localtime(now)
+    return local.tm_hour * 3600 + local.tm_min * 60 + local.tm_sec + (now % 1)
+
+
+def _utc_offset(now : float) -> int:
+    '''
+    Get the offset of local time from UTC
+    
+    @param   now  The time, as returned by `time.time`
+    @return       The number of seconds local time is ahead of UTC
+    '''
+    return time.localtime(now).tm_gmtoff
+
+
+class _Timeline:
+    '''
+    Keyframes of the settings of a CRTC over a day
+    '''
+
+    def __init__(self, keyframes, profiles : dict):
+        '''
+        Constructor
+        
+        @param  keyframes  :itr<(float|str, dict|str)>  See `Scheduler.add`
+        @param  profiles   :dict<str, dict>             The named profiles
+        '''
+        frames = []
+        for (when, setting) in keyframes:
+            if isinstance(setting, str):
+                setting = profiles[setting]
+            frames.append((_seconds(when) % _DAY,
+                           float(setting.get('temperature', 6500)),
+                           float(setting.get('brightness', 1))))
+        if len(frames) == 0:
+            raise ValueError('no keyframes')
+        frames.sort(key = lambda frame : frame[0])
+        self._frames = frames
+        self._times = [frame[0] for frame in frames]
+
+
+    def segment(self, s : float) -> tuple:
+        '''
+        Get the keyframes around a time of day
+        
+        @param   s  The number of seconds since midnight
+        @return     :((float, float, float), (float, float, float))  The keyframes before
+                                                                    and after, the time of
+                                                                    the one after is greater
+                                                                    than that of the one before,
+                                                                    even across midnight
+        '''
+        frames = self._frames
+        i = bisect.bisect_right(self._times, s)
+        if i == 0:
+            (when, temperature, brightness) = frames[-1]
+            return ((when - _DAY, temperature, brightness), frames[0])
+        if i == len(frames):
+            (when, temperature, brightness) = frames[0]
+            return (frames[-1], (when + _DAY, temperature, brightness))
+        return (frames[i - 1], frames[i])
+
+
+    def at(self, s : float) -> tuple:
+        '''
+        Get the settings at a time of day
+        
+        @param   s  The number of seconds since midnight
+        @return     :(float, float)  The temperature and brightness
+        '''
+        (before, after) = self.segment(s)
+        f = (s - before[0]) / (after[0] - before[0])
+        return (before[1] + (after[1] - before[1]) * f,
+                before[2] + (after[2] - before[2]) * f)
+
+
+    def next_change(self, s : float, steps : tuple) -> float:
+        '''
+        Get when the quantised settings next change
+        
+        @param   s      The number of seconds since midnight
+        @param   steps  :(float, float)  The quantisation step of the temperature and brightness
+        @return         The number of seconds from `s` until the quantised settings change,
+                        `None` if they never change
+        '''
+        (before, after) = self.segment(s)
+        if len(self._frames) == 1:
+            return None
+        rc = after[0] - s
+        f = (s - before[0]) / (after[0] - before[0])
+        for (v0, v1, step) in zip(before[1:], after[1:], steps):
+            if v0 == v1:
+                continue
+            v = v0 + (v1 - v0) * f
+            q = math.floor(v / step + 0.5)
+            boundary = (q + (0.5 if v1 > v0 else -0.5)) * step
+            when = before[0] + (boundary - v0) / (v1 - v0) * (after[0] - before[0])
+            if when > s:
+                rc = min(rc, when - s)
+        return rc
+
+
+class Scheduler:
+    '''
+    Applies colour temperature and brightness to CRTC:s according to
+    timelines of keyframes, waking up only when the quantised settings
+    of a CRTC change
+    
+    The settings are linearly interpolated between the keyframes, which
+    repeat every day, and quantised; the ramps are only applied if they
+    have changed. The scheduler sleeps with a timerfd on the real-time clock
+    where available, so that it wakes up at the right time after suspension
+    and when the clock is changed; elsewhere it sleeps on the monotonic clock
+    and wakes up at least every five minutes. Changes of daylight saving time
+    are accounted for in advance; if the clock is set back, the settings of
+    all CRTC:s are recomputed, and so they are the first time the scheduler
+    wakes up after the time zone has changed.
+    '''
+
+    def __init__(self, profiles : dict = None, temperature_step : float = 50, brightness_step : float = 1 / 256):
+        '''
+        Constructor
+        
+        @param  profiles          :dict<str, dict>?  Named profiles that can be used in keyframes
+        @param  temperature_step  The quantisation step of the colour temperature, in kelvins
+        @param  brightness_step   The quantisation step of the brightness
+        '''
+        self.profiles = {} if profiles is None else dict(profiles)
+        self._steps = (temperature_step, brightness_step)
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._wakeup = None
+        self._timer = None
+        self._event = threading.Event()
+        self._last = None
+        self._reset = False
+
+
+    def add(self, target, keyframes, layer = 'schedule', priority : int = 0) -> CompositeCRTC:
+        '''
+        Schedule a CRTC
+        
+        @param   target     :CRTC|CompositeCRTC  The CRTC, a `CompositeCRTC` is created for
+                                                 a `CRTC` so that other layers can be added
+        @param   keyframes  :itr<(float|str, dict|str)>  The time of day, in seconds since
+                                                         midnight or as 'HH:MM' or 'HH:MM:SS',
+                                                         and the settings: a dict with the colour
+                                                         temperature ('temperature', in kelvins,
+                                                         6500 by default) and the brightness
+                                                         ('brightness', 1 by default), or the
+                                                         name of a profile
+        @param   layer      The name of the layer the settings are applied as
+        @param   priority   The priority of the layer
+        @return             The CRTC the settings are applied to
+        '''
+        if not isinstance(target, CompositeCRTC):
+            target = CompositeCRTC(target)
+        timeline = _Timeline(keyframes, self.profiles)
+        target.add_layer(layer, lambda x : x, priority)
+        with self._lock:
+            self._entries[id(target)] = [target, timeline, layer, None, 0.0]
+        self._interrupt()
+        return target
+
+
+    def remove(self, target : CompositeCRTC):
+        '''
+        Stop scheduling a CRTC, its layer is removed
+        
+        @param  target  The CRTC, as returned by `add`
+        '''
+        with self._lock:
+            (target, _timeline, layer, _settings, _deadline) = self._entries.pop(id(target))
+        target.remove_layer(layer)
+        target.apply()
+
+
+    def run_once(self, now : float = None) -> float:
+        '''
+        Apply the settings of the CRTC:s whose quantised settings have changed
+        
+        @param   now  The time, as returned by `time.time`, `None` for the current time
+        @return       When the settings of a CRTC next change, as returned by
+                      `time.time`, `None` if they never change
+        '''
+        if now is None:
+            now = time.time()
+        s = _time_of_day(now)
+        offset = _utc_offset(now)
+        # The deadlines are invalid if the clock or time zone has changed
+        last = self._last
+        reset = self._reset or (last is not None and (now < last[0] or not offset == last[1]))
+        (self._last, self._reset) = ((now, offset), False)
+        (temperature_step, brightness_step) = self._steps
+        rc = None
+        with self._lock:
+            entries = list(self._entries.values())
+        for entry in entries:
+            (target, timeline, layer, settings, deadline) = entry
+            if settings is None or reset or now >= deadline:
+                (temperature, brightness) = timeline.at(s)
+                temperature = math.floor(temperature / temperature_step + 0.5) * temperature_step
+                brightness = math.floor(brightness / brightness_step + 0.5) * brightness_step
+                if not (temperature, brightness) == settings:
+                    white = _whitepoint(temperature)
+                    target.set_layer(layer, tuple([0.0, c * brightness] for c in white))
+                    target.apply()
+                    entry[3] = (temperature, brightness)
+                delay = timeline.next_change(s, self._steps)
+                if delay is None:
+                    entry[4] = float('inf')
+                else:
+                    # Adjust for daylight saving time changing before the boundary,
+                    # and wake up slightly after it so that the settings have changed
+                    when = now + delay
+                    entry[4] = when + (offset - _utc_offset(when)) + 0.001
+            if entry[4] < float('inf') and (rc is None or entry[4] < rc):
+                rc = entry[4]
+        return rc
+
+
+    def run(self):
+        '''
+        Apply the settings until `stop` is called
+        '''
+        self._stop.clear()
+        self._open_timer()
+        while not self._stop.is_set():
+            self._sleep_until(self.run_once())
+
+
+    def start(self):
+        '''
+        Run the scheduler in a thread of its own, see `run`
+        '''
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target = self.run, name = 'libgamma-scheduler', daemon = True)
+        self._thread.start()
+
+
+    def stop(self):
+        '''
+        Stop the scheduler, and wait for its thread to exit if started with `start`
+        '''
+        self._stop.set()
+        self._interrupt()
+        (thread, self._thread) = (self._thread, None)
+        if thread is not None and not thread is threading.current_thread():
+            thread.join()
+        if self._timer is not None:
+            os.close(self._timer)
+            os.close(self._wakeup[0])
+            os.close(self._wakeup[1])
+            (self._timer, self._wakeup) = (None, None)
+
+
+    def _interrupt(self):
+        '''
+        Wake up the scheduler so that it recomputes when to wake up
+        '''
+        wakeup = self._wakeup
+        if wakeup is not None:
+            try:
+                os.write(wakeup[1], b'\0')
+            except OSError:
+                pass
+        else:
+            self._event.set()
+
+
+    def _open_timer(self):
+        '''
+        Create the timerfd and the pipe used to interrupt it, if available
+        '''
+        if self._timer is None and hasattr(os, 'timerfd_create'):
+            try:
+                self._timer = os.timerfd_create(time.CLOCK_REALTIME, flags = os.TFD_CLOEXEC)
+                self._wakeup = os.pipe()
+                os.set_blocking(self._wakeup[0], False)
+                os.set_blocking(self._wakeup[1], False)
+            except OSError:
+                if self._timer is not None:
+                    os.close(self._timer)
+                self._timer = None
+
+
+    def _sleep_until(self, deadline : float):
+        '''
+        Sleep until a time, `stop` is called, or a CRTC is added
+        
+        An interruption that arrives while the scheduler is not
+        sleeping is kept, so the next sleep returns immediately
+        
+        @param  deadline  The time, as returned by `time.time`, `None` to sleep until interrupted
+        '''
+        if self._stop.is_set():
+            return
+        if self._timer is not None:
+            flags = os.TFD_TIMER_ABSTIME | getattr(os, 'TFD_TIMER_CANCEL_ON_SET', _TFD_TIMER_CANCEL_ON_SET)
+            os.timerfd_settime(self._timer, flags = flags, initial = 0 if deadline is None else max(deadline, 1e-9))
+            (readable, _, _) = select.select([self._timer, self._wakeup[0]], [], [])
+            for fd in readable:
+                try:
+                    os.read(fd, 4096)
+                except (BlockingIOError, InterruptedError):
+                    pass
+                except OSError:
+                    # ECANCELED: the clock was changed
+                    self._reset = True
+        else:
+            timeout = _MAX_SLEEP if deadline is None else min(max(deadline - time.time(), 0), _MAX_SLEEP)
+            self._event.wait(timeout)
+            self._event.clear()
@@ -0,0 +1,280 @@
+# See LICENSE file for copyright and license details.
+import os
+import mmap
+import struct
+from libgamma_method import GammaRamps
+from libgamma_native import native
+
+
+_MAGIC = b'LGRAMPS\x01'
+'''
+The first bytes of a shared gamma ramps segment, including the format version
+'''
+
+_HEADER = struct.Struct('=8siIII')
+'''
+The header of a shared gamma ramps segment: `_MAGIC`, the depth
+of the ramps, and the sizes of the red, green, and blue ramps
+'''
+
+_SEQUENCE = 64
+'''
+The offset of the sequence counter, it is placed in a cache
+line of its own so that writing it does not disturb the header
+'''
+
+_BUFFERS = 128
+'''
+The offset of the first buffer, each buffer
+is aligned to 64 bytes within the segment
+'''
+
+
+class SharedRamps:
+    '''
+    Double-buffered gamma ramps in shared memory, for passing gamma ramps
+    from a producer process to the process that owns the CRTC without
+    serialising or copying them
+    
+    The producer writes to the ramps returned by `back` and then calls
+    `publish`; the consumer calls `apply` to apply the most recently published
+    ramps, which are passed directly to the adjustment method. There shall only
+    be one producer. The segment can be shared by passing its file descriptor,
+    see `fileno`, to the other process, or by opening it by its pathname if
+    it was created in /dev/shm. Anonymous segments are sealed against
+    changing size where memfd is available, so that a process that does not
+    trust the producer can require the seals, see `__init__`, and not be
+    killed by SIGBUS if the producer truncates the segment.
+    
+    @variable  depth:int               The depth of the gamma ramps
+    @variable  size:(int, int, int)    The sizes of the red, green, and blue gamma ramps
+    @variable  path:str?               The pathname of the segment, `None` if it is anonymous
+    '''
+
+    def __init__(self, file, sealed : bool = False):
+        '''
+        Constructor, opens an existing segment
+        
+        @param  file    :int|str  The file descriptor, which is duplicated, or the pathname of the segment
+        @param  sealed  Whether to require that the segment is sealed against changing size,
+                        `ValueError` is raised if it is not
+        '''
+        self._views = ()
+        self._map = None
+        self._fd = -1
+        if isinstance(file, str):
+            self._fd = os.open(file, os.O_RDWR | getattr(os, 'O_CLOEXEC', 0))
+            self.path = file
+        else:
+            self._fd = os.dup(file)
+            self.path = None
+        try:
+            if sealed:
+                import fcntl
+                seals = fcntl.F_SEAL_SHRINK | fcntl.F_SEAL_GROW
+                if not fcntl.fcntl(self._fd, fcntl.F_GET_SEALS) & seals == seals:
+                    raise ValueError('shared gamma ramps segment is not sealed')
+            self._map = mmap.mmap(self._fd, 0)
+            if len(self._map) < _BUFFERS:
+                raise ValueError('not a shared gamma ramps segment')
+            (magic, depth, red, green, blue) = _HEADER.unpack_from(self._map)
+            sizes = GammaRamps._sizes
+            if sizes is None:
+                sizes = GammaRamps._sizes = native.libgamma_native_gamma_ramps_sizes()
+            if not magic == _MAGIC or depth not in sizes:
+                raise ValueError('not a shared gamma ramps segment')
+            n = _buffer_size(depth, red, green, blue)
+            if not len(self._map) == _BUFFERS + 2 * n:
+                raise ValueError('not a shared gamma ramps segment')
+            self.depth = depth
+            self.size = (red, green, blue)
+            self._views = (GammaRamps.from_buffer(self._map, red, green, blue, depth = depth, offset = _BUFFERS),
+                           GammaRamps.from_buffer(self._map, red, green, blue, depth = depth, offset = _BUFFERS + n))
+            self._sequence = native.libgamma_native_buffer_address(self._map)[0] + _SEQUENCE
+        except BaseException:
+            self.close()
+            raise
+        self._applied = None
+
+
+    @classmethod
+    def create(cls, red_size : int, green_size : int = ..., blue_size : int = ...,
+               *, depth : int = 16, name : str = None):
+        '''
+        Create a segment
+        
+        @param   red_size    The number of stops in the gamma ramp for the red channel
+        @param   green_size  The number of stops in the gamma ramp for the green channel, `...` for `red_size`
+        @param   blue_size   The number of stops in the gamma ramp for the blue channel, `...` for `green_size`
+        @param   depth       The depth of the gamma ramps
+        @param   name        The name of the segment in /dev/shm, `None` for an anonymous
+                             segment (a sealed memfd where available), which can only be
+                             shared by its file descriptor
+        @return              :SharedRamps  The segment
+        '''
+        if green_size is ...:  green_size = red_size
+        if blue_size is ...:   blue_size = green_size
+        sizes = GammaRamps._sizes
+        if sizes is None:
+            sizes = GammaRamps._sizes = native.libgamma_native_gamma_ramps_sizes()
+        if depth not in sizes:
+            raise ValueError('invalid gamma ramp depth')
+        path = None
+        sealable = False
+        if name is not None:
+            path = os.path.join('/dev/shm', name)
+            fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_EXCL | getattr(os, 'O_CLOEXEC', 0), 0o600)
+        elif hasattr(os, 'memfd_create'):
+            fd = os.memfd_create('libgamma-ramps', os.MFD_CLOEXEC | os.MFD_ALLOW_SEALING)
+            sealable = True
+        else:
+            import tempfile
+            (fd, temporary) = tempfile.mkstemp(prefix = 'libgamma-ramps-', dir = '/dev/shm')
+            os.unlink(temporary)
+        try:
+            os.ftruncate(fd, _BUFFERS + 2 * _buffer_size(depth, red_size, green_size, blue_size))
+            os.pwrite(fd, _HEADER.pack(_MAGIC, depth, red_size, green_size, blue_size), 0)
+            if sealable:
+                import fcntl
+                fcntl.fcntl(fd, fcntl.F_ADD_SEALS, fcntl.F_SEAL_SHRINK | fcntl.F_SEAL_GROW | fcntl.F_SEAL_SEAL)
+            rc = cls(fd)
+        except BaseException:
+            if path is not None:
+                os.unlink(path)
+            raise
+        finally:
+            os.close(fd)
+        rc.path = path
+        return rc
+
+
+    def __del__(self):
+        '''
+        This function is called when the object is not longer in use
+        '''
+        self.close()
+
+
+    def close(self):
+        '''
+        Unmap the segment, the segment itself is removed when it is no longer
+        open in any process and, if it has a pathname, it has been unlinked
+        '''
+        (views, self._views) = (getattr(self, '_views', ()), ())
+        for ramps in views:
+            ramps.close()
+        (segment, self._map) = (getattr(self, '_map', None), None)
+        if segment is not None:
+            segment.close()
+        (fd, self._fd) = (getattr(self, '_fd', -1), -1)
+        if fd >= 0:
+            os.close(fd)
+
+
+    def __enter__(self):
+        '''
+        Enter a `with` statement
+        
+        @return  :SharedRamps  `self`
+        '''
+        return self
+
+
+    def __exit__(self, *exc_info):
+        '''
+        Leave a `with` statement, closes the segment
+        '''
+        self.close()
+
+
+    def fileno(self) -> int:
+        '''
+        Get the file descriptor of the segment
+        
+        @return  The file descriptor of the segment
+        '''
+        return self._fd
+
+
+    @property
+    def sequence(self) -> int:
+        '''
+        Get the number of times ramps have been published
+        
+        @return  The number of times ramps have been published
+        '''
+        if self._map is None:
+            raise ValueError('operation on closed object')
+        return native.libgamma_native_sequence_load(self._sequence)
+
+
+    def back(self) -> GammaRamps:
+        '''
+        Get the gamma ramps the producer shall write to before calling `publish`,
+        their values are those of the ramps published before the current ones
+        
+        @return  The gamma ramps, they are valid until the segment is closed
+        '''
+        return self._views[(self.sequence + 1) & 1]
+
+
+    def front(self) -> tuple:
+        '''
+        Get the most recently published gamma ramps
+        
+        @return  :(int, GammaRamps)  The sequence number of the ramps, and the
+                                     ramps, they may be overwritten by the producer
+                                     after it publishes the next ramps
+        '''
+        sequence = self.sequence
+        return (sequence, self._views[sequence & 1])
+
+
+    def publish(self):
+        '''
+        Publish the ramps returned by `back`
+        '''
+        native.libgamma_native_sequence_store(self._sequence, self.sequence + 1)
+
+
+    def apply(self, crtc, force : bool = False) -> int:
+        '''
+        Apply the most recently published gamma ramps to a CRTC, without raising
+        an exception on failure; nothing is done if they have already been applied
+        
+        If the producer published new ramps while the ramps were being applied,
+        the applied ramps may have been partially overwritten, so the new ramps
+        are applied.
+        
+        @param   crtc   :CRTC  The CRTC
+        @param   force  Whether to apply the ramps even if they have already been applied
+        @return         Zero on success, otherwise the value of an error
+                        identifier provided by this library or `errno`,
+                        `create_error` can convert it to an exception
+        '''
+        sequence = self.sequence
+        if sequence == self._applied and not force:
+            return 0
+        while True:
+            r = crtc.try_set_gamma(self._views[sequence & 1])
+            latest = self.sequence
+            if latest == sequence:
+                break
+            sequence = latest
+        if r == 0:
+            self._applied = sequence
+        return r
+
+
+def _buffer_size(depth : int, red_size : int, green_size : int, blue_size : int) -> int:
+    '''
+    Get the size of a buffer in a segment
+    
+    @param   depth       The depth of the gamma ramps
+    @param   red_size    The number of stops in the red gamma ramp
+    @param   green_size  The number of stops in the green gamma ramp
+    @param   blue_size   The number of stops in the blue gamma ramp
+    @return              The number of bytes in the buffer, including padding
+    '''
+    n = (red_size + green_size + blue_size) * GammaRamps._sizes[depth][1]
+    return (n + 63) & ~63
@@ -0,0 +1,279 @@
+# See LICENSE file for copyright and license details.
+import struct
+from libgamma_error import LibgammaError, create_error
+from libgamma_error import LIBGAMMA_NO_SUCH_CRTC
+from libgamma_method import Site, Partition, CRTC, GammaRamps
+from libgamma_method import LIBGAMMA_CRTC_INFO_MACRO_RAMP
+from libgamma_native import native
+
+
+_MAGIC = b'LGSNAP\x00\x01'
+'''
+The first bytes of a serialised snapshot, including the format version
+'''
+
+_HEADER = struct.Struct('=8sI')
+'''
+The header of a serialised snapshot: `_MAGIC` and the number of CRTC:s
+'''
+
+_ENTRY = struct.Struct('=IIiIIIQ')
+'''
+The index entry of a CRTC in a serialised snapshot: the index of the
+partition, the index of the CRTC, the depth of the gamma ramps, the
+sizes of the red, green, and blue gamma ramps, and the offset of the
+stops in the buffer
+'''
+
+
+class Snapshot:
+    '''
+    The gamma ramps of all CRTC:s of a site, read in one pass into a
+    single contiguous buffer, so that they can be reverted to later
+    without depending on the adjustment method's system settings
+    
+    The CRTC:s are read in order, each directly into its place in the
+    buffer; CRTC:s that cannot be opened or read are left out. The
+    partitions and CRTC:s are kept open until the snapshot is closed so
+    that `revert` does not have to open them again.
+    
+    @variable  site:Site?  The site the snapshot is of, `None` if the snapshot was
+                           created with `from_bytes` and has not been reverted yet
+    '''
+
+    def __init__(self, site : Site):
+        '''
+        Constructor, takes a snapshot
+        
+        @param  site  The site
+        '''
+        self.site = site
+        self._partitions = {}
+        self._crtcs = {}
+        self._views = {}
+        found = []
+        for p in range(site.partitions_available):
+            partition = self._partition(p)
+            if partition is None:
+                continue
+            for c in range(partition.crtcs_available):
+                crtc = self._crtc(p, c)
+                if crtc is None:
+                    continue
+                (info, _ok) = crtc.information(LIBGAMMA_CRTC_INFO_MACRO_RAMP)
+                if not (info.gamma_size_error == 0 and info.gamma_depth_error == 0):
+                    continue
+                found.append((p, c, info.gamma_depth, info.red_gamma_size, info.green_gamma_size, info.blue_gamma_size))
+        (entries, n) = _layout(found)
+        self._data = bytearray(n)
+        self._entries = []
+        for entry in entries:
+            (p, c, depth, red, green, blue, offset) = entry
+            ramps = GammaRamps.from_buffer(self._data, red, green, blue, depth = depth, offset = offset)
+            if self._crtcs[(p, c)].try_get_gamma(ramps) == 0:
+                self._entries.append(entry)
+                self._views[(p, c)] = ramps
+            else:
+                ramps.close()
+
+
+    @classmethod
+    def from_bytes(cls, data):
+        '''
+        Load a snapshot serialised with `to_bytes`
+        
+        @param   data  :bytes-like  The serialised snapshot
+        @return        :Snapshot    The snapshot, it is not bound to a site until `revert` is called
+        '''
+        data = memoryview(data).cast('B')
+        if len(data) < _HEADER.size:
+            raise ValueError('not a gamma ramps snapshot')
+        (magic, count) = _HEADER.unpack_from(data)
+        start = _HEADER.size + count * _ENTRY.size
+        if not magic == _MAGIC or len(data) < start:
+            raise ValueError('not a gamma ramps snapshot')
+        sizes = GammaRamps._sizes
+        if sizes is None:
+            sizes = GammaRamps._sizes = native.libgamma_native_gamma_ramps_sizes()
+        self = cls.__new__(cls)
+        self.site = None
+        self._partitions = {}
+        self._crtcs = {}
+        self._views = {}
+        self._entries = [_ENTRY.unpack_from(data, _HEADER.size + i * _ENTRY.size) for i in range(count)]
+        self._data = bytearray(data[start:])
+        for (_p, _c, depth, red, green, blue, offset) in self._entries:
+            if depth not in sizes or offset + (red + green + blue) * sizes[depth][1] > len(self._data):
+                raise ValueError('not a gamma ramps snapshot')
+        return self
+
+
+    def to_bytes(self) -> bytes:
+        '''
+        Serialise the snapshot, see `from_bytes`
+        
+        @return  The snapshot, in the machine's byte order
+        '''
+        return b''.join([_HEADER.pack(_MAGIC, len(self._entries))] +
+                        [_ENTRY.pack(*entry) for entry in self._entries] +
+                        [bytes(self._data)])
+
+
+    def __del__(self):
+        '''
+        This function is called when the object is not longer in use
+        '''
+        self.close()
+
+
+    def close(self):
+        '''
+        Close the CRTC:s and partitions the snapshot has opened; the
+        snapshot can still be reverted to, they are opened again if needed
+        '''
+        (views, self._views) = (getattr(self, '_views', {}), {})
+        for ramps in views.values():
+            ramps.close()
+        (crtcs, self._crtcs) = (getattr(self, '_crtcs', {}), {})
+        for crtc in crtcs.values():
+            if crtc is not None:
+                crtc.close()
+        (partitions, self._partitions) = (getattr(self, '_partitions', {}), {})
+        for partition in partitions.values():
+            if partition is not None:
+                partition.close()
+
+
+    def __enter__(self):
+        '''
+        Enter a `with` statement
+        
+        @return  :Snapshot  `self`
+        '''
+        return self
+
+
+    def __exit__(self, *exc_info):
+        '''
+        Leave a `with` statement, closes the snapshot
+        '''
+        self.close()
+
+
+    def _partition(self, partition : int) -> Partition:
+        '''
+        Get a partition, open it if it is not already open
+        
+        @param   partition  The index of the partition
+        @return             The partition, `None` if it cannot be opened
+        '''
+        if partition not in self._partitions:
+            try:
+                self._partitions[partition] = Partition(self.site, partition)
+            except (LibgammaError, OSError):
+                self._partitions[partition] = None
+        return self._partitions[partition]
+
+
+    def _crtc(self, partition : int, crtc : int) -> CRTC:
+        '''
+        Get a CRTC, open it if it is not already open
+        
+        @param   partition  The index of the partition of the CRTC
+        @param   crtc       The index of the CRTC
+        @return             The CRTC, `None` if it cannot be opened
+        '''
+        key = (partition, crtc)
+        if key not in self._crtcs:
+            rc = self._partition(partition)
+            if rc is not None:
+                try:
+                    rc = CRTC(rc, crtc)
+                except (LibgammaError, OSError):
+                    rc = None
+            self._crtcs[key] = rc
+        return self._crtcs[key]
+
+
+    def crtcs(self) -> list:
+        '''
+        List the CRTC:s in the snapshot
+        
+        @return  :list<(int, int)>  The index of the partition and the index of each CRTC
+        '''
+        return [(p, c) for (p, c, _depth, _red, _green, _blue, _offset) in self._entries]
+
+
+    def ramps(self, partition : int, crtc : int) -> GammaRamps:
+        '''
+        Get the gamma ramps of a CRTC in the snapshot
+        
+        @param   partition  The index of the partition of the CRTC
+        @param   crtc       The index of the CRTC
+        @return             The gamma ramps, they are stored in the snapshot's
+                            buffer, so changing them changes the snapshot;
+                            they are valid until the snapshot is closed
+        '''
+        key = (partition, crtc)
+        ramps = self._views.get(key, None)
+        if ramps is None:
+            for (p, c, depth, red, green, blue, offset) in self._entries:
+                if (p, c) == key:
+                    ramps = GammaRamps.from_buffer(self._data, red, green, blue, depth = depth, offset = offset)
+                    self._views[key] = ramps
+                    break
+            else:
+                raise KeyError(key)
+        return ramps
+
+
+    def revert(self, site : Site = None):
+        '''
+        Apply the gamma ramps in the snapshot to the CRTC:s they were read from
+        
+        All CRTC:s are attempted even if some of them fail, after which
+        the error of the first CRTC that failed is raised
+        
+        @param  site  The site, `None` for the site the snapshot was taken of,
+                      it is required the first time a snapshot created with
+                      `from_bytes` is reverted
+        '''
+        if site is not None and not site is self.site:
+            self.close()
+            self.site = site
+        if self.site is None:
+            raise ValueError('snapshot is not bound to a site')
+        error = 0
+        for (p, c, _depth, _red, _green, _blue, _offset) in self._entries:
+            crtc = self._crtc(p, c)
+            r = LIBGAMMA_NO_SUCH_CRTC if crtc is None else crtc.try_set_gamma(self.ramps(p, c))
+            if not r == 0 and error == 0:
+                error = r
+        if not error == 0:
+            raise create_error(error)
+
+
+def _layout(crtcs : list) -> tuple:
+    '''
+    Place the gamma ramps of CRTC:s in a buffer
+    
+    @param   crtcs  :list<(int, int, int, int, int, int)>  The index of the partition, the index,
+                                                           the depth of the gamma ramps, and the
+                                                           sizes of the red, green, and blue
+                                                           gamma ramps of each CRTC
+    @return         :(list<(int, int, int, int, int, int, int)>, int)  The index entry of each CRTC, with the
+                                                                      offset of its stops appended, and the
+                                                                      size of the buffer; each CRTC's stops
+                                                                      are aligned to 8 bytes
+    '''
+    sizes = GammaRamps._sizes
+    if sizes is None:
+        sizes = GammaRamps._sizes = native.libgamma_native_gamma_ramps_sizes()
+    entries = []
+    offset = 0
+    for (p, c, depth, red, green, blue) in crtcs:
+        if depth not in sizes:
+            continue
+        entries.append((p, c, depth, red, green, blue, offset))
+        offset += ((red + green + blue) * sizes[depth][1] + 7) & ~7
+    return (entries, offset)
@@ -0,0 +1,181 @@
+# See LICENSE file for copyright and license details.
+import errno
+import threading
+from time import perf_counter_ns
+from libgamma_native import native
+
+
+_FUNCTIONS = ('libgamma_native_site_create',
+              'libgamma_native_site_free',
+              'libgamma_native_site_restore',
+              'libgamma_native_partition_create',
+              'libgamma_native_partition_free',
+              'libgamma_native_partition_restore',
+              'libgamma_native_crtc_create',
+              'libgamma_native_crtc_free',
+              'libgamma_native_crtc_restore',
+              'libgamma_native_get_crtc_information') + \
+             tuple('libgamma_native_crtc_%s_gamma_ramps%s' % (op, depth)
+                   for op in ('get', 'set') for depth in ('8', '16', '32', '64', 'f', 'd'))
+'''
+The native functions that are instrumented
+'''
+
+_originals = {}
+'''
+The uninstrumented version of each instrumented native
+function, empty when the instrumentation is disabled
+'''
+
+_stats = {}
+'''
+The recorded statistics, by native function
+'''
+
+_lock = threading.Lock()
+'''
+Lock for `_stats`
+'''
+
+
+def _error_code(rc) -> int:
+    '''
+    Get the error code from the return value of a native function
+    
+    @param   rc  The return value of the native function
+    @return      The error code, zero on success
+    '''
+    if isinstance(rc, int):
+        return rc
+    if isinstance(rc, tuple):
+        (value, code) = rc
+        if isinstance(value, list):
+            if code == 0:
+                return 0
+            from libgamma_backend import _INFORMATION_ERRORS
+            for i in _INFORMATION_ERRORS:
+                if not value[i] == 0:
+                    return value[i]
+            return 0
+        return code if value == 0 else 0
+    return 0
+
+
+def _error_name(code : int) -> str:
+    '''
+    Get the name of an error code
+    
+    @param   code  The error code, an error identifier provided by this library or an `errno` value
+    @return        The name of the error
+    '''
+    if code < 0:
+        from libgamma_error import _error_names
+        return _error_names.get(code, str(code))
+    return errno.errorcode.get(code, str(code))
+
+
+def _bucket(ns : int) -> int:
+    '''
+    Get the histogram bucket of a latency, the buckets are logarithmic
+    with eight linear sub-buckets each, so a bucket's upper bound is
+    at most 12.5 % greater than any latency in it
+    
+    @param   ns  The latency, in nanoseconds
+    @return      The upper bound, in nanoseconds, of the bucket
+    '''
+    if ns < 16:
+        return ns + 1
+    shift = ns.bit_length() - 4
+    return ((ns >> shift) + 1) << shift
+
+
+def _instrument(name : str, function):
+    '''
+    Create an instrumented version of a native function
+    
+    @param   name      The name of the native function
+    @param   function  The native function
+    @return            The instrumented function
+    '''
+    def instrumented(*args):
+        start = perf_counter_ns()
+        rc = function(*args)
+        elapsed = perf_counter_ns() - start
+        code = _error_code(rc)
+        bucket = _bucket(elapsed)
+        with _lock:
+            stat = _stats.get(name, None)
+            if stat is None:
+                stat = _stats[name] = {'calls' : 0, 'errors' : {}, 'sum_ns' : 0,
+                                       'min_ns' : elapsed, 'max_ns' : elapsed, 'histogram' : {}}
+            stat['calls'] += 1
+            stat['sum_ns'] += elapsed
+            if elapsed < stat['min_ns']:
+                stat['min_ns'] = elapsed
+            if elapsed > stat['max_ns']:
+                stat['max_ns'] = elapsed
+            histogram = stat['histogram']
+            histogram[bucket] = histogram.get(bucket, 0) + 1
+            if not code == 0:
+                errors = stat['errors']
+                errors[code] = errors.get(code, 0) + 1
+        return rc
+    return instrumented
+
+
+def enable_stats():
+    '''
+    Start recording statistics for calls to libgamma
+    
+    Calls through a `Backend` other than libgamma are not recorded.
+    While disabled, which is the default, the recording has no cost.
+    '''
+    with _lock:
+        if len(_originals) > 0:
+            return
+        for name in _FUNCTIONS:
+            function = getattr(native, name)
+            _originals[name] = function
+            setattr(native, name, _instrument(name[len('libgamma_native_'):], function))
+
+
+def disable_stats():
+    '''
+    Stop recording statistics for calls to libgamma,
+    the recorded statistics are kept
+    '''
+    with _lock:
+        for name, function in _originals.items():
+            setattr(native, name, function)
+        _originals.clear()
+
+
+def reset_stats():
+    '''
+    Discard the recorded statistics
+    '''
+    with _lock:
+        _stats.clear()
+
+
+def stats() -> dict:
+    '''
+    Get the recorded statistics
+    
+    @return  :dict<str, dict>  The statistics for each called function, by its name in libgamma
+                               without the `libgamma_` prefix (for example 'crtc_set_gamma_ramps16'
+                               or 'get_crtc_information'), as a dict with the number of calls
+                               ('calls'), the number of failures by error name ('errors'), the total,
+                               minimum and maximum latency in nanoseconds ('sum_ns', 'min_ns' and
+                               'max_ns'), and the latency histogram ('histogram') as a list of the
+                               upper bound, in nanoseconds, and number of calls of each non-empty
+                               bucket, in ascending order
+    '''
+    with _lock:
+        rc = {}
+        for name, stat in _stats.items():
+            stat = dict(stat)
+            stat['errors'] = dict((_error_name(code), count) for code, count in stat['errors'].items())
+            stat['histogram'] = sorted(stat['histogram'].items())
+            rc[name] = stat
+        return rc
@@ -0,0 +1,333 @@
+# See LICENSE file for copyright and license details.
+from libgamma_error import LibgammaError
+from libgamma_method import Site, Partition, CRTC
+from libgamma_method import LIBGAMMA_METHOD_LINUX_DRM
+from libgamma_method import LIBGAMMA_CRTC_INFO_EDID, LIBGAMMA_CRTC_INFO_ACTIVE
+from libgamma_method import LIBGAMMA_CRTC_INFO_MACRO_RAMP, LIBGAMMA_CRTC_INFO_MACRO_CONNECTOR
+
+
+LIBGAMMA_WATCH_FIELDS = LIBGAMMA_CRTC_INFO_EDID | \
+                        LIBGAMMA_CRTC_INFO_ACTIVE | \
+                        LIBGAMMA_CRTC_INFO_MACRO_RAMP | \
+                        LIBGAMMA_CRTC_INFO_MACRO_CONNECTOR
+'''
+The `CRTCInformation` fields that are read by default when
+watching a site, a change in any of them is reported
+'''
+
+
+class WatchEvent:
+    '''
+    Topology change event reported by `Watcher`
+    
+    @variable  kind:int                         `WatchEvent.ADDED`, `WatchEvent.REMOVED`
+                                                or `WatchEvent.CHANGED`
+    @variable  partition:int                    The index of the partition of the CRTC
+    @variable  crtc:int                         The index of the CRTC within the partition
+    @variable  information:CRTCInformation?     The new information about the CRTC,
+                                                `None` if the CRTC has been removed
+    @variable  old_information:CRTCInformation? The previous information about the CRTC,
+                                                `None` if the CRTC has been added
+    '''
+
+    ADDED = 1
+    '''
+    The CRTC did not exist at the previous scan
+    '''
+
+    REMOVED = 2
+    '''
+    The CRTC no longer exists
+    '''
+
+    CHANGED = 3
+    '''
+    The monitor, connector or gamma ramp
+    properties of the CRTC has changed
+    '''
+
+    def __init__(self, kind : int, partition : int, crtc : int, information, old_information):
+        '''
+        Constructor
+        
+        @param  kind             `WatchEvent.ADDED`, `WatchEvent.REMOVED` or `WatchEvent.CHANGED`
+        @param  partition        The index of the partition of the CRTC
+        @param  crtc             The index of the CRTC within the partition
+        @param  information      The new information about the CRTC
+        @param  old_information  The previous information about the CRTC
+        '''
+        self.kind            = kind
+        self.partition       = partition
+        self.crtc            = crtc
+        self.information     = information
+        self.old_information = old_information
+
+    def __repr__(self) -> str:
+        '''
+        Create a string representation of the event
+        
+        @return  A string representation of the event
+        '''
+        kind = {WatchEvent.ADDED : 'ADDED', WatchEvent.REMOVED : 'REMOVED', WatchEvent.CHANGED : 'CHANGED'}
+        return 'WatchEvent(%s, %i, %i)' % (kind.get(self.kind, str(self.kind)), self.partition, self.crtc)
+
+
+def _fingerprint(info) -> tuple:
+    '''
+    Get the parts of a CRTC's information that are compared between scans
+    
+    @param   info  :CRTCInformation  The information about the CRTC
+    @return        :tuple            A value that changes if and only if a relevant property changes
+    '''
+    return (info.edid, info.edid_error, info.active, info.active_error,
+            info.connector_name, info.connector_type,
+            info.red_gamma_size, info.green_gamma_size, info.blue_gamma_size, info.gamma_depth)
+
+
+class Watcher:
+    '''
+    Iterator of topology changes in a site
+    
+    For the Linux DRM adjustment method, the kernel's hotplug events
+    (uevent netlink socket) are used to decide when to rescan the site;
+    for all other adjustment methods the site is polled, with the interval
+    doubled, up to `max_interval`, each time nothing has changed.
+    
+    The watcher can be used as a blocking iterator, `for event in watcher`,
+    or as an asynchronous iterator, `async for event in watcher`
+    
+    @variable  site:Site  The watched site
+    '''
+
+    def __init__(self, site : Site, interval : float = 1, max_interval : float = 30, fields : int = LIBGAMMA_WATCH_FIELDS):
+        '''
+        Constructor
+        
+        @param  site          The site to watch
+        @param  interval      The shortest time, in seconds, between two scans when polling
+        @param  max_interval  The longest time, in seconds, between two scans when polling
+        @param  fields        OR:ed identifiers for the information about the CRTC:s that
+                              should be compared between scans
+        '''
+        import collections
+        self.site = site
+        self._min_interval = interval
+        self._max_interval = max_interval
+        self._interval = interval
+        self._fields = fields
+        self._pending = collections.deque()
+        self._uevent = None
+        if site.method == LIBGAMMA_METHOD_LINUX_DRM:
+            self._uevent = _open_uevent_socket()
+        self._topology = self._scan()
+
+
+    def __del__(self):
+        '''
+        This function is called when the object is not longer in use
+        '''
+        self.close()
+
+
+    def close(self):
+        '''
+        Stop watching and release the hotplug event socket
+        '''
+        uevent, self._uevent = getattr(self, '_uevent', None), None
+        if uevent is not None:
+            uevent.close()
+
+
+    def __enter__(self):
+        '''
+        Enter a `with` block
+        
+        @return  The watcher itself
+        '''
+        return self
+
+    def __exit__(self, *_exc):
+        '''
+        Leave a `with` block, the watcher is closed
+        '''
+        self.close()
+
+
+    def _scan(self) -> dict:
+        '''
+        Enumerate the CRTC:s in the site
+        
+        @return  :dict<(int, int), CRTCInformation>  The information about each CRTC, by
+                                                     its partition index and CRTC index
+        '''
+        site = self.site
+        if self._uevent is not None:
+            # Graphics cards can be added or removed,
+            # so the number of partitions must be reread
+            site = Site(site.method, site.site)
+        rc = {}
+        for p in range(site.partitions_available):
+            try:
+                partition = Partition(site, p)
+            except (LibgammaError, OSError):
+                continue
+            for c in range(partition.crtcs_available):
+                try:
+                    crtc = CRTC(partition, c)
+                except (LibgammaError, OSError):
+                    continue
+                rc[(p, c)] = crtc.information(self._fields)[0]
+        return rc
+
+
+    def poll(self) -> list:
+        '''
+        Rescan the site immediately
+        
+        @return  :list<WatchEvent>  The changes since the last scan
+        '''
+        old, new = self._topology, self._scan()
+        self._topology = new
+        events = []
+        for key in sorted(set(old) | set(new)):
+            if key not in old:
+                events.append(WatchEvent(WatchEvent.ADDED, *key, new[key], None))
+            elif key not in new:
+                events.append(WatchEvent(WatchEvent.REMOVED, *key, None, old[key]))
+            elif not _fingerprint(old[key]) == _fingerprint(new[key]):
+                events.append(WatchEvent(WatchEvent.CHANGED, *key, new[key], old[key]))
+        if len(events) > 0:
+            self._refresh(events)
+            self._interval = self._min_interval
+        else:
+            self._interval = min(self._interval * 2, self._max_interval)
+        return events
+
+
+    def _refresh(self, events : list):
+        '''
+        Discard the copies of the gamma ramps of the open CRTC:s
+        that have changed, see `CRTC.enable_shadow`
+        
+        @param  events  :list<WatchEvent>  The changes
+        '''
+        keys = {(event.partition, event.crtc) for event in events}
+        for partition in list(self.site._partitions):
+            for crtc in list(partition._crtcs):
+                if (partition.partition, crtc.crtc) in keys:
+                    crtc.refresh()
+
+
+    def _timeout(self) -> float:
+        '''
+        Get how long to wait before the next scan
+        
+        @return  The time, in seconds, to wait, `None` to
+                 wait until a hotplug event is received
+        '''
+        return None if self._uevent is not None else self._interval
+
+
+    def _drain(self) -> bool:
+        '''
+        Read all queued hotplug events
+        
+        @return  Whether any of the events concerned the DRM subsystem
+        '''
+        relevant = False
+        while True:
+            try:
+                message = self._uevent.recv(8192)
+            except BlockingIOError:
+                return relevant
+            if b'\0SUBSYSTEM=drm\0' in message:
+                relevant = True
+
+
+    def __iter__(self):
+        '''
+        Get a blocking iterator of the changes
+        
+        @return  The watcher itself
+        '''
+        return self
+
+    def __next__(self) -> WatchEvent:
+        '''
+        Wait for the next change
+        
+        @return  The next change
+        '''
+        import select, time
+        while len(self._pending) == 0:
+            if self._uevent is None:
+                time.sleep(self._timeout())
+            else:
+                select.select([self._uevent], [], [], self._timeout())
+                if not self._drain():
+                    continue
+            self._pending.extend(self.poll())
+        return self._pending.popleft()
+
+
+    def __aiter__(self):
+        '''
+        Get an asynchronous iterator of the changes
+        
+        @return  The watcher itself
+        '''
+        return self
+
+    async def __anext__(self) -> WatchEvent:
+        '''
+        Wait for the next change without blocking the event loop
+        
+        @return  The next change
+        '''
+        import asyncio
+        loop = asyncio.get_running_loop()
+        while len(self._pending) == 0:
+            if self._uevent is None:
+                await asyncio.sleep(self._timeout())
+            else:
+                readable = loop.create_future()
+                loop.add_reader(self._uevent.fileno(), readable.set_result, None)
+                try:
+                    await readable
+                finally:
+                    loop.remove_reader(self._uevent.fileno())
+                if not self._drain():
+                    continue
+            self._pending.extend(await loop.run_in_executor(None, self.poll))
+        return self._pending.popleft()
+
+
+def _open_uevent_socket():
+    '''
+    Subscribe to the kernel's hotplug events
+    
+    @return  :socket?  Non-blocking netlink socket, `None` if unavailable
+    '''
+    import socket
+    try:
+        sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, getattr(socket, 'NETLINK_KOBJECT_UEVENT', 15))
+    except (AttributeError, OSError):
+        return None
+    try:
+        sock.bind((0, 1))
+        sock.setblocking(False)
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def watch(site : Site, **kwargs) -> Watcher:
+    '''
+    Watch a site for CRTC:s being added, removed or changed
+    
+    @param   site    The site to watch
+    @param   kwargs  Additional arguments for `Watcher`
+    @return          Iterator, and asynchronous iterator, of `WatchEvent`:s
+    '''
+    return Watcher(site, **kwargs)
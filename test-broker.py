@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# See LICENSE file for copyright and license details.
+import os
+import errno
+import tempfile
+import threading
+import libgamma
+
+
+libgamma.dummy.configure(site_count = 1, partition_count = 1, crtc_count = 2,
+                         gamma_size = 256, gamma_depth = 16)
+capabilities = libgamma.dummy.capabilities
+capabilities.crtc_information |= libgamma.LIBGAMMA_CRTC_INFO_MACRO_RAMP
+libgamma.dummy.capabilities = capabilities
+
+directory = tempfile.mkdtemp(prefix = 'libgamma-test-')
+path = os.path.join(directory, 'broker')
+site = libgamma.Site(libgamma.LIBGAMMA_METHOD_DUMMY)
+broker = libgamma.Broker(site, path)
+server = threading.Thread(target = broker.serve_forever, daemon = True)
+server.start()
+client = libgamma.BrokerClient(path)
+
+print('\033[1mListing the CRTC:s of the broker\033[m')
+crtcs = client.crtcs()
+print(crtcs)
+assert [(p, c) for (p, c, _sizes, _depth, _error) in crtcs] == [(0, 0), (0, 1)]
+(_p, _c, sizes, depth, error) = crtcs[0]
+assert sizes == (256, 256, 256) and error == 0
+print()
+
+print('\033[1mSetting gamma ramps through the broker and reading them back\033[m')
+ramps = libgamma.GammaRamps(*sizes, depth = 16)
+ramps.red[:]   = [i * 257 // 2 for i in range(256)]
+ramps.green[:] = [i * 257 // 3 for i in range(256)]
+ramps.blue[:]  = [i * 257 // 4 for i in range(256)]
+client.set_gamma(0, 0, ramps, wait = True)
+readback = libgamma.GammaRamps(*sizes, depth = 16)
+client.get_gamma(0, 0, readback)
+assert readback == ramps
+print(list(readback.red[:8]))
+print()
+
+print('\033[1mSetting gamma ramps of the wrong size through the broker\033[m')
+wrong = libgamma.GammaRamps(sizes[0] + 1, sizes[1], sizes[2], depth = 16)
+try:
+    client.set_gamma(0, 0, wrong, wait = True)
+except OSError as err:
+    print(err)
+    assert err.errno == errno.EINVAL
+else:
+    assert False, 'gamma ramps of the wrong size were accepted'
+client.get_gamma(0, 0, readback)
+assert readback == ramps
+print()
+
+print('\033[1mPublishing gamma ramps in shared memory through the broker\033[m')
+shared = libgamma.SharedRamps.create(*sizes, depth = 16)
+client.attach(0, 1, shared)
+back = shared.back()
+back.red[:]   = [i * 257 // 5 for i in range(256)]
+back.green[:] = [i * 257 // 6 for i in range(256)]
+back.blue[:]  = [i * 257 // 7 for i in range(256)]
+client.publish(0, 1, shared, wait = True)
+client.get_gamma(0, 1, readback)
+assert list(readback.red) == [i * 257 // 5 for i in range(256)]
+assert list(readback.blue) == [i * 257 // 7 for i in range(256)]
+print(list(readback.red[:8]))
+print()
+
+client.close()
+broker.close()
+server.join()
+shared.close()
+os.rmdir(directory)
+
+# If not done expressively, if in the root scope,
+# we sometimes get ignored errors on exit
+del back
+del ramps
+del readback
+del wrong
+del site